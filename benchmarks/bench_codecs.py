@@ -0,0 +1,107 @@
+"""
+Benchmarks Wialon response decoding on a large ``core/search_items`` payload.
+
+Compares the python-wialon decode path (``bytes`` to ``str`` to object) against every installed :py:mod:`terminusgps.wialon.codecs` codec decoding the raw bytes.
+
+Usage:
+
+.. code:: bash
+
+    python -m benchmarks.bench_codecs --units 20000 --repeat 5
+
+"""
+
+import argparse
+import json
+import timeit
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = json
+
+from terminusgps.wialon import codecs
+
+
+def build_payload(units: int) -> bytes:
+    items = [
+        {
+            "id": 10000000 + i,
+            "nm": f"Unit #{i}",
+            "cls": 2,
+            "mu": 0,
+            "uacl": 880333094911,
+            "uid": f"86{i:013d}",
+            "hw": 1234,
+            "ph": "+15555555555",
+            "aflds": {
+                "1": {"id": 1, "n": "iccid", "v": f"8901{i:015d}"},
+                "2": {"id": 2, "n": "carrier", "v": "Verizon"},
+            },
+            "pos": {
+                "t": 1760000000 + i,
+                "y": 32.0 + i * 1e-5,
+                "x": -97.0 - i * 1e-5,
+                "z": 180,
+                "s": 55,
+                "c": 270,
+                "sc": 12,
+            },
+            "sens": {
+                str(s): {
+                    "id": s,
+                    "n": f"Sensor {s}",
+                    "t": "custom",
+                    "d": "",
+                    "m": "V",
+                    "p": f"io_{s}",
+                }
+                for s in range(1, 6)
+            },
+        }
+        for i in range(units)
+    ]
+    response = {
+        "searchSpec": {"itemsType": "avl_unit"},
+        "dataFlags": 0x501181,
+        "totalItemsCount": units,
+        "indexFrom": 0,
+        "indexTo": units - 1,
+        "items": items,
+    }
+    return json.dumps(response).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--units", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = build_payload(args.units)
+    print(f"Payload: {len(payload) / 1e6:.1f} MB, {args.units} units")
+
+    candidates = {
+        "python-wialon": lambda: simplejson.loads(
+            payload.decode("utf-8", errors="ignore")
+        )
+    }
+    for codec_cls in (
+        codecs.StdlibCodec,
+        codecs.OrjsonCodec,
+        codecs.MsgspecCodec,
+    ):
+        try:
+            codec = codec_cls()
+        except ImportError:
+            print(f"{codec_cls.name}: not installed")
+            continue
+        candidates[codec.name] = lambda codec=codec: codec.loads(payload)
+
+    for name, decode in candidates.items():
+        best = min(timeit.repeat(decode, number=1, repeat=args.repeat))
+        print(f"{name:>14}: {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmarks trip, stop and mileage analysis on synthetic unit tracks.
+
+Builds ``--units`` tracks of ``--points`` messages each (10M points by default) and times :py:class:`~terminusgps.wialon.trips.TripAnalyzer` analyzing them in one process and with a process pool.
+
+Usage:
+
+.. code:: bash
+
+    python -m benchmarks.bench_trips --units 1000 --points 10000 --workers 4
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from terminusgps.wialon.trips import Track, TripAnalyzer
+
+
+def build_tracks(units: int, points: int, seed: int = 0) -> list[Track]:
+    rng = np.random.default_rng(seed)
+    tracks = []
+    for unit_id in range(units):
+        times = 1760000000 + np.cumsum(rng.integers(10, 60, points))
+        # Alternate driving and parking in runs of ~50 messages.
+        moving = (np.arange(points) // 50 + unit_id) % 3 != 0
+        speeds = np.where(moving, rng.uniform(20, 110, points), 0.0)
+        step = speeds / 3.6 * np.diff(times, prepend=times[0]) / 111_320
+        heading = rng.uniform(0, 2 * np.pi, points)
+        tracks.append(
+            Track(
+                unit_id=unit_id,
+                times=times,
+                lats=32.0 + np.cumsum(step * np.cos(heading)),
+                lons=-97.0 + np.cumsum(step * np.sin(heading)),
+                speeds=speeds,
+                ignition=moving | (rng.random(points) < 0.1),
+            )
+        )
+    return tracks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--units", type=int, default=1000)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tracks = build_tracks(args.units, args.points)
+    total = args.units * args.points
+    print(f"Tracks: {args.units} units, {total / 1e6:.1f}M points")
+    analyzer = TripAnalyzer()
+
+    start = time.perf_counter()
+    summaries = [analyzer.analyze(track) for track in tracks]
+    serial = time.perf_counter() - start
+    print(
+        f"{'serial':>14}: {serial:8.2f} s, {total / serial / 1e6:6.1f}M points/s"
+    )
+
+    start = time.perf_counter()
+    parallel_summaries = analyzer.analyze_many(
+        tracks, max_workers=args.workers
+    )
+    parallel = time.perf_counter() - start
+    print(
+        f"{'process pool':>14}: {parallel:8.2f} s, {total / parallel / 1e6:6.1f}M points/s"
+    )
+
+    assert [s.distance for s in summaries] == [
+        s.distance for s in parallel_summaries
+    ]
+    trips = sum(len(s.trips) for s in summaries)
+    stops = sum(len(s.stops) for s in summaries)
+    distance = sum(s.distance for s in summaries) / 1000
+    print(f"Found {trips} trips, {stops} stops, {distance:,.0f} km")
+
+
+if __name__ == "__main__":
+    main()
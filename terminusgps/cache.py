@@ -0,0 +1,336 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+import typing
+import zlib
+
+from django.core.cache import caches
+
+from terminusgps.wialon import utils
+from terminusgps.wialon.codecs import get_default_codec
+from terminusgps.wialon.session import WialonSession
+from terminusgps.wialon.sid_store import DjangoCacheSidStore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ["FORMAT_VERSION", "DjangoCache"]
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+"""Version of the stored entry format. Part of every key, so entries written in an older format are never read."""
+
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+
+def _dumps(entry: dict[str, typing.Any], compress_over: int) -> bytes:
+    if orjson is not None:
+        data = orjson.dumps(entry)
+    else:
+        data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+    if len(data) > compress_over:
+        return _COMPRESSED + zlib.compress(data, 6)
+    return _RAW + data
+
+
+def _loads(data: bytes) -> dict[str, typing.Any]:
+    if data[:1] == _COMPRESSED:
+        return get_default_codec().loads(zlib.decompress(data[1:]))
+    return get_default_codec().loads(memoryview(data)[1:])
+
+
+class DjangoCache:
+    """
+    Caches Wialon unit lookups, Authorize.Net customer profiles and Wialon session ids in a Django cache backend, shared between processes.
+
+    Entries are stored as compact JSON, compressed with zlib when large. Keys contain :py:data:`FORMAT_VERSION` and are written with the cache ``version``, so bumping either invalidates every entry.
+
+    Entries are refreshed early at random before they expire ("XFetch"), more likely the closer they are to expiring and the longer they took to compute. One process usually refreshes a hot entry before it expires, instead of every process at once after.
+
+    Usage:
+
+    .. code::
+
+        cache = DjangoCache("default", timeout=300)
+        unit = cache.get_unit_from_imei(imei, session)
+        profile = cache.get_customer_profile(service, customer_profile_id=123)
+
+    """
+
+    def __init__(
+        self,
+        alias: str = "default",
+        *,
+        timeout: float = 300.0,
+        key_prefix: str = "terminusgps",
+        version: int = 1,
+        beta: float = 1.0,
+        compress_over: int = 1024,
+    ) -> None:
+        """
+        :param alias: Django cache alias. Default is ``"default"``.
+        :type alias: str
+        :param timeout: Seconds entries are kept for. Default is ``300.0``.
+        :type timeout: float
+        :param key_prefix: Prefix for cache keys. Default is ``"terminusgps"``.
+        :type key_prefix: str
+        :param version: Cache key version. Default is ``1``.
+        :type version: int
+        :param beta: Early expiry eagerness. Higher refreshes earlier, ``0`` never refreshes early. Default is ``1.0``.
+        :type beta: float
+        :param compress_over: Entries larger than this many bytes are compressed. Default is ``1024``.
+        :type compress_over: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.version = version
+        self.beta = beta
+        self.compress_over = compress_over
+        self.hits: int = 0
+        """Number of values read from the cache."""
+        self.misses: int = 0
+        """Number of values computed because they were missing."""
+        self.early_refreshes: int = 0
+        """Number of values computed because they were refreshed early."""
+        self._counter_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.alias!r}, version={self.version})"
+
+    @property
+    def cache(self) -> typing.Any:
+        return caches[self.alias]
+
+    def make_key(self, namespace: str, *parts: typing.Any) -> str:
+        """
+        Returns the cache key of an entry.
+
+        :param namespace: Entry kind, e.g. ``"unit-imei"``.
+        :type namespace: str
+        :param parts: Values identifying the entry. Must be JSON serializable.
+        :type parts: ~typing.Any
+        :returns: A cache key.
+        :rtype: str
+
+        """
+        digest = hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:32]
+        return f"{self.key_prefix}:f{FORMAT_VERSION}:{namespace}:{digest}"
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: typing.Callable[[], typing.Any],
+        timeout: float | None = None,
+    ) -> typing.Any:
+        """
+        Returns a cached value, computing and caching it if it was missing or is refreshed early.
+
+        :param key: A cache key from :py:meth:`make_key`.
+        :type key: str
+        :param compute: Returns the value. Must be JSON serializable.
+        :type compute: ~collections.abc.Callable[[], ~typing.Any]
+        :param timeout: Seconds to keep the value for. Default is :py:obj:`None` (:py:attr:`timeout`).
+        :type timeout: float | None
+        :returns: The value.
+        :rtype: ~typing.Any
+
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        data = self.cache.get(key, version=self.version)
+        if data is not None:
+            entry = _loads(data)
+            # XFetch: -log(random()) is exponentially distributed, rarely large.
+            early = entry["d"] * self.beta * -math.log(1.0 - random.random())
+            if time.time() + early < entry["x"]:
+                with self._counter_lock:
+                    self.hits += 1
+                return entry["v"]
+            with self._counter_lock:
+                self.early_refreshes += 1
+            logger.debug(f"Refreshing '{key}' before it expires")
+        else:
+            with self._counter_lock:
+                self.misses += 1
+        start = time.perf_counter()
+        value = compute()
+        entry = {
+            "v": value,
+            "d": time.perf_counter() - start,
+            "x": time.time() + timeout,
+        }
+        self.cache.set(
+            key,
+            _dumps(entry, self.compress_over),
+            timeout=timeout,
+            version=self.version,
+        )
+        return value
+
+    def delete(self, key: str) -> None:
+        """
+        Deletes a cached value.
+
+        :param key: A cache key from :py:meth:`make_key`.
+        :type key: str
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.cache.delete(key, version=self.version)
+
+    def get_unit_from_imei(
+        self, imei: str, session: WialonSession, **kwargs
+    ) -> dict[str, typing.Any]:
+        """
+        Cached :py:func:`~terminusgps.wialon.utils.get_unit_from_imei`. Entries are per Wialon user, since users see different units.
+
+        :param imei: An IMEI number.
+        :type imei: str
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param kwargs: Keyword arguments of :py:func:`~terminusgps.wialon.utils.get_unit_from_imei`.
+        :raises ValueError: If zero or multiple units were found. Not cached.
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: A Wialon unit dictionary.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        return self._get_units(utils.get_unit_from_imei, imei, session, kwargs)
+
+    def get_unit_from_iccid(
+        self, iccid: str, session: WialonSession, **kwargs
+    ) -> dict[str, typing.Any]:
+        """
+        Cached :py:func:`~terminusgps.wialon.utils.get_unit_from_iccid`. Entries are per Wialon user, since users see different units.
+
+        :param iccid: A telecom iccid number.
+        :type iccid: str
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param kwargs: Keyword arguments of :py:func:`~terminusgps.wialon.utils.get_unit_from_iccid`.
+        :raises ValueError: If zero or multiple units were found. Not cached.
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: A Wialon unit dictionary.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        return self._get_units(
+            utils.get_unit_from_iccid, iccid, session, kwargs
+        )
+
+    def get_units_from_carrier(
+        self, carrier: str, session: WialonSession, **kwargs
+    ) -> list[dict[str, typing.Any]]:
+        """
+        Cached :py:func:`~terminusgps.wialon.utils.get_units_from_carrier`. Entries are per Wialon user, since users see different units.
+
+        :param carrier: A telecom carrier name.
+        :type carrier: str
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param kwargs: Keyword arguments of :py:func:`~terminusgps.wialon.utils.get_units_from_carrier`.
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: A list of Wialon unit dictionaries.
+        :rtype: list[dict[str, ~typing.Any]]
+
+        """
+        return self._get_units(
+            utils.get_units_from_carrier, carrier, session, kwargs
+        )
+
+    def get_customer_profile(
+        self, service: typing.Any, *, reference_id: str | None = None, **kwargs
+    ) -> typing.Any:
+        """
+        Cached ``getCustomerProfileRequest`` executed by an Authorize.Net service. The response is stored as XML and parsed back into an element on cache hits.
+
+        :param service: An Authorize.Net service.
+        :type service: ~terminusgps.authorizenet.service.AuthorizenetService
+        :param reference_id: Reference id of the request. Default is :py:obj:`None`.
+        :type reference_id: str | None
+        :param kwargs: Keyword arguments of :py:func:`~terminusgps.authorizenet.api.get_customer_profile`.
+        :raises AuthorizenetError: If the API call failed. Not cached.
+        :returns: An Authorize.Net ``getCustomerProfileResponse`` element.
+        :rtype: ~lxml.objectify.ObjectifiedElement
+
+        """
+        from lxml import etree, objectify
+
+        from terminusgps.authorizenet.api import get_customer_profile
+
+        def compute() -> str:
+            response = service.execute(
+                get_customer_profile(**kwargs), reference_id
+            )
+            return etree.tostring(response, encoding="unicode")
+
+        key = self.make_key(
+            "customer-profile", service.login_id, service.environment, kwargs
+        )
+        return objectify.fromstring(self.get_or_compute(key, compute))
+
+    def delete_customer_profile(self, service: typing.Any, **kwargs) -> None:
+        """
+        Deletes a cached customer profile, e.g. after updating it.
+
+        :param service: An Authorize.Net service.
+        :type service: ~terminusgps.authorizenet.service.AuthorizenetService
+        :param kwargs: Keyword arguments the profile was fetched with.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.delete(
+            self.make_key(
+                "customer-profile",
+                service.login_id,
+                service.environment,
+                kwargs,
+            )
+        )
+
+    def sid_store(self, timeout: float | None = None) -> DjangoCacheSidStore:
+        """
+        Returns a sid store keeping Wialon session ids in this cache, for :py:class:`~terminusgps.wialon.session.WialonSession`.
+
+        :param timeout: Seconds to keep session ids for. Default is :py:obj:`None` (:py:attr:`timeout`).
+        :type timeout: float | None
+        :returns: A sid store.
+        :rtype: ~terminusgps.wialon.sid_store.DjangoCacheSidStore
+
+        """
+        return DjangoCacheSidStore(
+            self.alias,
+            timeout=timeout if timeout is not None else self.timeout,
+            key_prefix=f"{self.key_prefix}:f{FORMAT_VERSION}:v{self.version}:sid",
+        )
+
+    def _get_units(
+        self,
+        func: typing.Callable[..., typing.Any],
+        value: str,
+        session: WialonSession,
+        kwargs: dict[str, typing.Any],
+    ) -> typing.Any:
+        key = self.make_key(
+            func.__name__,
+            value,
+            session.username,
+            session.wialon_api.router.endpoints[0].url,
+            kwargs,
+        )
+        return self.get_or_compute(key, lambda: func(value, session, **kwargs))
@@ -1,3 +1,22 @@
+import asyncio
+import collections.abc
+import concurrent.futures
+import contextvars
+import datetime
+import hashlib
+import inspect
+import typing
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import loader
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
 from django.views.generic.base import TemplateResponseMixin
 
 
@@ -5,6 +24,8 @@ class HtmxTemplateResponseMixin(TemplateResponseMixin):
     """
     Renders a partial HTML template depending on HTTP headers.
 
+    If :py:meth:`get_fragment_fingerprint` or :py:meth:`get_last_modified` are implemented, responses carry ``ETag`` and ``Last-Modified`` headers and unchanged content is answered with ``304 Not Modified``, e.g. for htmx polling. With a :py:attr:`fragment_cache_timeout`, rendered templates are also cached by template, partial, url and fingerprint.
+
     `htmx documentation <https://htmx.org/docs/>`_
 
     """
@@ -18,6 +39,24 @@ class HtmxTemplateResponseMixin(TemplateResponseMixin):
 
     """
 
+    fragment_cache_timeout: int | None = None
+    """
+    Seconds to cache rendered templates for. Requires :py:meth:`get_fragment_fingerprint`.
+
+    :type: int | None
+    :value: :py:obj:`None` (don't cache)
+
+    """
+
+    fragment_cache_alias: str = "default"
+    """
+    Django cache alias of cached templates.
+
+    :type: str
+    :value: ``"default"``
+
+    """
+
     def get_template_names(self) -> list[str]:
         hx_request: bool = bool(self.request.headers.get("HX-Request"))
         hx_boosted: bool = bool(self.request.headers.get("HX-Boosted"))
@@ -25,3 +64,330 @@ class HtmxTemplateResponseMixin(TemplateResponseMixin):
         if hx_request and not hx_boosted:
             template_names.insert(0, self.template_name + self.partial_name)
         return template_names
+
+    def get_fragment_fingerprint(
+        self, context: dict[str, typing.Any]
+    ) -> str | None:
+        """
+        Returns a string that changes whenever the rendered template would, e.g. the latest ``updated_at`` of the displayed objects and the user id.
+
+        :param context: The template context.
+        :type context: dict[str, ~typing.Any]
+        :returns: A fingerprint, or :py:obj:`None` to disable ``ETag`` handling and fragment caching.
+        :rtype: str | None
+
+        """
+        return None
+
+    def get_last_modified(
+        self, context: dict[str, typing.Any]
+    ) -> datetime.datetime | None:
+        """
+        Returns when the rendered content last changed.
+
+        :param context: The template context.
+        :type context: dict[str, ~typing.Any]
+        :returns: A datetime, or :py:obj:`None` to disable ``Last-Modified`` handling.
+        :rtype: ~datetime.datetime | None
+
+        """
+        return None
+
+    def render_to_response(
+        self, context: dict[str, typing.Any], **response_kwargs
+    ) -> HttpResponse:
+        fingerprint = self.get_fragment_fingerprint(context)
+        last_modified = self.get_last_modified(context)
+        if fingerprint is None and last_modified is None:
+            return self._render_fragment(context, None, **response_kwargs)
+
+        etag, digest = None, None
+        if fingerprint is not None:
+            digest = hashlib.sha256(
+                "|".join(
+                    [
+                        self.get_template_names()[0],
+                        self.request.get_full_path(),
+                        fingerprint,
+                    ]
+                ).encode("utf-8")
+            ).hexdigest()[:32]
+            etag = quote_etag(digest)
+        timestamp = (
+            int(last_modified.timestamp())
+            if last_modified is not None
+            else None
+        )
+        if self.request.method in ("GET", "HEAD"):
+            response = get_conditional_response(
+                self.request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = self._render_fragment(
+                    context, digest, **response_kwargs
+                )
+        else:
+            response = self._render_fragment(context, None, **response_kwargs)
+
+        if etag is not None:
+            response.headers["ETag"] = etag
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+        patch_vary_headers(response, ("HX-Request",))
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def _render_fragment(
+        self, context: dict[str, typing.Any], digest: str | None, **kwargs
+    ) -> HttpResponse:
+        if digest is None or self.fragment_cache_timeout is None:
+            return super().render_to_response(context, **kwargs)
+        cache = caches[self.fragment_cache_alias]
+        key = f"htmx-fragment:{digest}"
+        content = cache.get(key)
+        response = super().render_to_response(context, **kwargs)
+        if content is not None:
+            # Setting content marks the response rendered, the template isn't rendered again.
+            response.content = content
+            return response
+        response.render()
+        cache.set(key, response.content, timeout=self.fragment_cache_timeout)
+        return response
+
+
+class HtmxStreamingTemplateResponseMixin(HtmxTemplateResponseMixin):
+    """
+    Streams rendered templates to the client in chunks instead of rendering them fully in memory first.
+
+    Templates are rendered as the response is read. Full page requests with :py:attr:`stream_partials` render and send the listed partials one at a time, so the top of the page reaches the client before a large table below it is rendered. Each partial is rendered with Django's public template API, in one piece. Streamed responses are never stored in the fragment cache.
+
+    Blocking context fetches returned by :py:meth:`get_context_fetchers` run concurrently, in threads for sync views and as tasks for async views.
+
+    Usage:
+
+    .. code::
+
+        class FleetView(HtmxStreamingTemplateResponseMixin, TemplateView):
+            template_name = "fleet.html"
+            partial_name = "#units"
+            stream_partials = ("#head", "#units", "#foot")
+
+            def get_context_fetchers(self):
+                return {
+                    "units": lambda: get_units(self.session),
+                    "profile": lambda: get_customer_profile(self.service),
+                }
+
+            async def get(self, request, *args, **kwargs):
+                context = await self.aget_context_data(**kwargs)
+                return await self.arender_to_response(context)
+
+    """
+
+    chunk_size: int = 8192
+    """
+    Minimum number of characters sent per chunk.
+
+    :type: int
+    :value: ``8192``
+
+    """
+
+    stream_partials: tuple[str, ...] = ()
+    """
+    Partials of :py:attr:`template_name` sent one after another for full page requests, e.g. ``("#head", "#units", "#foot")``. Only the listed partials are sent, so the template should consist of them.
+
+    :type: tuple[str, ...]
+    :value: ``()`` (send the template in one piece)
+
+    """
+
+    fetch_workers: int = 4
+    """
+    Maximum number of context fetches run at once in sync views.
+
+    :type: int
+    :value: ``4``
+
+    """
+
+    def get_stream_templates(self) -> list[typing.Any]:
+        """
+        Returns the templates rendered and sent one after another.
+
+        :returns: The :py:attr:`stream_partials` for full page requests, otherwise the template selected by :py:meth:`get_template_names`.
+        :rtype: list[~typing.Any]
+
+        """
+        hx_request: bool = bool(self.request.headers.get("HX-Request"))
+        hx_boosted: bool = bool(self.request.headers.get("HX-Boosted"))
+        if self.stream_partials and (not hx_request or hx_boosted):
+            return [
+                loader.get_template(
+                    self.template_name + partial, using=self.template_engine
+                )
+                for partial in self.stream_partials
+            ]
+        return [
+            loader.select_template(
+                self.get_template_names(), using=self.template_engine
+            )
+        ]
+
+    def get_context_fetchers(
+        self,
+    ) -> dict[str, collections.abc.Callable[[], typing.Any]]:
+        """
+        Returns independent context fetches, e.g. Wialon or Authorize.Net API calls, by context key.
+
+        Fetches may be functions or coroutine functions. Coroutine functions can only be used by async views.
+
+        :returns: Callables returning context values by context key.
+        :rtype: dict[str, ~collections.abc.Callable[[], ~typing.Any]]
+
+        """
+        return {}
+
+    def fetch_context(
+        self, exclude: collections.abc.Container[str] = ()
+    ) -> dict[str, typing.Any]:
+        """
+        Runs the context fetches concurrently in threads, in copies of the caller's context variables.
+
+        :param exclude: Context keys not to fetch. Default is ``()``.
+        :type exclude: ~collections.abc.Container[str]
+        :raises TypeError: If a fetch is a coroutine function. Use :py:meth:`aget_context_data` in an async view instead.
+        :raises Exception: The first exception raised by a fetch.
+        :returns: Fetched context values.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        fetchers = {
+            key: fetch
+            for key, fetch in self.get_context_fetchers().items()
+            if key not in exclude
+        }
+        for key, fetch in fetchers.items():
+            if inspect.iscoroutinefunction(fetch):
+                raise TypeError(
+                    f"Context fetch '{key}' is a coroutine function, which a sync view can't await. Use aget_context_data() in an async view."
+                )
+        if len(fetchers) < 2:
+            return {key: fetch() for key, fetch in fetchers.items()}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.fetch_workers, len(fetchers))
+        ) as executor:
+            futures = {
+                key: executor.submit(contextvars.copy_context().run, fetch)
+                for key, fetch in fetchers.items()
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    async def afetch_context(
+        self, exclude: collections.abc.Container[str] = ()
+    ) -> dict[str, typing.Any]:
+        """
+        Runs the context fetches concurrently, functions in threads and coroutine functions as tasks.
+
+        :param exclude: Context keys not to fetch. Default is ``()``.
+        :type exclude: ~collections.abc.Container[str]
+        :raises Exception: The first exception raised by a fetch.
+        :returns: Fetched context values.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        fetchers = {
+            key: fetch
+            for key, fetch in self.get_context_fetchers().items()
+            if key not in exclude
+        }
+        results = await asyncio.gather(
+            *(
+                fetch()
+                if inspect.iscoroutinefunction(fetch)
+                else asyncio.to_thread(fetch)
+                for fetch in fetchers.values()
+            )
+        )
+        return dict(zip(fetchers, results))
+
+    def get_context_data(self, **kwargs) -> dict[str, typing.Any]:
+        kwargs.update(self.fetch_context(exclude=kwargs))
+        return super().get_context_data(**kwargs)
+
+    async def aget_context_data(self, **kwargs) -> dict[str, typing.Any]:
+        """
+        Async :py:meth:`get_context_data`. Fetches run concurrently on the event loop before :py:meth:`get_context_data` is called in a thread.
+
+        :param kwargs: Context values.
+        :returns: The template context.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        kwargs.update(await self.afetch_context(exclude=kwargs))
+        return await sync_to_async(self.get_context_data)(**kwargs)
+
+    async def arender_to_response(
+        self, context: dict[str, typing.Any], **response_kwargs
+    ) -> HttpResponse:
+        """
+        Async :py:meth:`render_to_response`. Chunks are rendered in a thread as the response is read.
+
+        :param context: The template context.
+        :type context: dict[str, ~typing.Any]
+        :returns: A streaming response, or a ``304 Not Modified`` response.
+        :rtype: ~django.http.HttpResponse
+
+        """
+        response = await sync_to_async(self.render_to_response)(
+            context, **response_kwargs
+        )
+        if response.streaming and not response.is_async:
+            response.streaming_content = _aiter(
+                iter(response.streaming_content)
+            )
+        return response
+
+    def _render_fragment(
+        self, context: dict[str, typing.Any], digest: str | None, **kwargs
+    ) -> HttpResponse:
+        kwargs.setdefault("content_type", self.content_type)
+        return StreamingHttpResponse(
+            _chunk(
+                _iter_templates(
+                    self.get_stream_templates(), context, self.request
+                ),
+                self.chunk_size,
+            ),
+            **kwargs,
+        )
+
+
+async def _aiter(
+    iterator: collections.abc.Iterator[bytes],
+) -> collections.abc.AsyncIterator[bytes]:
+    while (chunk := await sync_to_async(next)(iterator, None)) is not None:
+        yield chunk
+
+
+def _chunk(
+    parts: collections.abc.Iterable[str], size: int
+) -> collections.abc.Iterator[str]:
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _iter_templates(
+    templates: collections.abc.Iterable[typing.Any],
+    context: dict[str, typing.Any],
+    request: typing.Any,
+) -> collections.abc.Iterator[str]:
+    for template in templates:
+        yield template.render(context, request)
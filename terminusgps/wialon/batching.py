@@ -0,0 +1,139 @@
+import logging
+import threading
+import typing
+
+import wialon.api
+
+__all__ = ["UNBATCHED_SERVICES", "CallBatcher"]
+
+logger = logging.getLogger(__name__)
+
+_UNKNOWN_ERROR = 6
+
+UNBATCHED_SERVICES = frozenset(
+    {
+        "core/batch",
+        "core/duplicate",
+        "core/logout",
+        "core/use_auth_hash",
+        "report/export_result",
+        "report/get_result_map",
+        "token/login",
+    }
+)
+"""Wialon API services that are never batched: session management, nested batches and file responses."""
+
+
+class _PendingCall:
+    __slots__ = ("call", "batched", "done", "result", "error")
+
+    def __init__(self, svc: str, params: typing.Any) -> None:
+        self.call = {"svc": svc, "params": params}
+        self.batched = False
+        self.done = threading.Event()
+        self.result: typing.Any = None
+        self.error: BaseException | None = None
+
+
+class CallBatcher:
+    """
+    Collects Wialon API calls from many threads into ``core/batch`` requests.
+
+    The first queued call waits up to ``max_delay`` seconds for more calls, then sends every queued call as one batch. A batch is sent at once when ``max_size`` calls are queued. Each caller blocks until its own result is available.
+
+    Usage:
+
+    .. code::
+
+        batcher = CallBatcher(session.wialon_api.batch, max_delay=0.005, max_size=50)
+        unit = batcher.call("core/search_item", {"id": 123, "flags": 1})
+
+    """
+
+    def __init__(
+        self,
+        send: typing.Callable[[list[dict[str, typing.Any]]], list[typing.Any]],
+        *,
+        max_delay: float = 0.005,
+        max_size: int = 50,
+    ) -> None:
+        """
+        :param send: Sends a list of calls as one batch and returns one result per call, failed calls as ``{"error": <code>}``, e.g. :py:meth:`~terminusgps.wialon.session.Wialon.batch`.
+        :type send: ~collections.abc.Callable[[list[dict[str, ~typing.Any]]], list[~typing.Any]]
+        :param max_delay: Seconds the first call of a batch waits for more calls. Default is ``0.005``.
+        :type max_delay: float
+        :param max_size: Maximum number of calls per batch. Default is ``50``.
+        :type max_size: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._send = send
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._queue: list[_PendingCall] = []
+        self._cond = threading.Condition()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(max_delay={self.max_delay}, max_size={self.max_size})"
+
+    def call(self, svc: str, params: typing.Any) -> typing.Any:
+        """
+        Queues a Wialon API call and waits for its result.
+
+        :param svc: A Wialon API service, e.g. ``"core/search_item"``.
+        :type svc: str
+        :param params: Call parameters.
+        :type params: ~typing.Any
+        :raises WialonError: If the call failed.
+        :raises WialonAPIError: If the batch request failed.
+        :returns: The call result.
+        :rtype: ~typing.Any
+
+        """
+        pending = _PendingCall(svc, params)
+        with self._cond:
+            self._queue.append(pending)
+            if len(self._queue) >= self.max_size:
+                batch = self._take()
+            elif len(self._queue) == 1:
+                self._cond.wait_for(
+                    lambda: pending.batched, timeout=self.max_delay
+                )
+                batch = [] if pending.batched else self._take()
+            else:
+                batch = []
+        if batch:
+            self._execute(batch)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _take(self) -> list[_PendingCall]:
+        batch, self._queue = self._queue, []
+        for pending in batch:
+            pending.batched = True
+        self._cond.notify_all()
+        return batch
+
+    def _execute(self, batch: list[_PendingCall]) -> None:
+        try:
+            results = self._send([pending.call for pending in batch])
+        except BaseException as e:
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            raise
+        logger.debug(f"Sent {len(batch)} Wialon API calls in one batch")
+        for i, pending in enumerate(batch):
+            result = (
+                results[i] if i < len(results) else {"error": _UNKNOWN_ERROR}
+            )
+            if isinstance(result, dict) and result.get("error", 0) > 0:
+                pending.error = wialon.api.WialonError(
+                    result["error"], pending.call["svc"]
+                )
+            else:
+                pending.result = result
+            pending.done.set()
@@ -0,0 +1,456 @@
+import concurrent.futures
+import contextvars
+import dataclasses
+import logging
+import typing
+
+from terminusgps.wialon.flags import DataFlag
+from terminusgps.wialon.session import WialonSession
+from terminusgps.wialon.utils import generate_wialon_passwords
+
+__all__ = [
+    "AccessPlan",
+    "AccessUpdate",
+    "AccessUpdater",
+    "FieldUpdate",
+    "FieldUpdater",
+    "UserCredential",
+    "create_users",
+    "execute_batch",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def execute_batch(
+    session: WialonSession,
+    calls: typing.Sequence[dict[str, typing.Any]],
+    *,
+    chunk_size: int = 100,
+) -> list[typing.Any]:
+    """
+    Executes Wialon API calls in chunked ``core/batch`` requests.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param calls: Wialon API calls, e.g. ``[{"svc": "core/search_item", "params": {"id": 1, "flags": 1}}]``.
+    :type calls: ~collections.abc.Sequence[dict[str, ~typing.Any]]
+    :param chunk_size: Maximum number of calls per batch request. Default is ``100``.
+    :type chunk_size: int
+    :raises ValueError: If ``chunk_size`` was less than ``1``.
+    :raises WialonAPIError: If a batch request itself failed.
+    :returns: One result per call, in order. Failed calls are ``{"error": <code>}`` dictionaries.
+    :rtype: list[~typing.Any]
+
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be at least 1, got {chunk_size}.")
+    results = []
+    for start in range(0, len(calls), chunk_size):
+        results.extend(
+            session.wialon_api.batch(calls[start : start + chunk_size])
+        )
+    return results
+
+
+def _get_error(result: typing.Any) -> int:
+    if isinstance(result, dict) and result.get("error", 0) > 0:
+        return int(result["error"])
+    return 0
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class FieldUpdate:
+    """Result of updating one field of one unit."""
+
+    unit_id: int
+    """Wialon unit id."""
+    name: str
+    """Field name."""
+    action: str
+    """``"create"``, ``"update"``, ``"delete"`` or ``"skip"`` if the field already had the value."""
+    error: int = 0
+    """Wialon API error code. ``0`` on success."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the update succeeded or was skipped."""
+        return self.error == 0
+
+
+class FieldUpdater:
+    """
+    Updates admin fields or custom fields across many units.
+
+    Current field values are read in bulk first, so fields that already have their new value aren't written. The remaining writes are sent in chunked ``core/batch`` requests.
+
+    Usage:
+
+    .. code::
+
+        updater = FieldUpdater(session)
+        results = updater.update({12345678: {"carrier": "ATT", "iccid": "8901..."}})
+        failed = [result for result in results if not result.ok]
+
+    """
+
+    _SERVICES: typing.ClassVar[dict[str, tuple[str, str, DataFlag]]] = {
+        "admin": (
+            "item/update_admin_field",
+            "aflds",
+            DataFlag.UNIT_ADMIN_FIELDS,
+        ),
+        "custom": (
+            "item/update_custom_field",
+            "flds",
+            DataFlag.UNIT_CUSTOM_FIELDS,
+        ),
+    }
+
+    def __init__(
+        self,
+        session: WialonSession,
+        *,
+        kind: str = "admin",
+        chunk_size: int = 100,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param kind: ``"admin"`` to update admin fields, ``"custom"`` to update custom fields. Default is ``"admin"``.
+        :type kind: str
+        :param chunk_size: Maximum number of calls per batch request. Default is ``100``.
+        :type chunk_size: int
+        :raises ValueError: If ``kind`` wasn't ``"admin"`` or ``"custom"``.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        try:
+            self._svc, self._key, flag = self._SERVICES[kind]
+        except KeyError:
+            raise ValueError(
+                f"Field kind must be 'admin' or 'custom', got '{kind}'."
+            )
+        self._session = session
+        self._flags = int(DataFlag.UNIT_BASE | flag)
+        self._chunk_size = chunk_size
+
+    def update(
+        self, updates: typing.Mapping[int, typing.Mapping[str, str | None]]
+    ) -> list[FieldUpdate]:
+        """
+        Sets field values on units.
+
+        A :py:obj:`None` value deletes the field.
+
+        :param updates: New field values by field name, by unit id.
+        :type updates: ~collections.abc.Mapping[int, ~collections.abc.Mapping[str, str | None]]
+        :raises WialonAPIError: If a batch request itself failed.
+        :returns: One result per requested field, in order.
+        :rtype: list[~terminusgps.wialon.bulk.FieldUpdate]
+
+        """
+        unit_ids = list(updates)
+        current = execute_batch(
+            self._session,
+            [
+                {
+                    "svc": "core/search_item",
+                    "params": {"id": unit_id, "flags": self._flags},
+                }
+                for unit_id in unit_ids
+            ],
+            chunk_size=self._chunk_size,
+        )
+
+        results: list[FieldUpdate | None] = []
+        calls, pending = [], []
+        for unit_id, response in zip(unit_ids, current):
+            error = _get_error(response)
+            item = {} if error else response.get("item") or {}
+            fields = {
+                field["n"]: field
+                for field in (item.get(self._key) or {}).values()
+                if field
+            }
+            for name, value in updates[unit_id].items():
+                if error:
+                    results.append(FieldUpdate(unit_id, name, "skip", error))
+                    continue
+                field = fields.get(name)
+                if value is None:
+                    action = "delete" if field is not None else "skip"
+                elif field is None:
+                    action = "create"
+                elif str(field.get("v", "")) != str(value):
+                    action = "update"
+                else:
+                    action = "skip"
+                if action == "skip":
+                    results.append(FieldUpdate(unit_id, name, action))
+                    continue
+                params = {
+                    "itemId": unit_id,
+                    "id": int(field["id"]) if field is not None else 0,
+                    "callMode": action,
+                    "n": name,
+                }
+                if value is not None:
+                    params["v"] = str(value)
+                calls.append({"svc": self._svc, "params": params})
+                pending.append((len(results), unit_id, name, action))
+                results.append(None)
+
+        for (index, unit_id, name, action), response in zip(
+            pending,
+            execute_batch(self._session, calls, chunk_size=self._chunk_size),
+        ):
+            results[index] = FieldUpdate(
+                unit_id, name, action, _get_error(response)
+            )
+        logger.debug(
+            f"Wrote {len(calls)} of {len(results)} fields on {len(unit_ids)} units"
+        )
+        return typing.cast(list[FieldUpdate], results)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class AccessPlan:
+    """Access rights to give a user on several items."""
+
+    user_id: int
+    """Wialon user id."""
+    item_ids: typing.Sequence[int]
+    """Wialon item ids."""
+    access_mask: int
+    """Access mask to set, e.g. :py:data:`~terminusgps.wialon.constants.ACCESSMASK_UNIT_BASIC`."""
+    items_type: str = "avl_unit"
+    """Wialon items type of the items, e.g. ``"avl_resource"``. Default is ``"avl_unit"``."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class AccessUpdate:
+    """Result of setting a user's access rights on one item."""
+
+    user_id: int
+    """Wialon user id."""
+    item_id: int
+    """Wialon item id."""
+    action: str
+    """``"update"``, or ``"skip"`` if the user already had the access mask."""
+    error: int = 0
+    """Wialon API error code. ``0`` on success."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the update succeeded or was skipped."""
+        return self.error == 0
+
+
+class AccessUpdater:
+    """
+    Sets users' access rights on many items.
+
+    Each user's current access is read with one ``user/get_items_access`` call, so items the user already has the access mask on aren't written. The remaining writes are sent in chunked ``core/batch`` requests. Plans are applied concurrently.
+
+    Usage:
+
+    .. code::
+
+        from terminusgps.wialon import constants
+
+        updater = AccessUpdater(session)
+        results = updater.apply(
+            [
+                AccessPlan(user_id, unit_ids, constants.ACCESSMASK_UNIT_BASIC),
+                AccessPlan(
+                    user_id,
+                    [resource_id],
+                    constants.ACCESSMASK_RESOURCE_BASIC,
+                    items_type="avl_resource",
+                ),
+            ]
+        )
+
+    """
+
+    def __init__(
+        self,
+        session: WialonSession,
+        *,
+        chunk_size: int = 100,
+        max_workers: int = 4,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param chunk_size: Maximum number of calls per batch request. Default is ``100``.
+        :type chunk_size: int
+        :param max_workers: Maximum number of plans applied at once. Default is ``4``.
+        :type max_workers: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+
+    def apply(self, plans: typing.Iterable[AccessPlan]) -> list[AccessUpdate]:
+        """
+        Applies access plans.
+
+        :param plans: Access plans.
+        :type plans: ~collections.abc.Iterable[~terminusgps.wialon.bulk.AccessPlan]
+        :raises WialonAPIError: If reading a user's access or a batch request itself failed.
+        :returns: One result per planned item, in plan order.
+        :rtype: list[~terminusgps.wialon.bulk.AccessUpdate]
+
+        """
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, self._apply, plan
+                )
+                for plan in plans
+            ]
+            return [result for future in futures for result in future.result()]
+
+    def get_access(self, user_id: int, items_type: str) -> dict[int, int]:
+        """
+        Returns a user's direct access masks.
+
+        :param user_id: A Wialon user id.
+        :type user_id: int
+        :param items_type: A Wialon items type, e.g. ``"avl_unit"``.
+        :type items_type: str
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: Access masks by item id.
+        :rtype: dict[int, int]
+
+        """
+        response = self._session.wialon_api.user_get_items_access(
+            **{
+                "userId": user_id,
+                "directAccess": 1,
+                "itemSuperclass": items_type,
+                "flags": 0,
+            }
+        )
+        return {
+            int(item_id): int(
+                access["acl"] if isinstance(access, dict) else access
+            )
+            for item_id, access in (response or {}).items()
+        }
+
+    def _apply(self, plan: AccessPlan) -> list[AccessUpdate]:
+        current = self.get_access(plan.user_id, plan.items_type)
+        results: list[AccessUpdate | None] = []
+        calls, pending = [], []
+        for item_id in plan.item_ids:
+            if current.get(int(item_id)) == plan.access_mask:
+                results.append(AccessUpdate(plan.user_id, item_id, "skip"))
+                continue
+            calls.append(
+                {
+                    "svc": "user/update_item_access",
+                    "params": {
+                        "userId": plan.user_id,
+                        "itemId": item_id,
+                        "accessMask": plan.access_mask,
+                    },
+                }
+            )
+            pending.append((len(results), item_id))
+            results.append(None)
+
+        for (index, item_id), response in zip(
+            pending,
+            execute_batch(self._session, calls, chunk_size=self._chunk_size),
+        ):
+            results[index] = AccessUpdate(
+                plan.user_id, item_id, "update", _get_error(response)
+            )
+        logger.debug(
+            f"Updated access on {len(calls)} of {len(results)} items for user #{plan.user_id}"
+        )
+        return typing.cast(list[AccessUpdate], results)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class UserCredential:
+    """Credentials of a Wialon user created in bulk."""
+
+    name: str
+    """Wialon username."""
+    password: str = dataclasses.field(repr=False)
+    """Generated password."""
+    user_id: int | None = None
+    """Wialon user id. :py:obj:`None` if the user wasn't created."""
+    error: int = 0
+    """Wialon API error code. ``0`` on success."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the user was created."""
+        return self.error == 0
+
+
+def create_users(
+    session: WialonSession,
+    names: typing.Iterable[str],
+    *,
+    creator_id: int,
+    password_length: int = 32,
+    chunk_size: int = 100,
+) -> list[UserCredential]:
+    """
+    Creates Wialon users with generated passwords in chunked ``core/batch`` requests.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param names: Usernames to create.
+    :type names: ~collections.abc.Iterable[str]
+    :param creator_id: Wialon user id of the users' creator.
+    :type creator_id: int
+    :param password_length: Length of the generated passwords. Default is ``32``.
+    :type password_length: int
+    :param chunk_size: Maximum number of users created per batch request. Default is ``100``.
+    :type chunk_size: int
+    :raises ValueError: If ``password_length`` was less than ``8`` or greater than ``64``.
+    :raises WialonAPIError: If a batch request itself failed.
+    :returns: One credential per username, in order.
+    :rtype: list[~terminusgps.wialon.bulk.UserCredential]
+
+    """
+    names = list(names)
+    passwords = generate_wialon_passwords(len(names), password_length)
+    responses = execute_batch(
+        session,
+        [
+            {
+                "svc": "core/create_user",
+                "params": {
+                    "creatorId": creator_id,
+                    "name": name,
+                    "password": password,
+                    "dataFlags": int(DataFlag.USER_BASE),
+                },
+            }
+            for name, password in zip(names, passwords)
+        ],
+        chunk_size=chunk_size,
+    )
+    credentials = []
+    for name, password, response in zip(names, passwords, responses):
+        error = _get_error(response)
+        user_id = None if error else int(response["item"]["id"])
+        credentials.append(UserCredential(name, password, user_id, error))
+    logger.debug(
+        f"Created {sum(c.ok for c in credentials)} of {len(names)} users"
+    )
+    return credentials
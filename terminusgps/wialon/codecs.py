@@ -0,0 +1,117 @@
+import abc
+import json
+import typing
+
+__all__ = [
+    "JSONCodec",
+    "MsgspecCodec",
+    "OrjsonCodec",
+    "StdlibCodec",
+    "get_default_codec",
+    "loads_lenient",
+]
+
+
+class JSONCodec(abc.ABC):
+    """Decodes raw Wialon API response bytes."""
+
+    name: str = ""
+    """Codec name."""
+
+    @abc.abstractmethod
+    def loads(self, data: bytes | bytearray | memoryview) -> typing.Any:
+        """
+        Decodes UTF-8 encoded JSON bytes.
+
+        :param data: UTF-8 encoded JSON.
+        :type data: bytes | bytearray | memoryview
+        :returns: The decoded object.
+        :rtype: ~typing.Any
+
+        """
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class StdlibCodec(JSONCodec):
+    """JSON codec using :py:mod:`json`. :py:func:`json.loads` accepts bytes, so no intermediate :py:obj:`str` is built by the caller."""
+
+    name = "json"
+
+    def loads(self, data: bytes | bytearray | memoryview) -> typing.Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using `orjson <https://pypi.org/project/orjson/>`_."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: bytes | bytearray | memoryview) -> typing.Any:
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """JSON codec using `msgspec <https://pypi.org/project/msgspec/>`_."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data: bytes | bytearray | memoryview) -> typing.Any:
+        return self._decoder.decode(data)
+
+
+def get_default_codec() -> JSONCodec:
+    """
+    Returns the fastest installed JSON codec.
+
+    `orjson <https://pypi.org/project/orjson/>`_ is preferred, then `msgspec <https://pypi.org/project/msgspec/>`_, then :py:mod:`json`.
+
+    :returns: A JSON codec.
+    :rtype: ~terminusgps.wialon.codecs.JSONCodec
+
+    """
+    for codec_cls in (OrjsonCodec, MsgspecCodec):
+        try:
+            return codec_cls()
+        except ImportError:
+            continue
+    return StdlibCodec()
+
+
+def loads_lenient(
+    codec: JSONCodec, data: bytes | bytearray | memoryview
+) -> typing.Any:
+    """
+    Decodes JSON bytes with a codec, dropping invalid UTF-8 sequences like `python-wialon <https://pypi.org/project/python-wialon/>`_ does.
+
+    Valid UTF-8 is decoded by the codec directly. Only data it rejects is cleaned and decoded again.
+
+    :param codec: A JSON codec.
+    :type codec: ~terminusgps.wialon.codecs.JSONCodec
+    :param data: UTF-8 encoded JSON, possibly with invalid sequences.
+    :type data: bytes | bytearray | memoryview
+    :raises ValueError: If the data wasn't valid JSON.
+    :returns: The decoded object.
+    :rtype: ~typing.Any
+
+    """
+    try:
+        return codec.loads(data)
+    except ValueError:
+        cleaned = bytes(data).decode("utf-8", errors="ignore").encode()
+        if len(cleaned) == len(data):
+            raise
+    return codec.loads(cleaned)
@@ -0,0 +1,346 @@
+import collections
+import concurrent.futures
+import contextvars
+import dataclasses
+import logging
+import threading
+import time
+import typing
+
+import numpy as np
+
+from terminusgps.wialon.events import EventDispatcher
+from terminusgps.wialon.flags import DataFlag
+from terminusgps.wialon.ratelimit import TokenBucket
+from terminusgps.wialon.session import WialonAPIError, WialonSession
+
+__all__ = ["CommandFanout", "CommandReport", "CommandResult"]
+
+logger = logging.getLogger(__name__)
+
+_ACK_FLAGS = DataFlag.UNIT_BASE | DataFlag.UNIT_LAST_MESSAGE
+
+
+@dataclasses.dataclass(slots=True)
+class CommandResult:
+    """Delivery and acknowledgement of a command sent to one unit."""
+
+    unit_id: int
+    """Wialon unit id."""
+    error: int = 0
+    """Wialon API error code. ``0`` if the command was delivered."""
+    sent_at: float | None = None
+    """Unix time the command was sent."""
+    delivered_at: float | None = None
+    """Unix time the Wialon API accepted the command."""
+    acknowledged_at: float | None = None
+    """Unix time of the unit's first message sent at or after the command, to the second."""
+
+    @property
+    def delivered(self) -> bool:
+        """Whether the Wialon API accepted the command."""
+        return self.delivered_at is not None
+
+    @property
+    def acknowledged(self) -> bool:
+        """Whether the unit sent a message at or after the command."""
+        return self.acknowledged_at is not None
+
+    @property
+    def delivery_time(self) -> float | None:
+        """Seconds from sending to delivery."""
+        if self.sent_at is None or self.delivered_at is None:
+            return None
+        return self.delivered_at - self.sent_at
+
+    @property
+    def ack_time(self) -> float | None:
+        """Seconds from sending to acknowledgement. Message times are whole seconds, so this is ``0.0`` for messages in the second the command was sent."""
+        if self.sent_at is None or self.acknowledged_at is None:
+            return None
+        return max(0.0, self.acknowledged_at - self.sent_at)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CommandReport:
+    """Aggregated results of a command fan-out."""
+
+    command_name: str
+    """Name of the sent command."""
+    results: list[CommandResult]
+    """One result per unit, in order."""
+
+    @property
+    def delivered(self) -> int:
+        """Number of units the command was delivered to."""
+        return sum(result.delivered for result in self.results)
+
+    @property
+    def acknowledged(self) -> int:
+        """Number of units that acknowledged the command."""
+        return sum(result.acknowledged for result in self.results)
+
+    @property
+    def failed(self) -> list[CommandResult]:
+        """Results of units the command couldn't be delivered to."""
+        return [result for result in self.results if result.error]
+
+    def delivery_percentiles(
+        self, percentiles: typing.Sequence[float] = (50, 90, 99)
+    ) -> dict[float, float]:
+        """
+        Returns delivery time percentiles in seconds.
+
+        :param percentiles: Percentiles to compute. Default is ``(50, 90, 99)``.
+        :type percentiles: ~collections.abc.Sequence[float]
+        :returns: Delivery times by percentile. Empty if nothing was delivered.
+        :rtype: dict[float, float]
+
+        """
+        return self._percentiles(
+            [result.delivery_time for result in self.results], percentiles
+        )
+
+    def ack_percentiles(
+        self, percentiles: typing.Sequence[float] = (50, 90, 99)
+    ) -> dict[float, float]:
+        """
+        Returns acknowledgement time percentiles in seconds.
+
+        :param percentiles: Percentiles to compute. Default is ``(50, 90, 99)``.
+        :type percentiles: ~collections.abc.Sequence[float]
+        :returns: Acknowledgement times by percentile. Empty if nothing was acknowledged.
+        :rtype: dict[float, float]
+
+        """
+        return self._percentiles(
+            [result.ack_time for result in self.results], percentiles
+        )
+
+    @staticmethod
+    def _percentiles(
+        times: list[float | None], percentiles: typing.Sequence[float]
+    ) -> dict[float, float]:
+        values = np.array([t for t in times if t is not None], dtype=float)
+        if not values.size:
+            return {}
+        return dict(
+            zip(percentiles, np.percentile(values, percentiles).tolist())
+        )
+
+
+class CommandFanout:
+    """
+    Sends a command to many units with ``unit/exec_cmd``.
+
+    Calls are limited to ``rate`` per second and ``max_workers`` at once. With an ``ack_timeout``, the session is subscribed to the units' messages and a unit's first message sent at or after the command counts as its acknowledgement. Messages are read through the session's :py:class:`~terminusgps.wialon.events.EventDispatcher`, so a :py:class:`~terminusgps.wialon.unit_index.UnitIndex` of the same session keeps receiving its events, and the subscriptions it holds are kept.
+
+    Usage:
+
+    .. code::
+
+        fanout = CommandFanout(session, rate=20, ack_timeout=120)
+        report = fanout.send(unit_ids, "Set config", param="APN=internet")
+        print(report.delivered, report.acknowledged, report.ack_percentiles())
+
+    """
+
+    poll_interval: float = 1.0
+    """Seconds between ``avl_evts`` polls while waiting for acknowledgements."""
+
+    def __init__(
+        self,
+        session: WialonSession,
+        *,
+        rate: float = 10.0,
+        max_workers: int = 8,
+        link_type: str = "",
+        timeout: int = 0,
+        ack_timeout: float | None = None,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param rate: Maximum number of commands sent per second. Default is ``10.0``.
+        :type rate: float
+        :param max_workers: Maximum number of commands sent at once. Default is ``8``.
+        :type max_workers: int
+        :param link_type: Command link type, e.g. ``"tcp"``. Default is ``""`` (automatic).
+        :type link_type: str
+        :param timeout: Seconds the command waits in the unit's queue. Default is ``0``.
+        :type timeout: int
+        :param ack_timeout: Seconds to wait for acknowledgements after sending. Default is :py:obj:`None` (don't wait).
+        :type ack_timeout: float | None
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self._limiter = TokenBucket(rate)
+        self._max_workers = max_workers
+        self._link_type = link_type
+        self._timeout = timeout
+        self._ack_timeout = ack_timeout
+
+    def send(
+        self,
+        unit_ids: typing.Iterable[int],
+        command_name: str,
+        param: str = "",
+    ) -> CommandReport:
+        """
+        Sends a command to units.
+
+        :param unit_ids: Wialon unit ids.
+        :type unit_ids: ~collections.abc.Iterable[int]
+        :param command_name: Name of a command configured on the units.
+        :type command_name: str
+        :param param: Command parameter. Default is ``""``.
+        :type param: str
+        :raises WialonAPIError: If subscribing to unit messages failed.
+        :returns: A report with one result per unit.
+        :rtype: ~terminusgps.wialon.commands.CommandReport
+
+        """
+        results = {
+            int(unit_id): CommandResult(int(unit_id)) for unit_id in unit_ids
+        }
+        previous_flags = {}
+        acks = _AckListener(results)
+        dispatcher = EventDispatcher.for_session(self._session)
+        if self._ack_timeout is not None:
+            previous_flags = self._subscribe(list(results))
+            # Listen while sending, a poll by another listener of the session may receive the acknowledgements.
+            dispatcher.subscribe(acks)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._max_workers
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self._send,
+                        result,
+                        command_name,
+                        param,
+                    )
+                    for result in results.values()
+                ]
+                for future in futures:
+                    future.result()
+            if self._ack_timeout is not None:
+                self._wait_for_acks(results, acks, dispatcher)
+        finally:
+            if self._ack_timeout is not None:
+                dispatcher.unsubscribe(acks)
+                self._unsubscribe(previous_flags)
+        report = CommandReport(command_name, list(results.values()))
+        logger.debug(
+            f"'{command_name}' delivered to {report.delivered} of {len(results)} units"
+        )
+        return report
+
+    def _send(
+        self, result: CommandResult, command_name: str, param: str
+    ) -> None:
+        self._limiter.acquire()
+        result.sent_at = time.time()
+        try:
+            self._session.wialon_api.unit_exec_cmd(
+                **{
+                    "itemId": result.unit_id,
+                    "commandName": command_name,
+                    "linkType": self._link_type,
+                    "param": param,
+                    "timeout": self._timeout,
+                    "flags": 0,
+                }
+            )
+        except WialonAPIError as e:
+            result.error = e.code
+        else:
+            result.delivered_at = time.time()
+
+    def _wait_for_acks(
+        self,
+        results: dict[int, CommandResult],
+        acks: "_AckListener",
+        dispatcher: EventDispatcher,
+    ) -> None:
+        deadline = time.monotonic() + self._ack_timeout
+        delivered = {u for u, result in results.items() if result.delivered}
+        while not delivered <= acks.times().keys():
+            dispatcher.poll()
+            now = time.monotonic()
+            if delivered <= acks.times().keys() or now >= deadline:
+                break
+            time.sleep(min(self.poll_interval, deadline - now))
+        for unit_id, message_time in acks.times().items():
+            if unit_id in delivered:
+                results[unit_id].acknowledged_at = message_time
+
+    def _subscribe(self, unit_ids: list[int]) -> dict[int, int]:
+        """Subscribes the session to the units' messages and returns the flags each unit was subscribed with before."""
+        # Adding no flags changes nothing, but reports each unit's current flags.
+        previous = self._update_flags({0: unit_ids}, mode=1)
+        self._update_flags({int(_ACK_FLAGS): unit_ids}, mode=1)
+        return {unit_id: previous.get(unit_id, 0) for unit_id in unit_ids}
+
+    def _unsubscribe(self, previous: dict[int, int]) -> None:
+        """Removes only the flags :py:meth:`_subscribe` added to each unit."""
+        added = collections.defaultdict(list)
+        for unit_id, flags in previous.items():
+            if mask := int(_ACK_FLAGS) & ~flags:
+                added[mask].append(unit_id)
+        if added:
+            self._update_flags(added, mode=2)
+
+    def _update_flags(
+        self, unit_ids_by_flags: dict[int, list[int]], mode: int
+    ) -> dict[int, int]:
+        response = self._session.wialon_api.core_update_data_flags(
+            **{
+                "spec": [
+                    {
+                        "type": "col",
+                        "data": unit_ids,
+                        "flags": flags,
+                        "mode": mode,
+                    }
+                    for flags, unit_ids in unit_ids_by_flags.items()
+                ]
+            }
+        )
+        return {
+            int(item["i"]): int(item.get("f", 0))
+            for item in response or []
+            if isinstance(item, dict) and "i" in item
+        }
+
+
+class _AckListener:
+    """Records each unit's first message sent at or after its command, from events of any poll of the session."""
+
+    def __init__(self, results: dict[int, CommandResult]) -> None:
+        self._results = results
+        self._times: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, events: list[dict[str, typing.Any]]) -> None:
+        for event in events:
+            unit_id = int(event.get("i", 0))
+            if event.get("t") != "m" or unit_id not in self._results:
+                continue
+            sent_at = self._results[unit_id].sent_at
+            message_time = (event.get("d") or {}).get("t")
+            # Message times are whole seconds.
+            if sent_at is None or message_time is None:
+                continue
+            if message_time >= int(sent_at):
+                with self._lock:
+                    self._times.setdefault(unit_id, float(message_time))
+
+    def times(self) -> dict[int, float]:
+        """Returns acknowledgement times by unit id."""
+        with self._lock:
+            return dict(self._times)
@@ -0,0 +1,89 @@
+import typing
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+__all__ = ["ACCEPT_ENCODING", "Decompressor", "get_decompressor"]
+
+ACCEPT_ENCODING: str = ", ".join(
+    ["gzip", "deflate", *(["br"] if brotli is not None else [])]
+)
+"""``Accept-Encoding`` header value listing every supported content encoding."""
+
+
+class Decompressor(typing.Protocol):
+    """Incrementally decompresses a response body."""
+
+    def decompress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _IdentityDecompressor:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _DeflateDecompressor:
+    """Accepts zlib wrapped and raw deflate streams, both are sent as ``deflate``."""
+
+    def __init__(self) -> None:
+        self._decompressor: typing.Any = None
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            if not data:
+                return b""
+            is_zlib = len(data) >= 2 and (
+                data[0] & 0x0F == 8 and ((data[0] << 8) | data[1]) % 31 == 0
+            )
+            self._decompressor = zlib.decompressobj(
+                zlib.MAX_WBITS if is_zlib else -zlib.MAX_WBITS
+            )
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush() if self._decompressor else b""
+
+
+class _BrotliDecompressor:
+    def __init__(self) -> None:
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def get_decompressor(content_encoding: str | None) -> Decompressor:
+    """
+    Returns an incremental decompressor for a ``Content-Encoding`` header value.
+
+    :param content_encoding: A ``Content-Encoding`` header value.
+    :type content_encoding: str | None
+    :raises ValueError: If the content encoding wasn't supported.
+    :returns: A decompressor.
+    :rtype: ~terminusgps.wialon.compression.Decompressor
+
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return _IdentityDecompressor()
+    elif encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        return _DeflateDecompressor()
+    elif encoding == "br" and brotli is not None:
+        return _BrotliDecompressor()
+    raise ValueError(f"Unsupported content encoding '{content_encoding}'.")
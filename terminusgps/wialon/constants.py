@@ -417,6 +417,230 @@ class WialonLogAction(enum.StrEnum):
     """
 
 
+WIALON_LOG_TEMPLATES: dict[WialonLogAction, tuple[str, ...]] = {
+    WialonLogAction.CUSTOM_MSG: ("Manual record: '%s'.",),
+    WialonLogAction.CREATE_UNIT: ("Unit '%s' created.",),
+    WialonLogAction.UPDATE_NAME: ("Name changed from '%s' to '%s'.",),
+    WialonLogAction.UPDATE_ACCESS: ("Access to %d '%s' changed.",),
+    WialonLogAction.UPDATE_UNIT_ICON: ("Unit icon changed.",),
+    WialonLogAction.UPDATE_UNIT_PASS: ("Access password changed.",),
+    WialonLogAction.UPDATE_UNIT_PHONE: (
+        "Phone number changed from '%s' to '%s'.",
+    ),
+    WialonLogAction.UPDATE_UNIT_PHONE2: (
+        "Second phone number changed from '%s' to '%s'.",
+    ),
+    WialonLogAction.UPDATE_UNIT_CALCFLAGS: ("Calculation flags changed.",),
+    WialonLogAction.UPDATE_UNIT_DRAT: ("Driver activity source changed.",),
+    WialonLogAction.UPDATE_UNIT_MILCOUNTER: (
+        "Mileage counter changed from %d %s to %d %s.",
+    ),
+    WialonLogAction.UPDATE_UNIT_BYTECOUNTER: (
+        "GPRS traffic counter changed from %d KB to %d KB.",
+    ),
+    WialonLogAction.UPDATE_UNIT_EHCOUNTER: (
+        "Engine hours counter changed from %.2f h to %.2f h.",
+    ),
+    WialonLogAction.UPDATE_UNIT_UID: ("Unique ID changed from '%s' to '%s'.",),
+    WialonLogAction.UPDATE_UNIT_UID2: (
+        "Second unique ID changed from '%s' to '%s'.",
+    ),
+    WialonLogAction.UPDATE_UNIT_HW: (
+        "Device type changed from '%s' to '%s'.",
+    ),
+    WialonLogAction.UPDATE_UNIT_HW_CFG: ("Device configuration changed.",),
+    WialonLogAction.UPDATE_UNIT_FUEL_CFG: (
+        "Fuel consumption settings changed.",
+    ),
+    WialonLogAction.CREATE_SENSOR: ("Sensor '%s' created.",),
+    WialonLogAction.UPDATE_SENSOR: ("Sensor '%s' modified.",),
+    WialonLogAction.DELETE_SENSOR: ("Sensor '%s' deleted.",),
+    WialonLogAction.CREATE_ALIAS: ("Command '%s' created.",),
+    WialonLogAction.UPDATE_ALIAS: ("Command '%s' modified.",),
+    WialonLogAction.DELETE_ALIAS: ("Command '%s' deleted.",),
+    WialonLogAction.CREATE_SERVICE_INTERVAL: (
+        "Service interval '%s' created.",
+    ),
+    WialonLogAction.UPDATE_SERVICE_INTERVAL: (
+        "Service interval '%s' modified.",
+    ),
+    WialonLogAction.DELETE_SERVICE_INTERVAL: (
+        "Service interval '%s' deleted.",
+    ),
+    WialonLogAction.CREATE_CUSTOM_FIELD: ("Custom field '%s' created.",),
+    WialonLogAction.UPDATE_CUSTOM_FIELD: ("Custom field '%s' modified.",),
+    WialonLogAction.DELETE_CUSTOM_FIELD: ("Custom field '%s' deleted.",),
+    WialonLogAction.CREATE_ADMIN_FIELD: ("Admin field '%s' created.",),
+    WialonLogAction.UPDATE_ADMIN_FIELD: ("Admin field '%s' modified.",),
+    WialonLogAction.DELETE_ADMIN_FIELD: ("Admin field '%s' deleted.",),
+    WialonLogAction.UPDATE_PROFILE_FIELD: ("Profile field '%s' modified.",),
+    WialonLogAction.DELETE_PROFILE_FIELD: ("Profile field '%s' deleted.",),
+    WialonLogAction.IMPORT_ITEM_CFG: ("Properties imported.",),
+    WialonLogAction.IMPORT_UNIT_CFG: ("Properties imported.",),
+    WialonLogAction.EXPORT_UNIT_MSGS: ("Messages exported.",),
+    WialonLogAction.IMPORT_UNIT_MSGS: ("Messages imported.",),
+    WialonLogAction.DELETE_UNIT_MSG: ("Deleted %d message dated %s.",),
+    WialonLogAction.DELETE_UNIT_MSGS: ("Deleted %s %d messages.",),
+    WialonLogAction.BIND_UNIT_DRIVER: ("Driver '%s' was assigned at '%s'.",),
+    WialonLogAction.UNBIND_UNIT_DRIVER: (
+        "Driver '%s' was separated at '%s'.",
+    ),
+    WialonLogAction.BIND_UNIT_TAG: ("Passenger '%s' was assigned at '%s'.",),
+    WialonLogAction.UNBIND_UNIT_TAG: (
+        "Passenger '%s' was separated at '%s'.",
+    ),
+    WialonLogAction.BIND_UNIT_TRAILER: ("Trailer '%s' was assigned at '%s'.",),
+    WialonLogAction.UNBIND_UNIT_TRAILER: (
+        "Trailer '%s' was separated at '%s'.",
+    ),
+    WialonLogAction.UPDATE_UNIT_REPORT_CFG: ("Unit report settings changed.",),
+    WialonLogAction.UPDATE_MSGS_FILTER_CFG: (
+        "Message filtration settings changed.",
+    ),
+    WialonLogAction.DELETE_ITEM: ("Item '%s' deleted.",),
+    WialonLogAction.CREATE_USER: ("User '%s' created.",),
+    WialonLogAction.UPDATE_HOSTS_MASK: ("Host mask changed to '%s'.",),
+    WialonLogAction.UPDATE_USER_PASS: ("User password changed.",),
+    WialonLogAction.UPDATE_USER_FLAGS: ("User flags changed.",),
+    WialonLogAction.UPDATE_USER_LOCALE: ("First day of week changed.",),
+    WialonLogAction.CREATE_USER_NOTIFY: ("Notice to the user: '%s'.",),
+    WialonLogAction.DELETE_USER_NOTIFY: ("User notification '%s' deleted.",),
+    WialonLogAction.CREATE_GROUP: ("Unit group '%s' created.",),
+    WialonLogAction.UNITS_GROUP: (
+        "Unit added to the group '%s'.",
+        "Unit removed from the group '%s'.",
+        "Units in group updated.",
+    ),
+    WialonLogAction.UPDATE_DRIVER_UNITS: (
+        "Unit attached to the resource of drivers '%s'.",
+        "Unit removed from the resource of drivers '%s'.",
+        "Automatic assignment list of drivers updated.",
+    ),
+    WialonLogAction.UPDATE_TRAILER_UNITS: (
+        "Unit attached to the resource of trailers '%s'.",
+        "Unit removed from the resource of trailers '%s'.",
+        "Automatic assignment list of trailers updated.",
+    ),
+    WialonLogAction.CREATE_RESOURCE: ("Resource '%s' created.",),
+    WialonLogAction.CREATE_ZONE: ("Geofence '%s' created.",),
+    WialonLogAction.UPDATE_ZONE: ("Geofence '%s' updated.",),
+    WialonLogAction.DELETE_ZONE: ("Geofence '%s' deleted.",),
+    WialonLogAction.UPDATE_TRACK_COLOR_SETTING: (
+        'Track colour settings changed to "By trips".',
+        'Track colour settings changed to "Single".',
+        'Track colour settings changed to "By speed".',
+        'Track colour settings changed to "By sensor".',
+    ),
+    WialonLogAction.CREATE_JOB: ("Job '%s' created.",),
+    WialonLogAction.SWITCH_JOB: ("Job '%s switched on/off.",),
+    WialonLogAction.UPDATE_JOB: ("Job '%s' updated.",),
+    WialonLogAction.DELETE_JOB: ("Job '%s' deleted.",),
+    WialonLogAction.CREATE_NOTIFY: ("Notification '%s' created.",),
+    WialonLogAction.SWITCH_NOTIFY: ("Notification '%s' switched on/off.",),
+    WialonLogAction.UPDATE_NOTIFY: ("Notification '%s' updated.",),
+    WialonLogAction.DELETE_NOTIFY: ("Notification '%s' deleted.",),
+    WialonLogAction.CREATE_DRIVER: ("Driver '%s' created.",),
+    WialonLogAction.UPDATE_DRIVER: ("Driver '%s' updated.",),
+    WialonLogAction.DELETE_DRIVER: ("Driver '%s' deleted.",),
+    WialonLogAction.CREATE_TRAILER: ("Trailer '%s' created.",),
+    WialonLogAction.UPDATE_TRAILER: ("Trailer '%s' updated.",),
+    WialonLogAction.DELETE_TRAILER: ("Trailer '%s' deleted.",),
+    WialonLogAction.CREATE_DRIVERS_GROUP: ("Group of drivers '%s' created.",),
+    WialonLogAction.UPDATE_DRIVERS_GROUP: ("Group of drivers '%s' updated.",),
+    WialonLogAction.DELETE_DRIVERS_GROUP: ("Group of drivers '%s' deleted.",),
+    WialonLogAction.CREATE_TRAILERS_GROUP: (
+        "Group of trailers '%s' created.",
+    ),
+    WialonLogAction.UPDATE_TRAILERS_GROUP: (
+        "Group of trailers '%s' updated.",
+    ),
+    WialonLogAction.DELETE_TRAILERS_GROUP: (
+        "Group of trailers '%s' deleted.",
+    ),
+    WialonLogAction.CREATE_REPORT: ("Report template '%s' created.",),
+    WialonLogAction.UPDATE_REPORT: ("Report template '%s' updated.",),
+    WialonLogAction.DELETE_REPORT: ("Report template '%s' deleted.",),
+    WialonLogAction.IMPORT_ZONES: ("Geofences imported.",),
+    WialonLogAction.CREATE_RETRANSLATOR: ("Retranslator '%s' created.",),
+    WialonLogAction.UPDATE_RETRANSLATOR: ("Properties updated.",),
+    WialonLogAction.UNITS_RETRANSLATOR: ("Units updated.",),
+    WialonLogAction.SWITCH_RETRANSLATOR: ("Started/stopped.",),
+    WialonLogAction.MSGS_HISTORY_RETRANSLATOR: (
+        "Past period retranslator started/stopped.",
+    ),
+    WialonLogAction.CREATE_ROUTE: ("Route '%s' created.",),
+    WialonLogAction.UPDATE_ROUTE_POINTS: ("Check points updated.",),
+    WialonLogAction.UPDATE_ROUTE_CFG: ("Properties updated.",),
+    WialonLogAction.CREATE_ROUND: ("Ride '%s' created.",),
+    WialonLogAction.UPDATE_ROUND: ("Ride '%s' updated.",),
+    WialonLogAction.DELETE_ROUND: ("Ride '%s' deleted.",),
+    WialonLogAction.CREATE_SCHEDULE: ("Schedule '%s' created.",),
+    WialonLogAction.UPDATE_SCHEDULE: ("Schedule '%s' updated.",),
+    WialonLogAction.DELETE_SCHEDULE: ("Schedule '%s' deleted.",),
+    WialonLogAction.CREATE_ACCOUNT: ("Account '%s' created.",),
+    WialonLogAction.DELETE_ACCOUNT: ("Account '%s' deleted.",),
+    WialonLogAction.CHANGE_ACCOUNT: ("Account changed from '%s' to '%s'.",),
+    WialonLogAction.SWITCH_ACCOUNT: ("Account blocked/unblocked.",),
+    WialonLogAction.UPDATE_DEALER_RIGHTS: ("Dealer rights enabled/disabled.",),
+    WialonLogAction.DO_PAYMENT: ("Payment or days registered.",),
+    WialonLogAction.UPDATE_ACCOUNT_FLAGS: ("Account flags changed.",),
+    WialonLogAction.UPDATE_ACCOUNT_BLOCK_BALANCE: (
+        "Balance to block account changed.",
+    ),
+    WialonLogAction.UPDATE_ACCOUNT_DENY_BALANCE: (
+        "Balance to limit activity changed.",
+    ),
+    WialonLogAction.UPDATE_ACCOUNT_MIN_DAYS: (
+        "Minimum days counter changed.",
+    ),
+    WialonLogAction.UPDATE_ACCOUNT_PLAN: ("Billing plan changed to '%s'.",),
+    WialonLogAction.UPDATE_ACCOUNT_HISTORY_PERIOD: (
+        "History period changed to '%s'.",
+    ),
+    WialonLogAction.UPDATE_ACCOUNT_SUBPLANS: ("List of subplans changed.",),
+    WialonLogAction.UPDATE_SERVICE: ("Service '%s' updated.",),
+    WialonLogAction.DELETE_DRIVER_MSG: (
+        "Message dated %s from driver '%s' deleted.",
+    ),
+    WialonLogAction.DELETE_TRAILER_MSG: (
+        "Message dated %s from trailer '%s' deleted.",
+    ),
+    WialonLogAction.CONVERT_MEASURE_UNITS: (
+        "Measurement system changed to %s.",
+        "Conversion to the %s.",
+    ),
+    WialonLogAction.DELETE_ZONES_GROUP: ("Group of geofences deleted.",),
+    WialonLogAction.CREATE_ZONES_GROUP: ("Group of geofences '%s' created.",),
+    WialonLogAction.UPDATE_ZONES_GROUP: ("Group of geofences '%s' updated.",),
+    WialonLogAction.TRAILER_RESET_IMAGE: ("Trailer '%s' updated.",),
+    WialonLogAction.DRIVER_RESET_IMAGE: ("Driver '%s' updated.",),
+    WialonLogAction.ZONE_RESET_IMAGE: ("Geofence '%s' updated.",),
+    WialonLogAction.CREATE_ORDER: ("Order '%s' created.",),
+    WialonLogAction.UPDATE_ORDER: ("Order '%s' updated.",),
+    WialonLogAction.DELETE_ORDER: ("Order '%s' deleted.",),
+    WialonLogAction.CREATE_ORDER_ROUTE: ("Order route '%s' created.",),
+    WialonLogAction.UPDATE_ORDER_ROUTE: ("Order route '%s' updated.",),
+    WialonLogAction.DELETE_ORDER_ROUTE: ("Order route '%s' deleted.",),
+    WialonLogAction.CREATE_TAG: ("Passenger '%s' created.",),
+    WialonLogAction.UPDATE_TAG: ("Passenger '%s' updated.",),
+    WialonLogAction.TAG_RESET_IMAGE: ("Passenger '%s' updated.",),
+    WialonLogAction.DELETE_TAG: ("Passenger '%s' deleted.",),
+    WialonLogAction.DELETE_TAG_MSG: (
+        "Message dated %s from passenger '%s' deleted.",
+    ),
+    WialonLogAction.UPDATE_TAG_UNITS: (
+        "Automatic assignment list of passengers updated.",
+    ),
+    WialonLogAction.CRITERIA_UPDATED: ("Criteria updated.",),
+    WialonLogAction.SET_ACTIVE: (
+        "Unit was deactivated.",
+        "Unit was activated.",
+        "Unit was activated automatically.",
+    ),
+}
+"""Message templates of every :py:class:`WialonLogAction`, one per possible message. ``%s``, ``%d`` and ``%.2f`` are placeholders of values in the message."""
+
+
 ACCESSMASK_RESOURCE_BASIC: int = (
     flags.AccessFlag.MANAGE_CUSTOM_FIELDS
     | flags.AccessFlag.RESOURCE_MANAGE_DRIVERS
@@ -0,0 +1,122 @@
+import logging
+import threading
+import typing
+import weakref
+
+__all__ = ["EventDispatcher"]
+
+logger = logging.getLogger(__name__)
+
+EventListener = typing.Callable[[list[dict[str, typing.Any]]], None]
+"""Called with the events of each ``avl_evts`` poll, in order."""
+
+
+class EventDispatcher:
+    """
+    Polls ``avl_evts`` for a Wialon API session and passes the events to every listener.
+
+    ``avl_evts`` returns each event once per session, so components that read events of the same session, e.g. a :py:class:`~terminusgps.wialon.unit_index.UnitIndex` and a :py:class:`~terminusgps.wialon.commands.CommandFanout`, must share one dispatcher instead of polling on their own. Get it with :py:meth:`for_session`.
+
+    Usage:
+
+    .. code::
+
+        from terminusgps.wialon.events import EventDispatcher
+        from terminusgps.wialon.session import WialonSession
+
+        with WialonSession() as session:
+            dispatcher = EventDispatcher.for_session(session)
+            dispatcher.subscribe(lambda events: print(len(events)))
+            dispatcher.poll()
+
+    """
+
+    _dispatchers: "weakref.WeakKeyDictionary[typing.Any, EventDispatcher]" = (
+        weakref.WeakKeyDictionary()
+    )
+    _dispatchers_lock = threading.Lock()
+
+    def __init__(self, session: typing.Any) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        # A weak reference, so the registry of dispatchers doesn't keep sessions alive.
+        self._session = weakref.ref(session)
+        self._listeners: list[EventListener] = []
+        self._listeners_lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    @classmethod
+    def for_session(cls, session: typing.Any) -> "EventDispatcher":
+        """
+        Returns the dispatcher of a session, created on first use.
+
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :returns: The session's event dispatcher.
+        :rtype: ~terminusgps.wialon.events.EventDispatcher
+
+        """
+        with cls._dispatchers_lock:
+            dispatcher = cls._dispatchers.get(session)
+            if dispatcher is None:
+                dispatcher = cls._dispatchers[session] = cls(session)
+            return dispatcher
+
+    def subscribe(self, listener: EventListener) -> None:
+        """
+        Adds a listener. Adding a listener twice has no effect.
+
+        :param listener: Called with the events of each poll.
+        :type listener: ~collections.abc.Callable[[list[dict[str, ~typing.Any]]], None]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._listeners_lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def unsubscribe(self, listener: EventListener) -> None:
+        """
+        Removes a listener, if it was added.
+
+        :param listener: A listener added with :py:meth:`subscribe`.
+        :type listener: ~collections.abc.Callable[[list[dict[str, ~typing.Any]]], None]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def poll(self) -> int:
+        """
+        Calls ``avl_evts`` once and passes its events to every listener.
+
+        Concurrent polls are sent one at a time, so listeners see events in order. A listener that raises is logged and doesn't stop the others.
+
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: Number of events received.
+        :rtype: int
+
+        """
+        session = self._session()
+        if session is None:
+            return 0
+        with self._poll_lock:
+            response = session.wialon_api.avl_evts()
+            events = response.get("events", [])
+            with self._listeners_lock:
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(events)
+                except Exception:
+                    logger.exception(f"Event listener {listener!r} failed")
+        return len(events)
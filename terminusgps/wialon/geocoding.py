@@ -0,0 +1,235 @@
+import collections
+import json
+import logging
+import threading
+import time
+import typing
+import urllib.parse
+import urllib.request
+
+from terminusgps.wialon.session import WialonAPIError, WialonSession
+
+__all__ = ["GeohashCache", "ReverseGeocoder", "encode_geohash"]
+
+logger = logging.getLogger(__name__)
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(lat: float, lon: float, precision: int = 8) -> str:
+    """
+    Returns the geohash of a coordinate.
+
+    A precision of ``8`` is a cell of about 38 by 19 meters, ``7`` about 153 by 153 meters.
+
+    :param lat: Latitude in degrees.
+    :type lat: float
+    :param lon: Longitude in degrees.
+    :type lon: float
+    :param precision: Number of geohash characters. Default is ``8``.
+    :type precision: int
+    :returns: A geohash.
+    :rtype: str
+
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (bounds[0] + bounds[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            bounds[0] = middle
+        else:
+            value <<= 1
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+class GeohashCache:
+    """Thread-safe LRU cache of addresses by geohash, with a time to live."""
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 86400.0) -> None:
+        """
+        :param max_size: Maximum number of cached addresses. Default is ``100000``.
+        :type max_size: int
+        :param ttl: Seconds an address stays cached. Default is ``86400.0``.
+        :type ttl: float
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: collections.OrderedDict[str, tuple[float, str]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, geohash: str) -> str | None:
+        """
+        Returns a cached address.
+
+        :param geohash: A geohash.
+        :type geohash: str
+        :returns: The address, or :py:obj:`None` if it wasn't cached or expired.
+        :rtype: str | None
+
+        """
+        with self._lock:
+            entry = self._entries.get(geohash)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[geohash]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(geohash)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, geohash: str, address: str) -> None:
+        """
+        Caches an address.
+
+        :param geohash: A geohash.
+        :type geohash: str
+        :param address: The address.
+        :type address: str
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._lock:
+            self._entries[geohash] = (time.monotonic() + self.ttl, address)
+            self._entries.move_to_end(geohash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class ReverseGeocoder:
+    """
+    Reverse geocodes coordinates with the Wialon GIS service.
+
+    Requests are authorized with the session's :py:attr:`~terminusgps.wialon.session.WialonSession.gis_sid`. Coordinates in the same geohash cell share one cached address, so nearby lookups don't hit the network. Uncached cells are sent up to ``batch_size`` per request.
+
+    Usage:
+
+    .. code::
+
+        geocoder = ReverseGeocoder(session)
+        addresses = geocoder.reverse([(32.7767, -96.7970), (32.7768, -96.7971)])
+
+    """
+
+    flags: int = 1255211008
+    """Address format flags: country, region, city, street and house."""
+
+    def __init__(
+        self,
+        session: WialonSession,
+        *,
+        gis_url: str = "https://geocode-maps.wialon.com/hst-api.wialon.com",
+        cache: GeohashCache | None = None,
+        precision: int = 8,
+        batch_size: int = 100,
+        timeout: float = 10.0,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param gis_url: Base url of the Wialon GIS service. Default is ``"https://geocode-maps.wialon.com/hst-api.wialon.com"``.
+        :type gis_url: str
+        :param cache: Address cache, shareable between geocoders. Default is :py:obj:`None` (new cache).
+        :type cache: ~terminusgps.wialon.geocoding.GeohashCache | None
+        :param precision: Geohash precision of cache cells. Default is ``8``.
+        :type precision: int
+        :param batch_size: Maximum number of coordinates per GIS request. Default is ``100``.
+        :type batch_size: int
+        :param timeout: GIS request timeout in seconds. Default is ``10.0``.
+        :type timeout: float
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self.gis_url = gis_url.rstrip("/")
+        self.cache = cache if cache is not None else GeohashCache()
+        self.precision = precision
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def reverse(
+        self, coordinates: typing.Iterable[tuple[float, float]]
+    ) -> list[str]:
+        """
+        Returns the address of each coordinate.
+
+        :param coordinates: ``(lat, lon)`` coordinates in degrees.
+        :type coordinates: ~collections.abc.Iterable[tuple[float, float]]
+        :raises WialonAPIError: If a GIS request failed.
+        :returns: One address per coordinate, in order.
+        :rtype: list[str]
+
+        """
+        coordinates = list(coordinates)
+        geohashes = [
+            encode_geohash(lat, lon, self.precision)
+            for lat, lon in coordinates
+        ]
+        addresses: dict[str, str] = {}
+        missing: dict[str, tuple[float, float]] = {}
+        for geohash, coordinate in zip(geohashes, coordinates):
+            if geohash in addresses or geohash in missing:
+                continue
+            address = self.cache.get(geohash)
+            if address is None:
+                missing[geohash] = coordinate
+            else:
+                addresses[geohash] = address
+
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start : start + self.batch_size]
+            results = self._request([coordinate for _, coordinate in chunk])
+            for (geohash, _), address in zip(chunk, results):
+                addresses[geohash] = address
+                self.cache.set(geohash, address)
+        logger.debug(
+            f"Geocoded {len(coordinates)} coordinates with {len(pending)} uncached cells"
+        )
+        return [addresses[geohash] for geohash in geohashes]
+
+    def _request(self, coordinates: list[tuple[float, float]]) -> list[str]:
+        data = urllib.parse.urlencode(
+            {
+                "coords": json.dumps(
+                    [{"lat": lat, "lon": lon} for lat, lon in coordinates]
+                ),
+                "flags": self.flags,
+                "uid": self._session.uid or "",
+                "sid": self._session.gis_sid or "",
+            }
+        ).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.gis_url}/gis_geocode", data=data
+        )
+        try:
+            with urllib.request.urlopen(
+                request, timeout=self.timeout
+            ) as response:
+                result = self._session.wialon_api.codec.loads(response.read())
+        except (OSError, ValueError) as e:
+            raise WialonAPIError(f"Wialon GIS request failed: {e}")
+        if not isinstance(result, list) or len(result) != len(coordinates):
+            raise WialonAPIError(f"Invalid Wialon GIS response: {result!r}")
+        return [str(address) for address in result]
@@ -0,0 +1,419 @@
+import dataclasses
+import enum
+import logging
+import typing
+
+import numpy as np
+
+from terminusgps.wialon.session import WialonSession
+
+__all__ = ["Geofence", "GeofenceEngine", "GeofenceTransition", "GeofenceType"]
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_METERS = 6_371_008.8
+
+
+class GeofenceType(enum.IntEnum):
+    """Wialon geofence (zone) types."""
+
+    LINE = 1
+    """A line geofence."""
+    POLYGON = 2
+    """A polygon geofence."""
+    CIRCLE = 3
+    """A circle geofence."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Geofence:
+    """A Wialon resource geofence reduced to the data required for hit testing."""
+
+    id: int
+    """Geofence id in its resource."""
+    name: str
+    """Geofence name."""
+    type: int
+    """Geofence type, see :py:class:`GeofenceType`."""
+    lons: np.ndarray
+    """Vertex longitudes. Circles have exactly one vertex, their center."""
+    lats: np.ndarray
+    """Vertex latitudes. Circles have exactly one vertex, their center."""
+    radius: float = 0.0
+    """Circle radius in meters. Unused for polygons."""
+
+    @classmethod
+    def from_zone_data(cls, zone: dict[str, typing.Any]) -> "Geofence":
+        """
+        Returns a geofence from a ``resource/get_zone_data`` response item.
+
+        :param zone: A Wialon geofence dictionary.
+        :type zone: dict[str, ~typing.Any]
+        :returns: A geofence.
+        :rtype: ~terminusgps.wialon.geofences.Geofence
+
+        """
+        points = zone.get("p", [])
+        return cls(
+            id=int(zone["id"]),
+            name=str(zone.get("n", "")),
+            type=int(zone["t"]),
+            lons=np.array([p["x"] for p in points], dtype=np.float64),
+            lats=np.array([p["y"] for p in points], dtype=np.float64),
+            radius=float(zone.get("w", 0)),
+        )
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """
+        Bounding box of the geofence as ``(min_lon, min_lat, max_lon, max_lat)``, within ``[-180, 180]`` and ``[-90, 90]``.
+
+        Circles around a pole span every longitude. Circles crossing the antimeridian have a ``min_lon`` greater than their ``max_lon``.
+
+        :type: tuple[float, float, float, float]
+
+        """
+        if self.type == GeofenceType.CIRCLE:
+            lat, lon = float(self.lats[0]), float(self.lons[0])
+            angle = self.radius / EARTH_RADIUS_METERS
+            dlat = float(np.degrees(angle))
+            min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+            if min_lat <= -90.0 or max_lat >= 90.0:
+                return -180.0, min_lat, 180.0, max_lat
+            # Widest longitude offset of a spherical circle, reached north or south of its center.
+            dlon = float(
+                np.degrees(np.arcsin(np.sin(angle) / np.cos(np.radians(lat))))
+            )
+            return (
+                _wrap_lon(lon - dlon),
+                min_lat,
+                _wrap_lon(lon + dlon),
+                max_lat,
+            )
+        return (
+            max(float(self.lons.min()), -180.0),
+            max(float(self.lats.min()), -90.0),
+            min(float(self.lons.max()), 180.0),
+            min(float(self.lats.max()), 90.0),
+        )
+
+    def contains(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Returns a boolean array marking which coordinates lie inside the geofence.
+
+        :param lats: Latitudes to test.
+        :type lats: ~numpy.ndarray
+        :param lons: Longitudes to test.
+        :type lons: ~numpy.ndarray
+        :returns: A boolean array shaped like ``lats``.
+        :rtype: ~numpy.ndarray
+
+        """
+        if self.type == GeofenceType.CIRCLE:
+            return _in_circle(
+                lats, lons, self.lats[0], self.lons[0], self.radius
+            )
+        return _in_polygon(lats, lons, self.lats, self.lons)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GeofenceTransition:
+    """A unit entering or exiting a geofence between two consecutive positions."""
+
+    geofence_id: int
+    """Id of the entered or exited geofence."""
+    index: int
+    """Index of the first position inside (enter) or outside (exit) the geofence."""
+    entered: bool
+    """Whether the geofence was entered. :py:obj:`False` means it was exited."""
+    time: int | None = None
+    """UNIX timestamp of the position at :py:attr:`index`, if times were provided."""
+
+
+class GeofenceEngine:
+    """
+    Evaluates coordinates against Wialon geofences without calling the Wialon API.
+
+    Geofences are registered in a uniform grid keyed by their bounding boxes. Coordinates are bucketed into the same grid so each geofence is only tested against the coordinates sharing its cells.
+
+    Line geofences are not supported and are skipped.
+
+    """
+
+    def __init__(
+        self, geofences: typing.Iterable[Geofence], cell_size: float = 0.05
+    ) -> None:
+        """
+        Builds a spatial index over geofences.
+
+        :param geofences: Geofences to index.
+        :type geofences: ~collections.abc.Iterable[~terminusgps.wialon.geofences.Geofence]
+        :param cell_size: Grid cell size in degrees. Default is ``0.05``.
+        :type cell_size: float
+        :raises ValueError: If ``cell_size`` wasn't positive.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        if cell_size <= 0:
+            raise ValueError(f"Cell size must be positive, got {cell_size}.")
+        self._cell_size = cell_size
+        self._geofences: list[Geofence] = []
+        self._bounds: list[tuple[float, float, float, float]] = []
+        self._cells: list[np.ndarray] = []
+        for geofence in geofences:
+            if geofence.type == GeofenceType.LINE or not len(geofence.lons):
+                logger.debug(f"Skipping unsupported geofence #{geofence.id}")
+                continue
+            bounds = geofence.bounds
+            self._geofences.append(geofence)
+            self._bounds.append(bounds)
+            self._cells.append(self._cells_for_bounds(bounds))
+
+    @classmethod
+    def from_resource(
+        cls,
+        resource_id: int,
+        session: WialonSession,
+        *,
+        geofence_ids: typing.Iterable[int] | None = None,
+        cell_size: float = 0.05,
+    ) -> "GeofenceEngine":
+        """
+        Loads a Wialon resource's geofences in a single Wialon API call and indexes them.
+
+        :param resource_id: A Wialon resource id.
+        :type resource_id: int
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param geofence_ids: Geofence ids to load. Default is :py:obj:`None` (all geofences).
+        :type geofence_ids: ~collections.abc.Iterable[int] | None
+        :param cell_size: Grid cell size in degrees. Default is ``0.05``.
+        :type cell_size: float
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: A geofence engine.
+        :rtype: ~terminusgps.wialon.geofences.GeofenceEngine
+
+        """
+        response = session.wialon_api.resource_get_zone_data(
+            **{
+                "itemId": resource_id,
+                "col": list(geofence_ids) if geofence_ids else [],
+                "flags": 0x1C,
+            }
+        )
+        return cls(
+            [Geofence.from_zone_data(zone) for zone in response],
+            cell_size=cell_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self._geofences)
+
+    @property
+    def geofences(self) -> list[Geofence]:
+        """
+        Indexed geofences, in column order of :py:meth:`contains`.
+
+        :type: list[~terminusgps.wialon.geofences.Geofence]
+
+        """
+        return list(self._geofences)
+
+    def contains(
+        self, lats: typing.Sequence[float], lons: typing.Sequence[float]
+    ) -> np.ndarray:
+        """
+        Returns a membership matrix of coordinates against every indexed geofence.
+
+        :param lats: Latitudes to test.
+        :type lats: ~collections.abc.Sequence[float]
+        :param lons: Longitudes to test.
+        :type lons: ~collections.abc.Sequence[float]
+        :raises ValueError: If ``lats`` and ``lons`` weren't the same length.
+        :returns: A boolean array shaped ``(len(lats), len(geofences))``.
+        :rtype: ~numpy.ndarray
+
+        """
+        lats, lons = _as_coordinates(lats, lons)
+        result = np.zeros((len(lats), len(self._geofences)), dtype=bool)
+        if not len(lats) or not self._geofences:
+            return result
+
+        keys = self._cell_keys(lats, lons)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        for column, geofence in enumerate(self._geofences):
+            cells = self._cells[column]
+            starts = np.searchsorted(sorted_keys, cells, side="left")
+            stops = np.searchsorted(sorted_keys, cells, side="right")
+            hits = stops > starts
+            if not hits.any():
+                continue
+            candidates = order[
+                np.concatenate(
+                    [
+                        np.arange(start, stop)
+                        for start, stop in zip(starts[hits], stops[hits])
+                    ]
+                )
+            ]
+            min_lon, min_lat, max_lon, max_lat = self._bounds[column]
+            c_lats, c_lons = lats[candidates], lons[candidates]
+            if min_lon <= max_lon:
+                in_lons = (c_lons >= min_lon) & (c_lons <= max_lon)
+            else:
+                in_lons = (c_lons >= min_lon) | (c_lons <= max_lon)
+            in_box = in_lons & (c_lats >= min_lat) & (c_lats <= max_lat)
+            candidates = candidates[in_box]
+            if len(candidates):
+                result[candidates, column] = geofence.contains(
+                    lats[candidates], lons[candidates]
+                )
+        return result
+
+    def transitions(
+        self,
+        lats: typing.Sequence[float],
+        lons: typing.Sequence[float],
+        times: typing.Sequence[int] | None = None,
+        initial: np.ndarray | None = None,
+    ) -> list[GeofenceTransition]:
+        """
+        Returns geofence enter/exit transitions across consecutive positions of a single unit.
+
+        :param lats: Chronologically ordered latitudes.
+        :type lats: ~collections.abc.Sequence[float]
+        :param lons: Chronologically ordered longitudes.
+        :type lons: ~collections.abc.Sequence[float]
+        :param times: UNIX timestamps for each position. Default is :py:obj:`None`.
+        :type times: ~collections.abc.Sequence[int] | None
+        :param initial: Membership row preceding the first position, e.g. the last row of a previous call. Default is :py:obj:`None` (no transitions at the first position).
+        :type initial: ~numpy.ndarray | None
+        :raises ValueError: If ``times`` wasn't the same length as ``lats``.
+        :returns: A list of transitions ordered by position, then geofence.
+        :rtype: list[~terminusgps.wialon.geofences.GeofenceTransition]
+
+        """
+        membership = self.contains(lats, lons)
+        if times is not None and len(times) != len(membership):
+            raise ValueError(
+                f"Expected {len(membership)} times, got {len(times)}."
+            )
+        offset = 1
+        if initial is not None:
+            initial = np.asarray(initial, dtype=bool).reshape(1, -1)
+            membership = np.vstack([initial, membership])
+            offset = 0
+        rows, columns = np.nonzero(membership[1:] != membership[:-1])
+        transitions = []
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            index = row + offset
+            transitions.append(
+                GeofenceTransition(
+                    geofence_id=self._geofences[column].id,
+                    index=index,
+                    entered=bool(membership[row + 1, column]),
+                    time=int(times[index]) if times is not None else None,
+                )
+            )
+        return transitions
+
+    def _cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        x = np.floor((lons + 180.0) / self._cell_size).astype(np.int64)
+        y = np.floor((lats + 90.0) / self._cell_size).astype(np.int64)
+        return y * self._columns + np.clip(x, 0, self._columns - 1)
+
+    def _cells_for_bounds(
+        self, bounds: tuple[float, float, float, float]
+    ) -> np.ndarray:
+        min_lon, min_lat, max_lon, max_lat = bounds
+        # Boxes crossing the antimeridian cover two longitude ranges.
+        if min_lon <= max_lon:
+            lon_ranges = [(min_lon, max_lon)]
+        else:
+            lon_ranges = [(min_lon, 180.0), (-180.0, max_lon)]
+        y0, y1 = (
+            int(np.floor((lat + 90.0) / self._cell_size))
+            for lat in (min_lat, max_lat)
+        )
+        ys = np.arange(y0, y1 + 1, dtype=np.int64)
+        cells = []
+        for lon_range in lon_ranges:
+            x0, x1 = (
+                int(np.floor((lon + 180.0) / self._cell_size))
+                for lon in lon_range
+            )
+            xs, ys_grid = np.meshgrid(
+                np.arange(x0, x1 + 1, dtype=np.int64), ys
+            )
+            cells.append((ys_grid * self._columns + xs).ravel())
+        return np.unique(np.concatenate(cells))
+
+    @property
+    def _columns(self) -> int:
+        return int(np.ceil(360.0 / self._cell_size)) + 1
+
+
+def _wrap_lon(lon: float) -> float:
+    """Wraps a longitude that overshot ``[-180, 180]`` back into it."""
+    if lon > 180.0:
+        return lon - 360.0
+    if lon < -180.0:
+        return lon + 360.0
+    return lon
+
+
+def _as_coordinates(
+    lats: typing.Sequence[float], lons: typing.Sequence[float]
+) -> tuple[np.ndarray, np.ndarray]:
+    lats = np.asarray(lats, dtype=np.float64).ravel()
+    lons = np.asarray(lons, dtype=np.float64).ravel()
+    if lats.shape != lons.shape:
+        raise ValueError(
+            f"Expected as many latitudes as longitudes, got {len(lats)} and {len(lons)}."
+        )
+    return lats, lons
+
+
+def _in_circle(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    center_lat: float,
+    center_lon: float,
+    radius: float,
+) -> np.ndarray:
+    """Haversine distance test against a circle radius in meters."""
+    phi1, phi2 = np.radians(lats), np.radians(center_lat)
+    dphi = phi2 - phi1
+    dlambda = np.radians(center_lon - lons)
+    a = (
+        np.sin(dphi / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return distance <= radius
+
+
+def _in_polygon(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    poly_lats: np.ndarray,
+    poly_lons: np.ndarray,
+    budget: int = 1 << 22,
+) -> np.ndarray:
+    """Even-odd ray casting, vectorised over points and edges. Points are processed in chunks so each (points × vertices) temporary holds at most ``budget`` elements, 32 MiB of float64 by default."""
+    chunk_size = max(1, budget // max(1, len(poly_lats)))
+    xi, yi = poly_lons, poly_lats
+    xj, yj = np.roll(poly_lons, 1), np.roll(poly_lats, 1)
+    dy = yj - yi
+    slope = np.divide(xj - xi, dy, out=np.zeros_like(dy), where=dy != 0)
+    inside = np.empty(len(lats), dtype=bool)
+    for start in range(0, len(lats), chunk_size):
+        py = lats[start : start + chunk_size, None]
+        px = lons[start : start + chunk_size, None]
+        crosses = ((yi > py) != (yj > py)) & (px < slope * (py - yi) + xi)
+        inside[start : start + chunk_size] = (
+            np.count_nonzero(crosses, axis=1) % 2 == 1
+        )
+    return inside
@@ -0,0 +1,328 @@
+import collections
+import dataclasses
+import functools
+import logging
+import re
+import typing
+
+from terminusgps.wialon.constants import WIALON_LOG_TEMPLATES, WialonLogAction
+from terminusgps.wialon.session import WialonSession
+
+__all__ = [
+    "LogEvent",
+    "LogIndex",
+    "get_templates",
+    "iter_item_log",
+    "iter_log_events",
+    "parse_log_message",
+]
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDERS: dict[str, tuple[str, typing.Callable[[str], typing.Any]]] = {
+    "%s": (r"(.*?)", str),
+    "%d": (r"(-?\d+)", int),
+    "%.2f": (r"(-?\d+(?:\.\d+)?)", float),
+}
+_PLACEHOLDER_RE = re.compile("|".join(re.escape(p) for p in _PLACEHOLDERS))
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _Template:
+    pattern: re.Pattern[str]
+    converters: tuple[typing.Callable[[str], typing.Any], ...]
+    """Converters of the captured values. Empty if every value is a string."""
+
+
+def _compile_template(template: str) -> _Template:
+    parts, converters, position = [], [], 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        regex, converter = _PLACEHOLDERS[match.group()]
+        parts.append(re.escape(template[position : match.start()]))
+        parts.append(regex)
+        converters.append(converter)
+        position = match.end()
+    parts.append(re.escape(template[position:]))
+    if all(converter is str for converter in converters):
+        converters = []
+    return _Template(re.compile("".join(parts), re.DOTALL), tuple(converters))
+
+
+def get_templates() -> dict[WialonLogAction, tuple[str, ...]]:
+    """
+    Returns message templates of every Wialon log action, from :py:data:`~terminusgps.wialon.constants.WIALON_LOG_TEMPLATES`.
+
+    Actions with several possible messages have one template per message.
+
+    :returns: Message templates by log action.
+    :rtype: dict[~terminusgps.wialon.constants.WialonLogAction, tuple[str, ...]]
+
+    """
+    return dict(WIALON_LOG_TEMPLATES)
+
+
+@functools.cache
+def _get_compiled_templates() -> dict[
+    str, tuple[WialonLogAction, tuple[_Template, ...]]
+]:
+    return {
+        action.value: (
+            action,
+            tuple(_compile_template(t) for t in WIALON_LOG_TEMPLATES[action]),
+        )
+        for action in WialonLogAction
+    }
+
+
+class LogEvent(typing.NamedTuple):
+    """A parsed Wialon item log message. A named tuple, so millions of events are cheap to build."""
+
+    item_id: int
+    """Wialon item id."""
+    time: int
+    """Unix timestamp of the change."""
+    action: WialonLogAction | str
+    """Log action. A plain string if the action isn't a :py:class:`~terminusgps.wialon.constants.WialonLogAction`."""
+    args: tuple[typing.Any, ...]
+    """Values extracted from the message, e.g. ``("old", "new")`` for :py:attr:`~terminusgps.wialon.constants.WialonLogAction.UPDATE_UNIT_UID`. Empty if the message didn't match a template."""
+    text: str = ""
+    """Raw log message."""
+    user: str = ""
+    """Name of the user that made the change."""
+    template: int = -1
+    """Index of the matched template of the action. ``-1`` if no template matched."""
+
+
+def parse_log_message(
+    item_id: int, message: dict[str, typing.Any]
+) -> LogEvent:
+    """
+    Parses a Wialon item log message into a log event.
+
+    :param item_id: Wialon item id of the log.
+    :type item_id: int
+    :param message: A Wialon log message with ``"t"`` (time), ``"a"`` (action), ``"x"`` (message) and ``"u"`` (user) keys.
+    :type message: dict[str, ~typing.Any]
+    :returns: A log event.
+    :rtype: ~terminusgps.wialon.logs.LogEvent
+
+    """
+    action_name = message.get("a", "")
+    text = message.get("x", "")
+    entry = _get_compiled_templates().get(action_name)
+    if entry is None:
+        action, templates = str(action_name), ()
+    else:
+        action, templates = entry
+    args: tuple[typing.Any, ...] = ()
+    index = -1
+    for i, template in enumerate(templates):
+        match = template.pattern.fullmatch(text)
+        if match is not None:
+            args = match.groups()
+            if template.converters:
+                args = tuple(
+                    convert(value)
+                    for convert, value in zip(template.converters, args)
+                )
+            index = i
+            break
+    return LogEvent(
+        int(item_id),
+        int(message.get("t", 0)),
+        action,
+        args,
+        text,
+        message.get("u", ""),
+        index,
+    )
+
+
+def iter_item_log(
+    session: WialonSession,
+    item_id: int,
+    time_from: int,
+    time_to: int,
+    *,
+    chunk_size: int = 1000,
+) -> typing.Iterator[dict[str, typing.Any]]:
+    """
+    Yields the log messages of a Wialon item, loading them in chunks.
+
+    Messages are loaded into the session with ``messages/load_interval`` and fetched ``chunk_size`` at a time. They are unloaded afterwards, even if iteration stops early.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param item_id: A Wialon item id.
+    :type item_id: int
+    :param time_from: Interval start as a unix timestamp.
+    :type time_from: int
+    :param time_to: Interval end as a unix timestamp.
+    :type time_to: int
+    :param chunk_size: Number of messages fetched per Wialon API call. Default is ``1000``.
+    :type chunk_size: int
+    :raises WialonAPIError: If something went wrong calling the Wialon API.
+    :yields: Wialon log messages, oldest first.
+    :rtype: ~collections.abc.Iterator[dict[str, ~typing.Any]]
+
+    """
+    response = session.wialon_api.messages_load_interval(
+        **{
+            "itemId": item_id,
+            "timeFrom": time_from,
+            "timeTo": time_to,
+            "flags": 0x1000,
+            "flagsMask": 0xFF00,
+            "loadCount": 0,
+        }
+    )
+    try:
+        count = int(response.get("count", 0))
+        for start in range(0, count, chunk_size):
+            yield from session.wialon_api.messages_get_messages(
+                **{
+                    "indexFrom": start,
+                    "indexTo": min(start + chunk_size, count) - 1,
+                }
+            )
+    finally:
+        session.wialon_api.messages_unload({})
+
+
+def iter_log_events(
+    session: WialonSession,
+    item_ids: typing.Iterable[int],
+    time_from: int,
+    time_to: int,
+    *,
+    chunk_size: int = 1000,
+) -> typing.Iterator[LogEvent]:
+    """
+    Yields parsed log events of several Wialon items.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param item_ids: Wialon item ids.
+    :type item_ids: ~collections.abc.Iterable[int]
+    :param time_from: Interval start as a unix timestamp.
+    :type time_from: int
+    :param time_to: Interval end as a unix timestamp.
+    :type time_to: int
+    :param chunk_size: Number of messages fetched per Wialon API call. Default is ``1000``.
+    :type chunk_size: int
+    :raises WialonAPIError: If something went wrong calling the Wialon API.
+    :yields: Log events, item by item.
+    :rtype: ~collections.abc.Iterator[~terminusgps.wialon.logs.LogEvent]
+
+    """
+    for item_id in item_ids:
+        for message in iter_item_log(
+            session, item_id, time_from, time_to, chunk_size=chunk_size
+        ):
+            yield parse_log_message(item_id, message)
+
+
+class LogIndex:
+    """
+    Log events indexed by action and by item.
+
+    Usage:
+
+    .. code::
+
+        index = LogIndex(iter_log_events(session, unit_ids, time_from, time_to))
+        for event in index.get(action=WialonLogAction.UPDATE_UNIT_UID):
+            old_imei, new_imei = event.args
+
+    """
+
+    def __init__(self, events: typing.Iterable[LogEvent] = ()) -> None:
+        """
+        :param events: Log events to index. Default is ``()``.
+        :type events: ~collections.abc.Iterable[~terminusgps.wialon.logs.LogEvent]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._events: list[LogEvent] = []
+        self._by_action: dict[str, list[int]] = collections.defaultdict(list)
+        self._by_item: dict[int, list[int]] = collections.defaultdict(list)
+        self.extend(events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> typing.Iterator[LogEvent]:
+        return iter(self._events)
+
+    def add(self, event: LogEvent) -> None:
+        """
+        Adds a log event to the index.
+
+        :param event: A log event.
+        :type event: ~terminusgps.wialon.logs.LogEvent
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        position = len(self._events)
+        self._events.append(event)
+        self._by_action[str(event.action)].append(position)
+        self._by_item[event.item_id].append(position)
+
+    def extend(self, events: typing.Iterable[LogEvent]) -> None:
+        """
+        Adds log events to the index.
+
+        :param events: Log events.
+        :type events: ~collections.abc.Iterable[~terminusgps.wialon.logs.LogEvent]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        for event in events:
+            self.add(event)
+
+    def get(
+        self,
+        *,
+        action: WialonLogAction | str | None = None,
+        item_id: int | None = None,
+    ) -> list[LogEvent]:
+        """
+        Returns log events by action, item or both.
+
+        :param action: A log action. Default is :py:obj:`None` (any action).
+        :type action: ~terminusgps.wialon.constants.WialonLogAction | str | None
+        :param item_id: A Wialon item id. Default is :py:obj:`None` (any item).
+        :type item_id: int | None
+        :returns: Matching log events, in the order they were added.
+        :rtype: list[~terminusgps.wialon.logs.LogEvent]
+
+        """
+        positions: list[int] | None = None
+        if action is not None:
+            positions = self._by_action.get(str(action), [])
+        if item_id is not None:
+            by_item = self._by_item.get(item_id, [])
+            if positions is None:
+                positions = by_item
+            else:
+                wanted = set(by_item)
+                positions = [p for p in positions if p in wanted]
+        if positions is None:
+            return list(self._events)
+        return [self._events[p] for p in positions]
+
+    def counts(self) -> dict[str, int]:
+        """
+        Returns the number of log events by action.
+
+        :returns: Event counts by action name.
+        :rtype: dict[str, int]
+
+        """
+        return {
+            action: len(positions)
+            for action, positions in self._by_action.items()
+        }
@@ -0,0 +1,372 @@
+import concurrent.futures
+import contextvars
+import dataclasses
+import json
+import logging
+import os
+import threading
+import typing
+
+from terminusgps.wialon import constants
+from terminusgps.wialon.bulk import execute_batch
+from terminusgps.wialon.flags import DataFlag
+from terminusgps.wialon.session import WialonSession
+
+__all__ = [
+    "STAGES",
+    "VERIFY_FAILED",
+    "MigrationJournal",
+    "MigrationResult",
+    "UnitMigration",
+]
+
+logger = logging.getLogger(__name__)
+
+STAGES: tuple[str, ...] = ("grant", "creator", "account", "access", "verify")
+"""Migration stages, in order."""
+VERIFY_FAILED: int = -1
+"""Error code of units whose creator or account didn't match after migrating."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class MigrationResult:
+    """Outcome of migrating one unit."""
+
+    unit_id: int
+    """Wialon unit id."""
+    stage: str
+    """Last completed stage, or the failed stage if :py:attr:`error` is set."""
+    error: int = 0
+    """Wialon API error code, or :py:data:`VERIFY_FAILED`. ``0`` on success."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the unit was migrated and verified."""
+        return self.error == 0 and self.stage == STAGES[-1]
+
+
+class MigrationJournal:
+    """
+    Records completed migration stages in an append-only JSON lines file.
+
+    Every completed stage is flushed to disk before the next stage starts, so an interrupted migration resumes from each unit's last completed stage.
+
+    The first line records the migration target. A journal only resumes a migration to the same target; :py:meth:`reset` it to migrate its units elsewhere.
+
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """
+        :param path: Path to the journal file. Created if it doesn't exist.
+        :type path: str | ~os.PathLike
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._completed: dict[int, int] = {}
+        self._target: dict[str, typing.Any] | None = None
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "target" in entry:
+                        self._target = entry["target"]
+                        continue
+                    self._completed[int(entry["unit_id"])] = STAGES.index(
+                        entry["stage"]
+                    )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    @property
+    def target(self) -> dict[str, typing.Any] | None:
+        """The migration target recorded by :py:meth:`bind`, or :py:obj:`None`."""
+        return self._target
+
+    def bind(self, target: dict[str, typing.Any]) -> None:
+        """
+        Records the migration target, or checks it against the recorded one.
+
+        :param target: Migration parameters, e.g. creator and account ids. Must be JSON serializable.
+        :type target: dict[str, ~typing.Any]
+        :raises ValueError: If the journal records another target, or progress without a target.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        target = json.loads(json.dumps(target, sort_keys=True))
+        with self._lock:
+            if self._target is None:
+                if self._completed:
+                    raise ValueError(
+                        f"Journal '{self.path}' records progress but no migration target, reset it to migrate to {target}."
+                    )
+                self._append([json.dumps({"target": target})])
+                self._target = target
+            elif self._target != target:
+                raise ValueError(
+                    f"Journal '{self.path}' records a migration to {self._target}, not {target}. Use another journal or reset it."
+                )
+
+    def reset(self) -> None:
+        """
+        Deletes every recorded stage and the migration target.
+
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._lock:
+            with open(self.path, "w") as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self._completed.clear()
+            self._target = None
+
+    def completed(self, unit_id: int) -> str | None:
+        """
+        Returns the last completed stage of a unit.
+
+        :param unit_id: A Wialon unit id.
+        :type unit_id: int
+        :returns: A stage name, or :py:obj:`None` if no stage was completed.
+        :rtype: str | None
+
+        """
+        index = self._completed.get(int(unit_id))
+        return STAGES[index] if index is not None else None
+
+    def record(self, unit_ids: typing.Iterable[int], stage: str) -> None:
+        """
+        Records a completed stage for units.
+
+        :param unit_ids: Wialon unit ids.
+        :type unit_ids: ~collections.abc.Iterable[int]
+        :param stage: The completed stage.
+        :type stage: str
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        index = STAGES.index(stage)
+        unit_ids = [int(unit_id) for unit_id in unit_ids]
+        if not unit_ids:
+            return
+        lines = [
+            json.dumps({"unit_id": unit_id, "stage": stage})
+            for unit_id in unit_ids
+        ]
+        with self._lock:
+            self._append(lines)
+            for unit_id in unit_ids:
+                self._completed[unit_id] = index
+
+    def _append(self, lines: list[str]) -> None:
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class UnitMigration:
+    """
+    Moves units into another account.
+
+    Each unit goes through the :py:data:`STAGES`:
+
+        #. ``grant``: gives the new creator :py:data:`~terminusgps.wialon.constants.ACCESSMASK_UNIT_MIGRATION` on the unit.
+        #. ``creator``: changes the unit's creator.
+        #. ``account``: changes the unit's account.
+        #. ``access``: gives the target user the target access mask on the unit.
+        #. ``verify``: checks the unit's creator and account.
+
+    Units are migrated in chunks. Every stage of a chunk is one ``core/batch`` request, and chunks are migrated concurrently. Units failing a stage are left out of the chunk's later stages.
+
+    Usage:
+
+    .. code::
+
+        migration = UnitMigration(
+            session,
+            MigrationJournal("/var/tmp/dealer-123.jsonl"),
+            creator_id=28,
+            account_id=29,
+        )
+        results = migration.run(unit_ids)
+        failed = [result for result in results if not result.ok]
+
+    """
+
+    def __init__(
+        self,
+        session: WialonSession,
+        journal: MigrationJournal,
+        *,
+        creator_id: int,
+        account_id: int,
+        user_id: int | None = None,
+        access_mask: int = constants.ACCESSMASK_UNIT_BASIC,
+        chunk_size: int = 100,
+        max_workers: int = 4,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param journal: Journal of completed stages.
+        :type journal: ~terminusgps.wialon.migration.MigrationJournal
+        :param creator_id: Wialon user id of the new creator.
+        :type creator_id: int
+        :param account_id: Wialon resource id of the new account.
+        :type account_id: int
+        :param user_id: Wialon user id given ``access_mask`` on the units. Default is ``creator_id``.
+        :type user_id: int | None
+        :param access_mask: Access mask given to ``user_id``. Default is :py:data:`~terminusgps.wialon.constants.ACCESSMASK_UNIT_BASIC`.
+        :type access_mask: int
+        :param chunk_size: Number of units per chunk. Default is ``100``.
+        :type chunk_size: int
+        :param max_workers: Maximum number of chunks migrated at once. Default is ``4``.
+        :type max_workers: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self._journal = journal
+        self._creator_id = creator_id
+        self._account_id = account_id
+        self._user_id = user_id if user_id is not None else creator_id
+        self._access_mask = access_mask
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+
+    def run(self, unit_ids: typing.Iterable[int]) -> list[MigrationResult]:
+        """
+        Migrates units, skipping stages already recorded in the journal.
+
+        :param unit_ids: Wialon unit ids.
+        :type unit_ids: ~collections.abc.Iterable[int]
+        :raises ValueError: If the journal records a migration to another target.
+        :raises WialonAPIError: If a batch request itself failed.
+        :returns: One result per unit, in order.
+        :rtype: list[~terminusgps.wialon.migration.MigrationResult]
+
+        """
+        self._journal.bind(
+            {
+                "creator_id": self._creator_id,
+                "account_id": self._account_id,
+                "user_id": self._user_id,
+                "access_mask": self._access_mask,
+            }
+        )
+        unit_ids = list(unit_ids)
+        chunks = [
+            unit_ids[start : start + self._chunk_size]
+            for start in range(0, len(unit_ids), self._chunk_size)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, self._migrate, c
+                )
+                for c in chunks
+            ]
+            results = {}
+            for future in futures:
+                results.update(future.result())
+        return [results[unit_id] for unit_id in unit_ids]
+
+    def _migrate(self, unit_ids: list[int]) -> dict[int, MigrationResult]:
+        results = {}
+        for index, stage in enumerate(STAGES):
+            pending = []
+            for unit_id in unit_ids:
+                completed = self._journal.completed(unit_id)
+                if completed is None or STAGES.index(completed) < index:
+                    pending.append(unit_id)
+                else:
+                    results[unit_id] = MigrationResult(unit_id, completed)
+            if not pending:
+                continue
+            done = []
+            for unit_id, error in zip(
+                pending, self._run_stage(stage, pending)
+            ):
+                if error:
+                    results[unit_id] = MigrationResult(unit_id, stage, error)
+                else:
+                    done.append(unit_id)
+                    results[unit_id] = MigrationResult(unit_id, stage)
+            self._journal.record(done, stage)
+            unit_ids = [u for u in unit_ids if not results[u].error]
+        logger.debug(
+            f"Migrated {sum(r.ok for r in results.values())} of {len(results)} units"
+        )
+        return results
+
+    def _run_stage(self, stage: str, unit_ids: list[int]) -> list[int]:
+        calls = [self._get_call(stage, unit_id) for unit_id in unit_ids]
+        responses = execute_batch(self._session, calls, chunk_size=len(calls))
+        errors = []
+        for response in responses:
+            if isinstance(response, dict) and response.get("error", 0) > 0:
+                errors.append(int(response["error"]))
+            elif stage == "verify" and not self._is_migrated(response):
+                errors.append(VERIFY_FAILED)
+            else:
+                errors.append(0)
+        return errors
+
+    def _get_call(self, stage: str, unit_id: int) -> dict[str, typing.Any]:
+        if stage == "grant":
+            return {
+                "svc": "user/update_item_access",
+                "params": {
+                    "userId": self._creator_id,
+                    "itemId": unit_id,
+                    "accessMask": constants.ACCESSMASK_UNIT_MIGRATION,
+                },
+            }
+        elif stage == "creator":
+            return {
+                "svc": "item/update_creator",
+                "params": {"itemId": unit_id, "creatorId": self._creator_id},
+            }
+        elif stage == "account":
+            return {
+                "svc": "account/change_account",
+                "params": {"itemId": unit_id, "resourceId": self._account_id},
+            }
+        elif stage == "access":
+            return {
+                "svc": "user/update_item_access",
+                "params": {
+                    "userId": self._user_id,
+                    "itemId": unit_id,
+                    "accessMask": self._access_mask,
+                },
+            }
+        return {
+            "svc": "core/search_item",
+            "params": {
+                "id": unit_id,
+                "flags": int(
+                    DataFlag.UNIT_BASE | DataFlag.UNIT_BILLING_PROPERTIES
+                ),
+            },
+        }
+
+    def _is_migrated(self, response: typing.Any) -> bool:
+        item = (response or {}).get("item") or {}
+        return (
+            int(item.get("crt", 0)) == self._creator_id
+            and int(item.get("bact", 0)) == self._account_id
+        )
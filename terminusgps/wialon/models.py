@@ -0,0 +1,318 @@
+import typing
+
+__all__ = [
+    "AdminField",
+    "CustomField",
+    "Position",
+    "Resource",
+    "Sensor",
+    "Unit",
+    "UnitGroup",
+    "User",
+    "WialonItemModel",
+    "from_search_response",
+]
+
+
+class AdminField:
+    """A Wialon item admin field."""
+
+    __slots__ = ("id", "name", "value")
+
+    def __init__(self, id: int, name: str, value: str) -> None:
+        self.id = id
+        self.name = name
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id}, name={self.name!r}, value={self.value!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, type(self)):
+            return NotImplemented
+        return (self.id, self.name, self.value) == (
+            other.id,
+            other.name,
+            other.value,
+        )
+
+
+class CustomField(AdminField):
+    """A Wialon item custom field."""
+
+    __slots__ = ()
+
+
+class Sensor:
+    """A Wialon unit sensor."""
+
+    __slots__ = ("id", "name", "type", "description", "parameter", "measure")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        type: str,
+        description: str = "",
+        parameter: str = "",
+        measure: str = "",
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.type = type
+        self.description = description
+        self.parameter = parameter
+        self.measure = measure
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id}, name={self.name!r}, type={self.type!r})"
+
+
+class Position:
+    """A Wialon unit position."""
+
+    __slots__ = (
+        "time",
+        "lat",
+        "lon",
+        "altitude",
+        "speed",
+        "course",
+        "satellites",
+    )
+
+    def __init__(
+        self,
+        time: int,
+        lat: float,
+        lon: float,
+        altitude: float = 0.0,
+        speed: int = 0,
+        course: int = 0,
+        satellites: int = 0,
+    ) -> None:
+        self.time = time
+        self.lat = lat
+        self.lon = lon
+        self.altitude = altitude
+        self.speed = speed
+        self.course = course
+        self.satellites = satellites
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(time={self.time}, lat={self.lat}, lon={self.lon})"
+
+
+def _parse_fields(
+    field_cls: type[AdminField],
+) -> typing.Callable[[typing.Any], dict[str, AdminField]]:
+    def parse(raw: typing.Any) -> dict[str, AdminField]:
+        return {
+            str(field["n"]): field_cls(
+                id=int(field["id"]),
+                name=str(field["n"]),
+                value=str(field.get("v", "")),
+            )
+            for field in (raw or {}).values()
+            if field
+        }
+
+    return parse
+
+
+def _parse_sensors(raw: typing.Any) -> dict[int, Sensor]:
+    return {
+        int(sensor["id"]): Sensor(
+            id=int(sensor["id"]),
+            name=str(sensor.get("n", "")),
+            type=str(sensor.get("t", "")),
+            description=str(sensor.get("d", "")),
+            parameter=str(sensor.get("p", "")),
+            measure=str(sensor.get("m", "")),
+        )
+        for sensor in (raw or {}).values()
+        if sensor
+    }
+
+
+def _parse_position(raw: typing.Any) -> Position | None:
+    if not raw:
+        return None
+    return Position(
+        time=int(raw.get("t", 0)),
+        lat=float(raw["y"]),
+        lon=float(raw["x"]),
+        altitude=float(raw.get("z", 0)),
+        speed=int(raw.get("s", 0)),
+        course=int(raw.get("c", 0)),
+        satellites=int(raw.get("sc", 0)),
+    )
+
+
+def _parse_ids(raw: typing.Any) -> tuple[int, ...]:
+    return tuple(int(item_id) for item_id in raw or ())
+
+
+class _LazySection:
+    """
+    Parses a raw Wialon item section on first access.
+
+    Owners declare a ``_<name>`` slot, which holds the raw section until it is parsed and the parsed value afterwards.
+
+    """
+
+    def __init__(self, key: str, parser: typing.Callable) -> None:
+        self.key = key
+        self.parser = parser
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = f"_{name}"
+
+    def __get__(
+        self, instance: typing.Any, owner: type | None = None
+    ) -> typing.Any:
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if isinstance(value, _Raw):
+            value = self.parser(value.data)
+            setattr(instance, self.slot, value)
+        return value
+
+
+class _Raw:
+    __slots__ = ("data",)
+
+    def __init__(self, data: typing.Any) -> None:
+        self.data = data
+
+
+class WialonItemModel:
+    """
+    Base class for compact Wialon item models built from Wialon API responses.
+
+    Scalar properties are copied on construction. Nested sections are kept raw and parsed on first access.
+
+    """
+
+    __slots__ = ("id", "name", "_admin_fields", "_custom_fields")
+
+    items_type: typing.ClassVar[str] = ""
+    """Wialon items type of the model, e.g. ``"avl_unit"``."""
+    _sections: typing.ClassVar[tuple["_LazySection", ...]] = ()
+
+    admin_fields = _LazySection("aflds", _parse_fields(AdminField))
+    """Admin fields by name. Requires the admin fields data flag."""
+    custom_fields = _LazySection("flds", _parse_fields(CustomField))
+    """Custom fields by name. Requires the custom fields data flag."""
+
+    def __init__(self, item: dict[str, typing.Any]) -> None:
+        """
+        :param item: A Wialon item dictionary.
+        :type item: dict[str, ~typing.Any]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.id: int = int(item["id"])
+        self.name: str = str(item.get("nm", ""))
+        for section in self._sections:
+            setattr(self, section.slot, _Raw(item.get(section.key)))
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._sections = _collect_sections(cls)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id}, name={self.name!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WialonItemModel):
+            return NotImplemented
+        return (self.items_type, self.id) == (other.items_type, other.id)
+
+    def __hash__(self) -> int:
+        return hash((self.items_type, self.id))
+
+
+def _collect_sections(cls: type) -> tuple[_LazySection, ...]:
+    return tuple(
+        {
+            name: attr
+            for klass in reversed(cls.__mro__)
+            for name, attr in vars(klass).items()
+            if isinstance(attr, _LazySection)
+        }.values()
+    )
+
+
+WialonItemModel._sections = _collect_sections(WialonItemModel)
+
+
+class Unit(WialonItemModel):
+    """A Wialon unit (``avl_unit``)."""
+
+    __slots__ = ("imei", "hardware_id", "phone", "_sensors", "_position")
+    items_type = "avl_unit"
+
+    sensors = _LazySection("sens", _parse_sensors)
+    """Sensors by id. Requires the sensors data flag."""
+    position = _LazySection("pos", _parse_position)
+    """Last known position. Requires the position data flag."""
+
+    def __init__(self, item: dict[str, typing.Any]) -> None:
+        super().__init__(item)
+        self.imei: str | None = item.get("uid")
+        self.hardware_id: int | None = item.get("hw")
+        self.phone: str | None = item.get("ph")
+
+
+class UnitGroup(WialonItemModel):
+    """A Wialon unit group (``avl_unit_group``)."""
+
+    __slots__ = ("_unit_ids",)
+    items_type = "avl_unit_group"
+
+    unit_ids = _LazySection("u", _parse_ids)
+    """Ids of the units in the group."""
+
+
+class Resource(WialonItemModel):
+    """A Wialon resource (``avl_resource``)."""
+
+    __slots__ = ()
+    items_type = "avl_resource"
+
+
+class User(WialonItemModel):
+    """A Wialon user (``user``)."""
+
+    __slots__ = ()
+    items_type = "user"
+
+
+_MODELS: dict[str, type[WialonItemModel]] = {
+    model.items_type: model for model in (Unit, UnitGroup, Resource, User)
+}
+
+
+def from_search_response(
+    response: dict[str, typing.Any], items_type: str
+) -> list[WialonItemModel]:
+    """
+    Returns models for every item in a ``core/search_items`` response.
+
+    :param response: A ``core/search_items`` response.
+    :type response: dict[str, ~typing.Any]
+    :param items_type: The Wialon items type searched for, e.g. ``"avl_unit"``.
+    :type items_type: str
+    :raises ValueError: If ``items_type`` didn't have a model.
+    :returns: A list of Wialon item models.
+    :rtype: list[~terminusgps.wialon.models.WialonItemModel]
+
+    """
+    try:
+        model = _MODELS[items_type]
+    except KeyError:
+        raise ValueError(f"No model for items type '{items_type}'.")
+    return [model(item) for item in response.get("items", [])]
@@ -0,0 +1,247 @@
+import functools
+import typing
+
+from terminusgps.wialon.flags import DataFlag
+
+__all__ = ["Projection", "get_data_flags"]
+
+FIELD_FLAGS: dict[str, dict[str, DataFlag]] = {
+    "avl_unit": {
+        "id": DataFlag.UNIT_BASE,
+        "nm": DataFlag.UNIT_BASE,
+        "cls": DataFlag.UNIT_BASE,
+        "mu": DataFlag.UNIT_BASE,
+        "uacl": DataFlag.UNIT_BASE,
+        "prp": DataFlag.UNIT_CUSTOM_PROPERTIES,
+        "crt": DataFlag.UNIT_BILLING_PROPERTIES,
+        "bact": DataFlag.UNIT_BILLING_PROPERTIES,
+        "ct": DataFlag.UNIT_BILLING_PROPERTIES,
+        "ftp": DataFlag.UNIT_BILLING_PROPERTIES,
+        "flds": DataFlag.UNIT_CUSTOM_FIELDS,
+        "fldsmax": DataFlag.UNIT_CUSTOM_FIELDS,
+        "uri": DataFlag.UNIT_IMAGE,
+        "ugi": DataFlag.UNIT_IMAGE,
+        "gd": DataFlag.UNIT_GUID,
+        "aflds": DataFlag.UNIT_ADMIN_FIELDS,
+        "afldsmax": DataFlag.UNIT_ADMIN_FIELDS,
+        "uid": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "uid2": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "hw": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "ph": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "ph2": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "psw": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "act": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "dactt": DataFlag.UNIT_ADVANCED_PROPERTIES,
+        "cml": DataFlag.UNIT_CURRENT_MOMENT_COMMANDS,
+        "lmsg": DataFlag.UNIT_LAST_MESSAGE,
+        "sens": DataFlag.UNIT_SENSORS,
+        "sens_max": DataFlag.UNIT_SENSORS,
+        "cfl": DataFlag.UNIT_COUNTERS,
+        "cnm": DataFlag.UNIT_COUNTERS,
+        "cneh": DataFlag.UNIT_COUNTERS,
+        "cnkb": DataFlag.UNIT_COUNTERS,
+        "si": DataFlag.UNIT_MAINTENANCE,
+        "simax": DataFlag.UNIT_MAINTENANCE,
+        "cmds": DataFlag.UNIT_AVAILABLE_COMMANDS,
+        "prms": DataFlag.UNIT_MESSAGE_PARAMETERS,
+        "netconn": DataFlag.UNIT_CONNECTION_STATUS,
+        "pos": DataFlag.UNIT_POSITION,
+        "pflds": DataFlag.UNIT_PROFILE_FIELDS,
+        "pfldsmax": DataFlag.UNIT_PROFILE_FIELDS,
+    },
+    "avl_unit_group": {
+        "id": DataFlag.GROUP_BASE,
+        "nm": DataFlag.GROUP_BASE,
+        "cls": DataFlag.GROUP_BASE,
+        "mu": DataFlag.GROUP_BASE,
+        "uacl": DataFlag.GROUP_BASE,
+        "u": DataFlag.GROUP_BASE,
+        "prp": DataFlag.GROUP_CUSTOM_PROPERTIES,
+        "crt": DataFlag.GROUP_BILLING_PROPERTIES,
+        "bact": DataFlag.GROUP_BILLING_PROPERTIES,
+        "ct": DataFlag.GROUP_BILLING_PROPERTIES,
+        "ftp": DataFlag.GROUP_BILLING_PROPERTIES,
+        "flds": DataFlag.GROUP_CUSTOM_FIELDS,
+        "fldsmax": DataFlag.GROUP_CUSTOM_FIELDS,
+        "uri": DataFlag.GROUP_IMAGE,
+        "ugi": DataFlag.GROUP_IMAGE,
+        "gd": DataFlag.GROUP_GUID,
+        "aflds": DataFlag.GROUP_ADMIN_FIELDS,
+        "afldsmax": DataFlag.GROUP_ADMIN_FIELDS,
+    },
+    "avl_resource": {
+        "id": DataFlag.RESOURCE_BASE,
+        "nm": DataFlag.RESOURCE_BASE,
+        "cls": DataFlag.RESOURCE_BASE,
+        "mu": DataFlag.RESOURCE_BASE,
+        "uacl": DataFlag.RESOURCE_BASE,
+        "prp": DataFlag.RESOURCE_CUSTOM_PROPERTIES,
+        "crt": DataFlag.RESOURCE_BILLING_PROPERTIES,
+        "bact": DataFlag.RESOURCE_BILLING_PROPERTIES,
+        "ct": DataFlag.RESOURCE_BILLING_PROPERTIES,
+        "ftp": DataFlag.RESOURCE_BILLING_PROPERTIES,
+        "flds": DataFlag.RESOURCE_CUSTOM_FIELDS,
+        "fldsmax": DataFlag.RESOURCE_CUSTOM_FIELDS,
+        "gd": DataFlag.RESOURCE_GUID,
+        "aflds": DataFlag.RESOURCE_ADMIN_FIELDS,
+        "afldsmax": DataFlag.RESOURCE_ADMIN_FIELDS,
+        "drvrs": DataFlag.RESOURCE_DRIVERS,
+        "drvrsmax": DataFlag.RESOURCE_DRIVERS,
+        "ujb": DataFlag.RESOURCE_JOBS,
+        "ujbmax": DataFlag.RESOURCE_JOBS,
+        "unf": DataFlag.RESOURCE_NOTIFICATIONS,
+        "unfmax": DataFlag.RESOURCE_NOTIFICATIONS,
+        "poi": DataFlag.RESOURCE_POIS,
+        "poimax": DataFlag.RESOURCE_POIS,
+        "zl": DataFlag.RESOURCE_GEOFENCES,
+        "zlmax": DataFlag.RESOURCE_GEOFENCES,
+        "rep": DataFlag.RESOURCE_REPORT_TEMPLATES,
+        "repmax": DataFlag.RESOURCE_REPORT_TEMPLATES,
+        "drvrsg": DataFlag.RESOURCE_DRIVER_GROUPS,
+        "trlrs": DataFlag.RESOURCE_TRAILERS,
+        "trlrsmax": DataFlag.RESOURCE_TRAILERS,
+        "trlrsg": DataFlag.RESOURCE_TRAILER_GROUPS,
+        "ordrs": DataFlag.RESOURCE_ORDERS,
+        "ordrsmax": DataFlag.RESOURCE_ORDERS,
+        "zg": DataFlag.RESOURCE_GEOFENCE_GROUPS,
+        "tags": DataFlag.RESOURCE_TAGS,
+        "tagsmax": DataFlag.RESOURCE_TAGS,
+        "tagsg": DataFlag.RESOURCE_TAG_GROUPS,
+    },
+    "user": {
+        "id": DataFlag.USER_BASE,
+        "nm": DataFlag.USER_BASE,
+        "cls": DataFlag.USER_BASE,
+        "mu": DataFlag.USER_BASE,
+        "uacl": DataFlag.USER_BASE,
+        "prp": DataFlag.USER_CUSTOM_PROPERTIES,
+        "crt": DataFlag.USER_BILLING_PROPERTIES,
+        "bact": DataFlag.USER_BILLING_PROPERTIES,
+        "ct": DataFlag.USER_BILLING_PROPERTIES,
+        "ftp": DataFlag.USER_BILLING_PROPERTIES,
+        "flds": DataFlag.USER_CUSTOM_FIELDS,
+        "fldsmax": DataFlag.USER_CUSTOM_FIELDS,
+        "gd": DataFlag.USER_GUID,
+        "aflds": DataFlag.USER_ADMIN_FIELDS,
+        "afldsmax": DataFlag.USER_ADMIN_FIELDS,
+        "hm": DataFlag.USER_OTHER_PROPERTIES,
+        "ld": DataFlag.USER_OTHER_PROPERTIES,
+        "pfl": DataFlag.USER_OTHER_PROPERTIES,
+        "ap": DataFlag.USER_OTHER_PROPERTIES,
+        "mapps": DataFlag.USER_NOTIFICATIONS,
+    },
+}
+"""Wialon item response keys mapped to the data flag that returns them, by items type."""
+
+
+@functools.lru_cache(maxsize=256)
+def _get_data_flags(items_type: str, fields: frozenset[str]) -> int:
+    try:
+        field_flags = FIELD_FLAGS[items_type]
+    except KeyError:
+        raise ValueError(f"Unsupported items type '{items_type}'.")
+    unknown = fields - field_flags.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown fields for '{items_type}': {', '.join(sorted(unknown))}."
+        )
+    flags = field_flags["id"]
+    for field in fields:
+        flags |= field_flags[field]
+    return int(flags)
+
+
+def get_data_flags(items_type: str, fields: typing.Iterable[str]) -> int:
+    """
+    Returns the minimal Wialon API response flags returning every field.
+
+    Masks are cached per ``(items_type, fields)`` projection.
+
+    :param items_type: A Wialon items type, e.g. ``"avl_unit"``.
+    :type items_type: str
+    :param fields: Wialon item response keys, e.g. ``("pos", "aflds", "sens")``.
+    :type fields: ~collections.abc.Iterable[str]
+    :raises ValueError: If ``items_type`` wasn't supported.
+    :raises ValueError: If a field wasn't a known key for ``items_type``.
+    :returns: A data flag mask.
+    :rtype: int
+
+    """
+    return _get_data_flags(items_type, frozenset(fields))
+
+
+class Projection:
+    """
+    A set of Wialon item response keys requested for an items type.
+
+    Usage:
+
+    .. code::
+
+        projection = Projection("avl_unit", ("nm", "pos"))
+        response = session.wialon_api.core_search_item(
+            **{"id": 123, "flags": projection.flags}
+        )
+        unit = projection.apply(response["item"])
+
+    """
+
+    def __init__(self, items_type: str, fields: typing.Iterable[str]) -> None:
+        """
+        :param items_type: A Wialon items type, e.g. ``"avl_unit"``.
+        :type items_type: str
+        :param fields: Wialon item response keys to keep. ``"id"`` is always kept.
+        :type fields: ~collections.abc.Iterable[str]
+        :raises ValueError: If ``items_type`` or a field wasn't supported.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._items_type = items_type
+        self._fields = frozenset(fields) | {"id"}
+        self._flags = get_data_flags(items_type, self._fields)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._items_type!r}, {sorted(self._fields)!r})"
+
+    @property
+    def items_type(self) -> str:
+        """
+        Wialon items type of the projection.
+
+        :type: str
+
+        """
+        return self._items_type
+
+    @property
+    def fields(self) -> frozenset[str]:
+        """
+        Wialon item response keys kept by the projection.
+
+        :type: frozenset[str]
+
+        """
+        return self._fields
+
+    @property
+    def flags(self) -> int:
+        """
+        Minimal Wialon API response flags returning every field in the projection.
+
+        :type: int
+
+        """
+        return self._flags
+
+    def apply(self, item: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        """
+        Returns a copy of a Wialon item containing only the projected keys.
+
+        :param item: A Wialon item dictionary.
+        :type item: dict[str, ~typing.Any]
+        :returns: The trimmed Wialon item dictionary.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        return {key: item[key] for key in self._fields if key in item}
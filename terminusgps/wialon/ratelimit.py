@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+import typing
+
+from django.core.cache import caches
+
+__all__ = ["CacheRateLimiter", "TokenBucket"]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are added at ``rate`` per second up to ``burst``. Each request takes one token.
+
+    """
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        """
+        :param rate: Tokens added per second.
+        :type rate: float
+        :param burst: Maximum number of tokens. Default is ``rate`` rounded up.
+        :type burst: int | None
+        :raises ValueError: If ``rate`` wasn't positive.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, math.ceil(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(rate={self.rate}, burst={self.burst})"
+        )
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available.
+
+        :returns: ``0.0`` if a token was taken, otherwise seconds until the next token.
+        :rtype: float
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """
+        Takes a token, waiting for one if necessary.
+
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        while wait := self.try_acquire():
+            time.sleep(wait)
+
+
+class CacheRateLimiter:
+    """
+    Rate limiter shared between processes through a Django cache, e.g. by every worker of a web server.
+
+    Requests are counted per fixed window of ``window`` seconds with atomic :py:meth:`~django.core.cache.backends.base.BaseCache.incr` calls on one key per window. At most ``rate * window`` requests are let through per window, so up to twice that may pass around a window boundary. Windows follow the wall clock, so hosts sharing the cache need synchronized clocks.
+
+    The cache must be shared between processes, e.g. Redis or Memcached. A local memory cache limits each process on its own.
+
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        key: str,
+        *,
+        alias: str = "default",
+        window: float = 1.0,
+        key_prefix: str = "wialon-rate",
+    ) -> None:
+        """
+        :param rate: Requests let through per second, by every process together.
+        :type rate: float
+        :param key: Name of the shared budget, e.g. the Wialon account name.
+        :type key: str
+        :param alias: Django cache alias. Default is ``"default"``.
+        :type alias: str
+        :param window: Window length in seconds. Default is ``1.0``.
+        :type window: float
+        :param key_prefix: Prefix for cache keys. Default is ``"wialon-rate"``.
+        :type key_prefix: str
+        :raises ValueError: If ``rate`` or ``window`` wasn't positive.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}.")
+        if window <= 0:
+            raise ValueError(f"Window must be positive, got {window}.")
+        self.rate = rate
+        self.key = key
+        self.alias = alias
+        self.window = window
+        self.key_prefix = key_prefix
+        self.limit = max(1, math.floor(rate * window))
+        """Requests let through per window."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rate={self.rate}, key={self.key!r})"
+
+    @property
+    def cache(self) -> typing.Any:
+        return caches[self.alias]
+
+    def try_acquire(self) -> float:
+        """
+        Counts a request against the current window if it has room.
+
+        :returns: ``0.0`` if the request may be sent, otherwise seconds until the next window.
+        :rtype: float
+
+        """
+        now = time.time()
+        index = math.floor(now / self.window)
+        window_key = f"{self.key_prefix}:{self.key}:{index}"
+        timeout = math.ceil(self.window) + 1
+        while True:
+            self.cache.add(window_key, 0, timeout=timeout)
+            try:
+                count = self.cache.incr(window_key)
+                break
+            except ValueError:
+                # The key expired between add() and incr().
+                continue
+        if count <= self.limit:
+            return 0.0
+        return max((index + 1) * self.window - now, 0.001)
+
+    def acquire(self) -> None:
+        """
+        Counts a request, waiting for a window with room if necessary.
+
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        while wait := self.try_acquire():
+            time.sleep(wait)
@@ -0,0 +1,263 @@
+import contextlib
+import queue
+import threading
+import typing
+
+from terminusgps.wialon.session import WialonSession
+
+__all__ = ["ReportResult", "ReportRunner", "execute_report"]
+
+_DONE = object()
+
+
+class ReportResult:
+    """An executed Wialon report whose table rows are fetched lazily."""
+
+    def __init__(
+        self, session: WialonSession, response: dict[str, typing.Any]
+    ) -> None:
+        """
+        :param session: The Wialon API session the report was executed in.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param response: A ``report/exec_report`` response.
+        :type response: dict[str, ~typing.Any]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self._response = response
+
+    @property
+    def tables(self) -> list[dict[str, typing.Any]]:
+        """
+        Table descriptions of the report result, including their ``rows`` count.
+
+        :type: list[dict[str, ~typing.Any]]
+
+        """
+        return self._response.get("reportResult", {}).get("tables", [])
+
+    @property
+    def stats(self) -> list[list[str]]:
+        """
+        Statistics of the report result.
+
+        :type: list[list[str]]
+
+        """
+        return self._response.get("reportResult", {}).get("stats", [])
+
+    def iter_rows(
+        self, table_index: int = 0, chunk_size: int = 500
+    ) -> typing.Iterator[dict[str, typing.Any]]:
+        """
+        Yields rows of a report table, fetching ``chunk_size`` rows per Wialon API call.
+
+        :param table_index: Index of the table in :py:attr:`tables`. Default is ``0``.
+        :type table_index: int
+        :param chunk_size: Number of rows fetched per Wialon API call. Default is ``500``.
+        :type chunk_size: int
+        :raises ValueError: If ``chunk_size`` wasn't positive.
+        :raises IndexError: If ``table_index`` was out of range.
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :yields: Wialon report rows.
+        :rtype: ~collections.abc.Iterator[dict[str, ~typing.Any]]
+
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+        total = int(self.tables[table_index].get("rows", 0))
+        for start in range(0, total, chunk_size):
+            end = min(start + chunk_size, total) - 1
+            yield from self._session.wialon_api.report_get_result_rows(
+                **{
+                    "tableIndex": table_index,
+                    "indexFrom": start,
+                    "indexTo": end,
+                }
+            )
+
+
+@contextlib.contextmanager
+def execute_report(
+    session: WialonSession,
+    resource_id: int,
+    template_id: int,
+    object_id: int,
+    time_from: int,
+    time_to: int,
+    *,
+    object_sec_id: int = 0,
+    interval_flags: int = 0,
+) -> typing.Iterator[ReportResult]:
+    """
+    Executes a Wialon report and cleans up its result when the context exits, even on error.
+
+    Wialon holds a single report result per session, so a session must not execute another report while this context is open.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param resource_id: Id of the Wialon resource containing the report template.
+    :type resource_id: int
+    :param template_id: Id of the report template.
+    :type template_id: int
+    :param object_id: Id of the Wialon object to execute the report for.
+    :type object_id: int
+    :param time_from: Interval start as a UNIX timestamp.
+    :type time_from: int
+    :param time_to: Interval end as a UNIX timestamp.
+    :type time_to: int
+    :param object_sec_id: Secondary object id, e.g. a geofence id. Default is ``0``.
+    :type object_sec_id: int
+    :param interval_flags: Report interval flags. Default is ``0`` (absolute interval).
+    :type interval_flags: int
+    :raises WialonAPIError: If something went wrong calling the Wialon API.
+    :yields: The executed report result.
+    :rtype: ~collections.abc.Iterator[~terminusgps.wialon.reports.ReportResult]
+
+    """
+    response = session.wialon_api.report_exec_report(
+        **{
+            "reportResourceId": resource_id,
+            "reportTemplateId": template_id,
+            "reportObjectId": object_id,
+            "reportObjectSecId": object_sec_id,
+            "interval": {
+                "from": time_from,
+                "to": time_to,
+                "flags": interval_flags,
+            },
+        }
+    )
+    try:
+        yield ReportResult(session, response)
+    finally:
+        session.wialon_api.report_cleanup_result({})
+
+
+class ReportRunner:
+    """
+    Executes a Wialon report for many units in parallel, one report per session at a time.
+
+    Rows are streamed to the caller through a bounded buffer, so at most ``buffer_size`` rows are held in memory regardless of report size.
+
+    """
+
+    def __init__(
+        self, sessions: typing.Sequence[WialonSession], buffer_size: int = 1000
+    ) -> None:
+        """
+        :param sessions: Valid Wialon API sessions. Each session runs one report at a time.
+        :type sessions: ~collections.abc.Sequence[~terminusgps.wialon.session.WialonSession]
+        :param buffer_size: Maximum number of rows buffered ahead of the caller. Default is ``1000``.
+        :type buffer_size: int
+        :raises ValueError: If no sessions were provided.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        if not sessions:
+            raise ValueError("At least one session is required.")
+        self._sessions = list(sessions)
+        self._buffer_size = buffer_size
+
+    def iter_rows(
+        self,
+        unit_ids: typing.Iterable[int],
+        resource_id: int,
+        template_id: int,
+        time_from: int,
+        time_to: int,
+        *,
+        table_index: int = 0,
+        chunk_size: int = 500,
+        interval_flags: int = 0,
+    ) -> typing.Iterator[tuple[int, dict[str, typing.Any]]]:
+        """
+        Yields ``(unit_id, row)`` tuples of a report table for every unit.
+
+        Rows of a single unit are yielded in order. Rows of different units may interleave.
+
+        :param unit_ids: Wialon unit ids to execute the report for.
+        :type unit_ids: ~collections.abc.Iterable[int]
+        :param resource_id: Id of the Wialon resource containing the report template.
+        :type resource_id: int
+        :param template_id: Id of the report template.
+        :type template_id: int
+        :param time_from: Interval start as a UNIX timestamp.
+        :type time_from: int
+        :param time_to: Interval end as a UNIX timestamp.
+        :type time_to: int
+        :param table_index: Index of the report table to stream. Default is ``0``.
+        :type table_index: int
+        :param chunk_size: Number of rows fetched per Wialon API call. Default is ``500``.
+        :type chunk_size: int
+        :param interval_flags: Report interval flags. Default is ``0`` (absolute interval).
+        :type interval_flags: int
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :yields: Unit ids paired with their report rows.
+        :rtype: ~collections.abc.Iterator[tuple[int, dict[str, ~typing.Any]]]
+
+        """
+        units: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for unit_id in unit_ids:
+            units.put(unit_id)
+        rows: queue.Queue = queue.Queue(maxsize=self._buffer_size)
+        stop = threading.Event()
+
+        def put(item: typing.Any) -> bool:
+            while not stop.is_set():
+                try:
+                    rows.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(session: WialonSession) -> None:
+            try:
+                while not stop.is_set():
+                    try:
+                        unit_id = units.get_nowait()
+                    except queue.Empty:
+                        break
+                    with execute_report(
+                        session,
+                        resource_id,
+                        template_id,
+                        unit_id,
+                        time_from,
+                        time_to,
+                        interval_flags=interval_flags,
+                    ) as result:
+                        if table_index >= len(result.tables):
+                            continue
+                        for row in result.iter_rows(table_index, chunk_size):
+                            if not put((unit_id, row)):
+                                return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_DONE)
+
+        workers = [
+            threading.Thread(target=work, args=(session,), daemon=True)
+            for session in self._sessions
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            running = len(workers)
+            while running:
+                item = rows.get()
+                if item is _DONE:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
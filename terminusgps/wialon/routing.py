@@ -0,0 +1,175 @@
+import collections
+import threading
+import time
+import typing
+import urllib.parse
+
+__all__ = ["Endpoint", "EndpointRouter"]
+
+
+class Endpoint:
+    """A Wialon API host with rolling latency and error rate statistics."""
+
+    def __init__(self, url: str, window: int = 20) -> None:
+        """
+        :param url: Base url of the Wialon API host, e.g. ``"https://hst-api.wialon.com:443"``. A path is kept as a prefix of every request path, e.g. ``"https://example.com/wialon-local"`` for a Wialon Local install under a path prefix.
+        :type url: str
+        :param window: Number of recent requests used to compute :py:attr:`error_rate`. Default is ``20``.
+        :type window: int
+        :raises ValueError: If the url didn't have a scheme and host.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        parts = urllib.parse.urlsplit(url)
+        if not parts.scheme or not parts.hostname:
+            raise ValueError(f"Invalid Wialon API endpoint url '{url}'.")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path.rstrip("/")
+        self.url: str = f"{parts.scheme}://{parts.hostname}:{port}{path}"
+        self.latency: float | None = None
+        self.last_failure: float = 0.0
+        self._outcomes: collections.deque[bool] = collections.deque(
+            maxlen=window
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.url!r})"
+
+    @property
+    def error_rate(self) -> float:
+        """
+        Share of failed requests in the rolling window.
+
+        :type: float
+
+        """
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+
+class EndpointRouter:
+    """
+    Routes Wialon API requests to the fastest healthy endpoint.
+
+    An endpoint is unhealthy while its rolling error rate exceeds ``max_error_rate`` and its last failure was less than ``cooldown`` seconds ago. Healthy endpoints are ordered by their exponentially weighted latency, unhealthy endpoints are tried last.
+
+    """
+
+    def __init__(
+        self,
+        urls: typing.Iterable[str],
+        *,
+        alpha: float = 0.2,
+        window: int = 20,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+    ) -> None:
+        """
+        :param urls: Base urls of the Wialon API hosts, in order of preference.
+        :type urls: ~collections.abc.Iterable[str]
+        :param alpha: Weight of the newest latency sample. Default is ``0.2``.
+        :type alpha: float
+        :param window: Number of recent requests per endpoint used to compute its error rate. Default is ``20``.
+        :type window: int
+        :param max_error_rate: Error rate above which an endpoint is unhealthy. Default is ``0.5``.
+        :type max_error_rate: float
+        :param cooldown: Seconds after its last failure before an unhealthy endpoint is preferred again. Default is ``30.0``.
+        :type cooldown: float
+        :raises ValueError: If no urls were provided.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._endpoints = [Endpoint(url, window=window) for url in urls]
+        if not self._endpoints:
+            raise ValueError("At least one endpoint url is required.")
+        self._alpha = alpha
+        self._max_error_rate = max_error_rate
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({[e.url for e in self._endpoints]!r})"
+        )
+
+    @property
+    def endpoints(self) -> list[Endpoint]:
+        """
+        Every endpoint, in configured order.
+
+        :type: list[~terminusgps.wialon.routing.Endpoint]
+
+        """
+        return list(self._endpoints)
+
+    def is_healthy(self, endpoint: Endpoint) -> bool:
+        """
+        Returns whether an endpoint is healthy.
+
+        :param endpoint: An endpoint.
+        :type endpoint: ~terminusgps.wialon.routing.Endpoint
+        :returns: Whether the endpoint is healthy.
+        :rtype: bool
+
+        """
+        return (
+            endpoint.error_rate <= self._max_error_rate
+            or time.monotonic() - endpoint.last_failure >= self._cooldown
+        )
+
+    def candidates(self) -> list[Endpoint]:
+        """
+        Returns every endpoint in the order they should be tried.
+
+        :returns: Healthy endpoints by latency, then unhealthy endpoints by last failure.
+        :rtype: list[~terminusgps.wialon.routing.Endpoint]
+
+        """
+        with self._lock:
+            order = {e.url: i for i, e in enumerate(self._endpoints)}
+            healthy = [e for e in self._endpoints if self.is_healthy(e)]
+            unhealthy = [e for e in self._endpoints if e not in healthy]
+            healthy.sort(
+                key=lambda e: (
+                    e.latency if e.latency is not None else 0.0,
+                    order[e.url],
+                )
+            )
+            unhealthy.sort(key=lambda e: e.last_failure)
+            return healthy + unhealthy
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        """
+        Records a request that reached an endpoint.
+
+        :param endpoint: The endpoint.
+        :type endpoint: ~terminusgps.wialon.routing.Endpoint
+        :param latency: Request latency in seconds.
+        :type latency: float
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._lock:
+            endpoint._outcomes.append(True)
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self._alpha * (latency - endpoint.latency)
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """
+        Records a request that failed to reach an endpoint.
+
+        :param endpoint: The endpoint.
+        :type endpoint: ~terminusgps.wialon.routing.Endpoint
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        with self._lock:
+            endpoint._outcomes.append(False)
+            endpoint.last_failure = time.monotonic()
@@ -0,0 +1,221 @@
+import contextlib
+import contextvars
+import dataclasses
+import enum
+import itertools
+import threading
+import time
+import typing
+
+from terminusgps.wialon.ratelimit import CacheRateLimiter, TokenBucket
+
+__all__ = ["CallScheduler", "ClassMetrics", "Priority", "call_priority"]
+
+
+class Priority(enum.IntEnum):
+    """Priority classes of Wialon API calls."""
+
+    INTERACTIVE = 0
+    """User facing calls, e.g. made while rendering a view."""
+    NORMAL = 1
+    """Default priority."""
+    BULK = 2
+    """Background batch jobs, e.g. provisioning. Held back while interactive calls are waiting."""
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "wialon_call_priority", default=Priority.NORMAL
+)
+
+
+@contextlib.contextmanager
+def call_priority(priority: Priority) -> typing.Iterator[None]:
+    """
+    Sets the priority of Wialon API calls made in the block, in the current thread or asyncio task.
+
+    Tasks that :py:class:`~terminusgps.wialon.commands.CommandFanout`, :py:class:`~terminusgps.wialon.migration.UnitMigration` and :py:class:`~terminusgps.wialon.bulk.AccessUpdater` run in threads inherit it. Submit your own executor tasks with :py:meth:`contextvars.copy_context().run <contextvars.Context.run>`, since plain thread pool workers don't.
+
+    Usage:
+
+    .. code::
+
+        with call_priority(Priority.BULK):
+            migrate_units(session, unit_ids)
+
+    :param priority: A priority class.
+    :type priority: ~terminusgps.wialon.scheduler.Priority
+    :yields: Nothing.
+    :rtype: ~collections.abc.Iterator[None]
+
+    """
+    token = _priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclasses.dataclass(slots=True)
+class ClassMetrics:
+    """Queue metrics of a priority class."""
+
+    queued: int = 0
+    """Number of calls waiting now."""
+    granted: int = 0
+    """Number of calls that were let through."""
+    wait_total: float = 0.0
+    """Seconds granted calls waited in total."""
+    wait_max: float = 0.0
+    """Longest wait of a granted call in seconds."""
+
+    @property
+    def wait_mean(self) -> float:
+        """Mean wait of granted calls in seconds."""
+        return self.wait_total / self.granted if self.granted else 0.0
+
+
+class _Ticket:
+    __slots__ = ("priority", "tag", "sequence", "enqueued_at")
+
+    def __init__(self, priority: Priority, tag: float, sequence: int) -> None:
+        self.priority = priority
+        self.tag = tag
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+
+
+class CallScheduler:
+    """
+    Shares a rate budget between priority classes of Wialon API calls with weighted fair queuing.
+
+    Waiting calls are let through in order of their virtual finish time: each class advances by ``1 / weight`` per call, so under contention the classes get throughput proportional to their weights. Bulk calls are held back entirely while interactive calls are waiting.
+
+    Share one scheduler between every session of a Wialon account. A scheduler queues the calls of one process. The rate budget is per process as well, unless a ``limiter`` shared between processes is given, e.g. a :py:class:`~terminusgps.wialon.ratelimit.CacheRateLimiter` for every worker of a web server. Without one, divide the account's rate by the number of worker processes.
+
+    Usage:
+
+    .. code::
+
+        scheduler = CallScheduler(
+            rate=10, limiter=CacheRateLimiter(10, key="terminusgps")
+        )
+        session = WialonSession(scheduler=scheduler)
+
+        with call_priority(Priority.INTERACTIVE):
+            session.wialon_api.core_search_item(id=unit_id, flags=1)
+
+    """
+
+    default_weights: typing.ClassVar[dict[Priority, float]] = {
+        Priority.INTERACTIVE: 8.0,
+        Priority.NORMAL: 3.0,
+        Priority.BULK: 1.0,
+    }
+    """Default weight of each priority class."""
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        burst: int | None = None,
+        weights: dict[Priority, float] | None = None,
+        limiter: TokenBucket | CacheRateLimiter | None = None,
+    ) -> None:
+        """
+        :param rate: Calls let through per second, shared by every class.
+        :type rate: float
+        :param burst: Maximum number of calls let through at once. Default is ``rate`` rounded up.
+        :type burst: int | None
+        :param weights: Weight of each priority class. Default is :py:attr:`default_weights`.
+        :type weights: dict[~terminusgps.wialon.scheduler.Priority, float] | None
+        :param limiter: Rate limiter the calls are let through by, e.g. one shared between processes. Overrides ``rate`` and ``burst``. Default is :py:obj:`None` (a :py:class:`~terminusgps.wialon.ratelimit.TokenBucket` of this process).
+        :type limiter: ~terminusgps.wialon.ratelimit.TokenBucket | ~terminusgps.wialon.ratelimit.CacheRateLimiter | None
+        :raises ValueError: If ``rate`` or a weight wasn't positive.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.weights = {**self.default_weights, **(weights or {})}
+        if any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError(f"Weights must be positive, got {self.weights}.")
+        self._bucket = (
+            limiter if limiter is not None else TokenBucket(rate, burst)
+        )
+        self._cond = threading.Condition()
+        self._queues: dict[Priority, list[_Ticket]] = {p: [] for p in Priority}
+        self._finish: dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._metrics = {p: ClassMetrics() for p in Priority}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rate={self._bucket.rate}, weights={self.weights})"
+
+    def acquire(self, priority: Priority | None = None) -> float:
+        """
+        Waits until a call of a priority class may be sent.
+
+        :param priority: A priority class. Default is :py:obj:`None` (the :py:func:`call_priority` of the caller).
+        :type priority: ~terminusgps.wialon.scheduler.Priority | None
+        :returns: Seconds waited.
+        :rtype: float
+
+        """
+        priority = Priority(
+            priority if priority is not None else _priority.get()
+        )
+        with self._cond:
+            tag = (
+                max(self._virtual_time, self._finish[priority])
+                + 1 / self.weights[priority]
+            )
+            self._finish[priority] = tag
+            ticket = _Ticket(priority, tag, next(self._sequence))
+            self._queues[priority].append(ticket)
+            self._metrics[priority].queued += 1
+            self._cond.notify_all()
+            while True:
+                if self._next() is ticket:
+                    wait = self._bucket.try_acquire()
+                    if not wait:
+                        break
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            self._queues[priority].remove(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.tag)
+            waited = time.monotonic() - ticket.enqueued_at
+            metrics = self._metrics[priority]
+            metrics.queued -= 1
+            metrics.granted += 1
+            metrics.wait_total += waited
+            metrics.wait_max = max(metrics.wait_max, waited)
+            self._cond.notify_all()
+        return waited
+
+    def metrics(self) -> dict[str, ClassMetrics]:
+        """
+        Returns a snapshot of the queue metrics of every priority class.
+
+        :returns: Metrics by lowercase class name, e.g. ``"interactive"``.
+        :rtype: dict[str, ~terminusgps.wialon.scheduler.ClassMetrics]
+
+        """
+        with self._cond:
+            return {
+                p.name.lower(): dataclasses.replace(m)
+                for p, m in self._metrics.items()
+            }
+
+    def _next(self) -> _Ticket | None:
+        """Returns the waiting ticket with the smallest finish tag. Bulk tickets only qualify while no interactive ticket is waiting."""
+        heads = [
+            queue[0]
+            for priority, queue in self._queues.items()
+            if queue
+            and not (
+                priority == Priority.BULK
+                and self._queues[Priority.INTERACTIVE]
+            )
+        ]
+        return min(heads, key=lambda t: (t.tag, t.sequence), default=None)
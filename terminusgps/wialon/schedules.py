@@ -0,0 +1,203 @@
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+__all__ = ["Schedule"]
+
+_CYCLE_DAYS = 146097
+"""Days in a Gregorian 400-year cycle. The calendar and the week both repeat after it."""
+_MINUTES_PER_DAY = 1440
+
+
+class Schedule:
+    """
+    A Wialon schedule compiled to lookup tables.
+
+    A schedule matches an instant if its day of the month, month and day of the week are in the masks and its time of day is in a window. A mask of ``0`` matches every day.
+
+    Matching days are precomputed for a 400-year Gregorian cycle and matching minutes for one day, so evaluating a timestamp is two table lookups.
+
+    Usage:
+
+    .. code::
+
+        from terminusgps.wialon.constants import WialonWeekDayMask
+
+        schedule = Schedule(
+            weekday_mask=WialonWeekDayMask.MONDAY | WialonWeekDayMask.FRIDAY,
+            windows=[(9 * 60, 17 * 60)],
+        )
+        schedule.matches(message_times)  # array of bools
+        schedule.next_match(time.time())  # unix timestamp
+
+    """
+
+    def __init__(
+        self,
+        *,
+        day_mask: int = 0,
+        month_mask: int = 0,
+        weekday_mask: int = 0,
+        windows: typing.Iterable[tuple[int, int]] = ((0, _MINUTES_PER_DAY),),
+        utc_offset: int = 0,
+    ) -> None:
+        """
+        :param day_mask: A :py:class:`~terminusgps.wialon.constants.WialonMonthDayMask` combination. Default is ``0`` (every day of the month).
+        :type day_mask: int
+        :param month_mask: A :py:class:`~terminusgps.wialon.constants.WialonMonthMask` combination. Default is ``0`` (every month).
+        :type month_mask: int
+        :param weekday_mask: A :py:class:`~terminusgps.wialon.constants.WialonWeekDayMask` combination. Default is ``0`` (every day of the week).
+        :type weekday_mask: int
+        :param windows: Time of day windows as ``(start, end)`` minutes from midnight, end exclusive. A window ending before it starts wraps past midnight. Default is the whole day.
+        :type windows: ~collections.abc.Iterable[tuple[int, int]]
+        :param utc_offset: Seconds added to UTC timestamps to get local time. Default is ``0``.
+        :type utc_offset: int
+        :raises ValueError: If a window was outside of ``0`` to ``1440`` minutes.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.day_mask = int(day_mask)
+        self.month_mask = int(month_mask)
+        self.weekday_mask = int(weekday_mask)
+        self.windows = tuple((int(s), int(e)) for s, e in windows)
+        self.utc_offset = int(utc_offset)
+
+        self._minute_ok = self._compile_minutes(self.windows)
+        self._day_ok = self._compile_days()
+        self._next_minute = self._next_index(self._minute_ok, cyclic=False)
+        self._next_day = self._next_index(self._day_ok, cyclic=True)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(day_mask={self.day_mask}, month_mask={self.month_mask}, weekday_mask={self.weekday_mask}, windows={self.windows!r})"
+
+    @classmethod
+    def from_wialon(
+        cls, schedule: dict[str, typing.Any], utc_offset: int = 0
+    ) -> "Schedule":
+        """
+        Returns a schedule from a Wialon schedule dictionary, e.g. a notification's ``"sch"``.
+
+        :param schedule: A Wialon schedule dictionary with ``"f1"``, ``"f2"``, ``"t1"``, ``"t2"``, ``"m"``, ``"y"`` and ``"w"`` keys.
+        :type schedule: dict[str, ~typing.Any]
+        :param utc_offset: Seconds added to UTC timestamps to get local time. Default is ``0``.
+        :type utc_offset: int
+        :returns: A schedule.
+        :rtype: ~terminusgps.wialon.schedules.Schedule
+
+        """
+        windows = [
+            (int(schedule.get(start, 0)), int(schedule.get(end, 0)))
+            for start, end in (("f1", "f2"), ("t1", "t2"))
+            if schedule.get(start, 0) or schedule.get(end, 0)
+        ]
+        return cls(
+            day_mask=schedule.get("m", 0),
+            month_mask=schedule.get("y", 0),
+            weekday_mask=schedule.get("w", 0),
+            windows=windows or ((0, _MINUTES_PER_DAY),),
+            utc_offset=utc_offset,
+        )
+
+    def matches(self, timestamps: npt.ArrayLike) -> npt.NDArray[np.bool_]:
+        """
+        Returns whether each timestamp is in the schedule.
+
+        :param timestamps: UTC unix timestamps or :py:class:`numpy.datetime64` values.
+        :type timestamps: ~numpy.typing.ArrayLike
+        :returns: An array of bools, shaped like ``timestamps``.
+        :rtype: ~numpy.typing.NDArray[~numpy.bool_]
+
+        """
+        local = self._to_local(timestamps)
+        days, seconds = np.divmod(local, 86400)
+        return (
+            self._day_ok[days % _CYCLE_DAYS] & self._minute_ok[seconds // 60]
+        )
+
+    def next_match(self, timestamp: float) -> float | None:
+        """
+        Returns the first instant at or after a timestamp that is in the schedule.
+
+        :param timestamp: A UTC unix timestamp.
+        :type timestamp: float
+        :returns: A UTC unix timestamp, or :py:obj:`None` if the schedule never matches.
+        :rtype: float | None
+
+        """
+        first_minute = int(self._next_minute[0])
+        if first_minute < 0 or self._next_day[0] < 0:
+            return None
+        local = int(np.floor(timestamp)) + self.utc_offset
+        day, seconds = divmod(local, 86400)
+        cycle_day = day % _CYCLE_DAYS
+        if self._day_ok[cycle_day]:
+            minute = seconds // 60
+            next_minute = int(self._next_minute[minute])
+            if next_minute == minute:
+                return timestamp
+            elif next_minute >= 0:
+                return day * 86400 + next_minute * 60 - self.utc_offset
+        day += 1 + int(self._next_day[(cycle_day + 1) % _CYCLE_DAYS])
+        return day * 86400 + first_minute * 60 - self.utc_offset
+
+    def _to_local(self, timestamps: npt.ArrayLike) -> npt.NDArray[np.int64]:
+        values = np.asarray(timestamps)
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype("datetime64[s]").astype(np.int64)
+        else:
+            values = np.floor(values).astype(np.int64)
+        return values + self.utc_offset
+
+    @staticmethod
+    def _compile_minutes(
+        windows: tuple[tuple[int, int], ...],
+    ) -> npt.NDArray[np.bool_]:
+        minute_ok = np.zeros(_MINUTES_PER_DAY, dtype=bool)
+        for start, end in windows:
+            if not (
+                0 <= start <= _MINUTES_PER_DAY and 0 <= end <= _MINUTES_PER_DAY
+            ):
+                raise ValueError(
+                    f"Schedule window must be within 0 and {_MINUTES_PER_DAY} minutes, got ({start}, {end})."
+                )
+            if start <= end:
+                minute_ok[start:end] = True
+            else:
+                minute_ok[start:] = True
+                minute_ok[:end] = True
+        return minute_ok
+
+    def _compile_days(self) -> npt.NDArray[np.bool_]:
+        days = np.arange(_CYCLE_DAYS).astype("datetime64[D]")
+        months = days.astype("datetime64[M]")
+        month = months.astype(np.int64) % 12
+        month_day = (days - months).astype(np.int64)
+        weekday = (np.arange(_CYCLE_DAYS) + 3) % 7
+        day_ok = np.ones(_CYCLE_DAYS, dtype=bool)
+        for mask, bit in (
+            (self.day_mask, month_day),
+            (self.month_mask, month),
+            (self.weekday_mask, weekday),
+        ):
+            if mask:
+                day_ok &= (mask >> bit) & 1 == 1
+        return day_ok
+
+    @staticmethod
+    def _next_index(
+        ok: npt.NDArray[np.bool_], cyclic: bool
+    ) -> npt.NDArray[np.int64]:
+        """Returns the first matching index at or after each index, as an offset if ``cyclic``, otherwise as an index. ``-1`` where nothing matches."""
+        indices = np.arange(ok.size)
+        matching = np.flatnonzero(ok)
+        if not matching.size:
+            return np.full(ok.size, -1, dtype=np.int64)
+        position = np.searchsorted(matching, indices)
+        if cyclic:
+            wrapped = position == matching.size
+            found = matching[np.where(wrapped, 0, position)]
+            return np.where(wrapped, found + ok.size, found) - indices
+        found = matching[np.minimum(position, matching.size - 1)]
+        return np.where(position < matching.size, found, -1)
@@ -1,13 +1,50 @@
+import asyncio
+import copy
+import hashlib
+import json
 import logging
 import os
+import threading
+import time
 import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+import weakref
+import zlib
 
 import wialon.api
 
+from terminusgps.wialon import compression, streaming
+from terminusgps.wialon.batching import UNBATCHED_SERVICES, CallBatcher
+from terminusgps.wialon.codecs import (
+    JSONCodec,
+    get_default_codec,
+    loads_lenient,
+)
+from terminusgps.wialon.routing import Endpoint, EndpointRouter
+from terminusgps.wialon.scheduler import CallScheduler
+from terminusgps.wialon.sid_store import SidStore
+
 logger = logging.getLogger(__name__)
 
+INVALID_SESSION = 1
 UNKNOWN_ERROR = 6
 
+COALESCED_ACTIONS = frozenset(
+    {
+        "account_get_account_data",
+        "core_check_items_billing",
+        "core_check_unique",
+        "core_get_hw_types",
+        "core_search_item",
+        "core_search_items",
+        "resource_get_zone_data",
+        "user_get_items_access",
+    }
+)
+"""Read-only Wialon API actions whose identical in-flight calls share one response."""
+
 
 class WialonAPIError(Exception):
     """Raised when a Wialon API call fails."""
@@ -29,13 +66,531 @@ class WialonAPIError(Exception):
         return self._code
 
 
+_END = object()
+
+
+class _EndpointError(wialon.api.WialonError):
+    """Raised when a Wialon API endpoint couldn't be reached."""
+
+
+class WialonMetrics:
+    """Thread-safe counters collected by a :py:class:`Wialon` client."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: int = 0
+        """Number of HTTP requests sent."""
+        self.wire_bytes: int = 0
+        """Response body bytes received, before decompression."""
+        self.decoded_bytes: int = 0
+        """Response body bytes after decompression."""
+        self.coalesced: int = 0
+        """Number of calls that shared the response of an identical in-flight call."""
+        self.batched: int = 0
+        """Number of calls sent through the auto batcher."""
+        self.headers_seconds: float = 0.0
+        """Total seconds spent waiting for response headers, i.e. endpoint latency."""
+        self.transfer_seconds: float = 0.0
+        """Total seconds spent reading and decompressing response bodies."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.as_dict()})"
+
+    def record(self, **counters: float) -> None:
+        """Increments counters by name."""
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict[str, float]:
+        """Returns every counter by name."""
+        with self._lock:
+            return {
+                name: value
+                for name, value in vars(self).items()
+                if not name.startswith("_")
+            }
+
+    @property
+    def compression_ratio(self) -> float:
+        """Decoded bytes per wire byte. ``1.0`` if nothing was received."""
+        if not self.wire_bytes:
+            return 1.0
+        return self.decoded_bytes / self.wire_bytes
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: typing.Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class _AsyncFlight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
 class Wialon(wialon.api.Wialon):
+    chunk_size: int = 64 * 1024
+    """Number of response bytes read and decompressed at a time."""
+    coalesce_actions: frozenset[str] = COALESCED_ACTIONS
+    """Actions coalesced while :py:attr:`coalesce` is enabled."""
+
+    def __init__(
+        self,
+        scheme: str = "https",
+        host: str = "hst-api.wialon.com",
+        port: int = 443,
+        sid: str | None = None,
+        codec: JSONCodec | None = None,
+        endpoints: typing.Sequence[str] | EndpointRouter | None = None,
+        sid_affinity: bool = True,
+        coalesce: bool = True,
+        **extra_params,
+    ) -> None:
+        super().__init__(
+            scheme=scheme, host=host, port=port, sid=sid, **extra_params
+        )
+        if not isinstance(endpoints, EndpointRouter):
+            endpoints = EndpointRouter(
+                endpoints or [f"{scheme}://{host}:{port}"]
+            )
+        self.router = endpoints
+        self.sid_affinity = sid_affinity
+        self._sid_endpoint: Endpoint | None = None
+        self.codec = codec if codec is not None else get_default_codec()
+        self.metrics = WialonMetrics()
+        self.request_headers = {"Accept-Encoding": compression.ACCEPT_ENCODING}
+        self._local = threading.local()
+        self.on_invalid_session: typing.Callable[[str], None] | None = None
+        """Called with the rejected session id when the Wialon API reports an invalid session. Should set a new :py:attr:`sid`, the call is retried once afterwards."""
+        self.coalesce = coalesce
+        """Whether identical in-flight calls of :py:attr:`coalesce_actions` share one request. Callers of a shared request each get their own copy of the response."""
+        self._flights: dict[tuple[str, str, str | None], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._async_flights: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[typing.Any, _AsyncFlight]
+        ] = weakref.WeakKeyDictionary()
+        self.batcher: CallBatcher | None = None
+        """Batcher that collects calls into ``core/batch`` requests while a session id is set. Default is :py:obj:`None` (send every call on its own)."""
+        self.scheduler: CallScheduler | None = None
+        """Scheduler every request waits for before it's sent, by the caller's :py:func:`~terminusgps.wialon.scheduler.call_priority`. Default is :py:obj:`None` (send at once)."""
+
     def call(self, action_name, *argc, **kwargs) -> dict[str, typing.Any]:
+        """
+        Calls a Wialon API action.
+
+        While :py:attr:`coalesce` is enabled, a read-only call identical to one already in flight (same action, parameters and session id) waits for that call and returns a copy of its response instead of sending another request.
+
+        """
+        key = self._flight_key(action_name, argc, kwargs)
+        if key is None:
+            return self._call(action_name, argc, kwargs)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+        if not leader:
+            self.metrics.record(coalesced=1)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
         try:
-            return super().call(action_name, *argc, **kwargs)
+            flight.result = self._call(action_name, argc, kwargs)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+        # No waiters can join once the flight is removed.
+        if flight.waiters:
+            return copy.deepcopy(flight.result)
+        return flight.result
+
+    async def acall(
+        self, action_name, *argc, **kwargs
+    ) -> dict[str, typing.Any]:
+        """
+        Calls a Wialon API action from asyncio code, in a worker thread.
+
+        While :py:attr:`coalesce` is enabled, identical read-only calls awaited at the same time share one worker thread, and each gets its own copy of the response. Cancelling one caller doesn't cancel the shared call.
+
+        :param action_name: A Wialon API action, e.g. ``"core_search_items"``.
+        :type action_name: str
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: The Wialon API response.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        key = self._flight_key(action_name, argc, kwargs)
+        if key is None:
+            return await asyncio.to_thread(
+                self.call, action_name, *argc, **kwargs
+            )
+        loop = asyncio.get_running_loop()
+        with self._flights_lock:
+            flights = self._async_flights.setdefault(loop, {})
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = _AsyncFlight(
+                loop.create_task(
+                    asyncio.to_thread(self.call, action_name, *argc, **kwargs)
+                )
+            )
+            flight.task.add_done_callback(lambda _: flights.pop(key, None))
+        else:
+            flight.waiters += 1
+            self.metrics.record(coalesced=1)
+        result = await asyncio.shield(flight.task)
+        # The flight is removed before any caller resumes, so waiters is final.
+        return copy.deepcopy(result) if flight.waiters else result
+
+    def _call(
+        self, action_name: str, argc: tuple, kwargs: dict
+    ) -> dict[str, typing.Any]:
+        return self._call_with_refresh(
+            lambda: self._dispatch(action_name, argc, kwargs)
+        )
+
+    def _dispatch(
+        self, action_name: str, argc: tuple, kwargs: dict
+    ) -> dict[str, typing.Any]:
+        if self.batcher is not None and self.sid:
+            if action_name.startswith("unit_group"):
+                svc = "unit_group/" + action_name[11:]
+            else:
+                svc = action_name.replace("_", "/", 1)
+            if svc not in UNBATCHED_SERVICES:
+                if kwargs:
+                    params = kwargs
+                elif len(argc) == 1:
+                    params = argc[0]
+                else:
+                    params = list(argc)
+                self.metrics.record(batched=1)
+                return self.batcher.call(svc, params)
+        return super(Wialon, self).call(action_name, *argc, **kwargs)
+
+    def _flight_key(
+        self, action_name: str, argc: tuple, kwargs: dict
+    ) -> tuple[str, str, str | None] | None:
+        action_name = action_name.replace("/", "_", 1)
+        if not self.coalesce or action_name not in self.coalesce_actions:
+            return None
+        params = json.dumps([argc, kwargs], sort_keys=True, default=str)
+        return action_name, params, self.sid
+
+    def iter_items(
+        self,
+        params: dict[str, typing.Any],
+        action_name: str = "core_search_items",
+        key: str = "items",
+    ) -> typing.Iterator[dict[str, typing.Any]]:
+        """
+        Calls a Wialon API action and yields the items of its response one at a time, as they are downloaded and decoded.
+
+        Unlike ``core_search_items``, the response is never held in memory as a whole, so memory stays bounded however many items the account has. Responses are always decoded with :py:mod:`json`, regardless of :py:attr:`codec`.
+
+        :param params: Call parameters, e.g. a ``core/search_items`` spec, flags and range.
+        :type params: dict[str, ~typing.Any]
+        :param action_name: A Wialon API action. Default is ``"core_search_items"``.
+        :type action_name: str
+        :param key: Key of the items array in the response. Default is ``"items"``.
+        :type key: str
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: An iterator of items.
+        :rtype: ~collections.abc.Iterator[dict[str, ~typing.Any]]
+
+        """
+
+        def open_stream() -> typing.Iterator[dict[str, typing.Any]]:
+            self._local.stream_key = key
+            try:
+                return super(Wialon, self).call(action_name, params)
+            finally:
+                self._local.stream_key = None
+
+        return self._call_with_refresh(open_stream)
+
+    def avl_evts(self) -> dict[str, typing.Any]:
+        return self._call_with_refresh(lambda: super(Wialon, self).avl_evts())
+
+    def batch(
+        self,
+        calls: typing.Sequence[dict[str, typing.Any]],
+        stop_on_error: bool = False,
+    ) -> list[typing.Any]:
+        """
+        Executes several Wialon API calls in one ``core/batch`` request.
+
+        Unlike ``core_batch``, failed calls don't raise. Their results are ``{"error": <code>}`` dictionaries.
+
+        :param calls: Wialon API calls, e.g. ``[{"svc": "core/search_item", "params": {"id": 1, "flags": 1}}]``.
+        :type calls: ~collections.abc.Sequence[dict[str, ~typing.Any]]
+        :param stop_on_error: Whether to skip the remaining calls after a failed call. Default is :py:obj:`False`.
+        :type stop_on_error: bool
+        :raises WialonAPIError: If the batch request itself failed.
+        :returns: One result per executed call, in order.
+        :rtype: list[~typing.Any]
+
+        """
+        self._local.raw_batch = True
+        try:
+            return self.core_batch(
+                **{"params": list(calls), "flags": int(stop_on_error)}
+            )
+        finally:
+            self._local.raw_batch = False
+
+    def _call_with_refresh(
+        self, func: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+        sid = self.sid
+        try:
+            return func()
+        except wialon.api.WialonError as e:
+            if not (
+                sid
+                and self.on_invalid_session is not None
+                and e._code == INVALID_SESSION
+            ):
+                raise WialonAPIError(e)
+        self.on_invalid_session(sid)
+        try:
+            return func()
         except wialon.api.WialonError as e:
             raise WialonAPIError(e)
 
+    def request(self, action_name, url, params) -> typing.Any:
+        """
+        Sends a Wialon API request and decodes the response body with :py:attr:`codec`.
+
+        The request is sent to the best endpoint of :py:attr:`router` and fails over to the next endpoint on connection errors. While :py:attr:`sid_affinity` is enabled, requests carrying a session id are only sent to the endpoint that issued it. If that endpoint is unreachable, it's forgotten and the request fails as an invalid session, so :py:attr:`on_invalid_session` can log in again on another endpoint before the call is retried.
+
+        Endpoint latency is the time to response headers. Compressed responses are decompressed while they are read. Body sizes before and after decompression, and the time spent reading bodies, are recorded in :py:attr:`metrics`.
+
+        With a :py:attr:`scheduler`, the request waits for its priority class's turn first.
+
+        """
+        if self.scheduler is not None:
+            self.scheduler.acquire()
+        data = urllib.parse.urlencode(params).encode("utf-8")
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(("", "", parts.path, parts.query, ""))
+        pinned = bool(
+            self.sid_affinity and self.sid and self._sid_endpoint is not None
+        )
+        if pinned:
+            candidates = [self._sid_endpoint]
+        else:
+            candidates = self.router.candidates()
+        stream_key = getattr(self._local, "stream_key", None)
+
+        for endpoint in candidates:
+            start = time.perf_counter()
+            try:
+                response = self._open(endpoint.url + path, data)
+                latency = time.perf_counter() - start
+                if stream_key is None:
+                    headers, content, wire_bytes = self._receive(response)
+            except _EndpointError as e:
+                self.router.record_failure(endpoint)
+                logger.warning(
+                    f"Wialon API endpoint {endpoint.url} failed: {e}"
+                )
+                error = e
+                continue
+            self.router.record_success(endpoint, latency)
+            break
+        else:
+            if pinned:
+                self._sid_endpoint = None
+                raise wialon.api.WialonError(
+                    INVALID_SESSION,
+                    f"Endpoint that issued the session is unreachable: {error}",
+                )
+            raise error
+        self.metrics.record(headers_seconds=latency)
+        if stream_key is not None:
+            return self._stream(action_name, response, stream_key)
+        self.metrics.record(
+            requests=1,
+            wire_bytes=wire_bytes,
+            decoded_bytes=len(content),
+            transfer_seconds=time.perf_counter() - start - latency,
+        )
+
+        content_type = headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type != "application/json":
+            return bytes(content)
+        try:
+            result = loads_lenient(self.codec, content)
+        except ValueError as e:
+            raise wialon.api.WialonError(
+                0, f"Invalid response from Wialon: {e}"
+            )
+        result = self.check_result(
+            action_name,
+            result,
+            items=not getattr(self._local, "raw_batch", False),
+        )
+        if isinstance(result, dict) and "eid" in result:
+            self._sid_endpoint = endpoint
+        return result
+
+    def _open(self, url: str, data: bytes) -> typing.Any:
+        request = urllib.request.Request(
+            url, data, headers=self.request_headers
+        )
+        try:
+            return urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            if e.code >= 500:
+                raise _EndpointError(0, f"HTTP {e.code}")
+            raise wialon.api.WialonError(0, f"HTTP {e.code}")
+        except OSError as e:
+            raise _EndpointError(0, str(e))
+
+    def _receive(
+        self, response: typing.Any
+    ) -> tuple[typing.Any, bytearray | bytes, int]:
+        try:
+            with response:
+                headers = response.headers
+                content, wire_bytes = self._read(response, headers)
+        except OSError as e:
+            raise _EndpointError(0, str(e))
+        except (ValueError, zlib.error) as e:
+            raise wialon.api.WialonError(0, str(e))
+        return headers, content, wire_bytes
+
+    def _stream(
+        self, action_name: str, response: typing.Any, key: str
+    ) -> typing.Iterator[typing.Any]:
+        """Decodes the first item or error of a streamed response before returning, so errors raise from the call."""
+        items = self._iter_response(action_name, response, key)
+        first = next(items, _END)
+
+        def resume() -> typing.Iterator[typing.Any]:
+            if first is _END:
+                return
+            yield first
+            try:
+                yield from items
+            except wialon.api.WialonError as e:
+                raise WialonAPIError(e)
+
+        return resume()
+
+    def _iter_response(
+        self, action_name: str, response: typing.Any, key: str
+    ) -> typing.Iterator[typing.Any]:
+        headers = response.headers
+        content_type = headers.get("Content-Type", "").split(";")[0].strip()
+        decompressor = compression.get_decompressor(
+            headers.get("Content-Encoding")
+        )
+        counters = {
+            "wire_bytes": 0,
+            "decoded_bytes": 0,
+            "transfer_seconds": 0.0,
+        }
+
+        def chunks() -> typing.Iterator[bytes]:
+            # Only reads are timed, not the caller consuming items in between.
+            while True:
+                start = time.perf_counter()
+                chunk = response.read(self.chunk_size)
+                content = (
+                    decompressor.decompress(chunk)
+                    if chunk
+                    else decompressor.flush()
+                )
+                counters["transfer_seconds"] += time.perf_counter() - start
+                counters["wire_bytes"] += len(chunk)
+                counters["decoded_bytes"] += len(content)
+                yield content
+                if not chunk:
+                    return
+
+        fields: dict[str, typing.Any] = {}
+        try:
+            with response:
+                if content_type != "application/json":
+                    raise ValueError(f"unexpected content type {content_type}")
+                yield from streaming.iter_json_array(chunks(), key, fields)
+        except OSError as e:
+            raise wialon.api.WialonError(0, str(e))
+        except (ValueError, zlib.error) as e:
+            raise wialon.api.WialonError(
+                0, f"Invalid response from Wialon: {e}"
+            )
+        finally:
+            self.metrics.record(requests=1, **counters)
+        self.check_result(action_name, fields)
+
+    def _read(
+        self, response: typing.Any, headers: typing.Any
+    ) -> tuple[bytearray | bytes, int]:
+        """Reads a response body. Uncompressed bodies of known length are read into one preallocated buffer, compressed bodies are joined once from their decompressed chunks."""
+        content_encoding = headers.get("Content-Encoding")
+        content_length = headers.get("Content-Length")
+        if (
+            content_encoding in (None, "", "identity")
+            and content_length is not None
+            and hasattr(response, "readinto")
+        ):
+            content = bytearray(int(content_length))
+            received = 0
+            with memoryview(content) as view:
+                while received < len(content):
+                    count = response.readinto(view[received:])
+                    if not count:
+                        raise ConnectionError(
+                            f"Response body ended after {received} of {len(content)} bytes"
+                        )
+                    received += count
+            return content, received
+        decompressor = compression.get_decompressor(content_encoding)
+        parts, wire_bytes = [], 0
+        while chunk := response.read(self.chunk_size):
+            wire_bytes += len(chunk)
+            parts.append(decompressor.decompress(chunk))
+        parts.append(decompressor.flush())
+        return b"".join(parts), wire_bytes
+
+    @staticmethod
+    def check_result(
+        action_name: str, result: typing.Any, items: bool = True
+    ) -> typing.Any:
+        """Raises :py:exc:`wialon.api.WialonError` if a decoded Wialon API response is an error. Batch item errors are only checked if ``items`` is :py:obj:`True`."""
+        if isinstance(result, dict) and result.get("error", 0) > 0:
+            raise wialon.api.WialonError(result["error"], action_name)
+        if items and isinstance(result, list):
+            errors = [
+                f"{wialon.api.WialonError.errors.get(elem['error'], 'Unknown error')} ({elem['error']})"
+                for elem in result
+                if isinstance(elem, dict) and elem.get("error", 0) > 0
+            ]
+            if errors:
+                raise wialon.api.WialonError(
+                    0, " ".join([*errors, action_name])
+                )
+        return result
+
 
 class WialonSession:
     def __init__(
@@ -48,6 +603,14 @@ class WialonSession:
         auth_hash: str | None = None,
         username: str | None = None,
         check_service: str | None = None,
+        codec: JSONCodec | None = None,
+        endpoints: typing.Sequence[str] | EndpointRouter | None = None,
+        sid_affinity: bool = True,
+        sid_store: SidStore | None = None,
+        auto_batch: bool = False,
+        batch_delay: float = 0.005,
+        batch_size: int = 50,
+        scheduler: CallScheduler | None = None,
     ) -> None:
         """
         Starts or continues a Wialon API session.
@@ -68,16 +631,53 @@ class WialonSession:
         :type username: str | None
         :param check_service: A Wialon service name to check before calling the Wialon API. Default is :py:obj:`None`.
         :type check_service: str | None
+        :param codec: JSON codec used to decode Wialon API responses. Default is :py:obj:`None` (fastest installed codec).
+        :type codec: ~terminusgps.wialon.codecs.JSONCodec | None
+        :param endpoints: Wialon API base urls, e.g. ``["https://hst-api.wialon.com", "https://local.example.com"]``, or a router shared between sessions. Overrides ``scheme``, ``host`` and ``port``. Default is :py:obj:`None`.
+        :type endpoints: ~collections.abc.Sequence[str] | ~terminusgps.wialon.routing.EndpointRouter | None
+        :param sid_affinity: Whether to send requests carrying a session id only to the endpoint that issued it. If that endpoint becomes unreachable, the session logs in again on another endpoint. Default is :py:obj:`True`.
+        :type sid_affinity: bool
+        :param sid_store: Store to resume and persist the session id in, shared between processes. Default is :py:obj:`None` (log in on every start).
+        :type sid_store: ~terminusgps.wialon.sid_store.SidStore | None
+        :param auto_batch: Whether to collect calls made from many threads into ``core/batch`` requests. Default is :py:obj:`False`.
+        :type auto_batch: bool
+        :param batch_delay: Seconds a call waits for more calls to batch with. Default is ``0.005``.
+        :type batch_delay: float
+        :param batch_size: Maximum number of calls per batch. Default is ``50``.
+        :type batch_size: int
+        :param scheduler: Scheduler sharing a rate budget between priority classes of calls, shared by every session of the account. Default is :py:obj:`None` (no rate limit).
+        :type scheduler: ~terminusgps.wialon.scheduler.CallScheduler | None
         :returns: Nothing.
         :rtype: None
 
         """
         self._uid = None
-        self._wialon_api = Wialon(scheme=scheme, host=host, port=port, sid=sid)
+        self._gis_sid = None
+        self._wialon_api = Wialon(
+            scheme=scheme,
+            host=host,
+            port=port,
+            sid=sid,
+            codec=codec,
+            endpoints=endpoints,
+            sid_affinity=sid_affinity,
+        )
         self._token = token if token else os.getenv("WIALON_TOKEN")
         self._username = username
         self._auth_hash = auth_hash
         self._check_service = check_service
+        self._sid_store = sid_store
+        if sid_store is not None:
+            self._sid_store_key = self._get_sid_store_key()
+        if sid_store is not None or self._token or (auth_hash and username):
+            self._wialon_api.on_invalid_session = self._refresh_sid
+        self._wialon_api.scheduler = scheduler
+        if auto_batch:
+            self._wialon_api.batcher = CallBatcher(
+                self._wialon_api.batch,
+                max_delay=batch_delay,
+                max_size=batch_size,
+            )
 
     def __str__(self) -> str:
         return f"Session #{self.id}"
@@ -86,25 +686,102 @@ class WialonSession:
         return f"{self.__class__}(sid={self.id})"
 
     def __enter__(self) -> "WialonSession":
-        """Logs into the Wialon API session if it wasn't already active before returning it."""
+        """
+        Logs into the Wialon API session if it wasn't already active before returning it.
+
+        With a sid store, a stored session id is resumed without a login call. It is validated by the first Wialon API call, which logs in again if the Wialon API rejects it.
+
+        """
         if self.id is None:
-            if self._token:
-                self.token_login(token=self._token, username=self._username)
-            elif self._auth_hash and self._username:
-                self.auth_hash_login(
-                    auth_hash=self._auth_hash,
-                    username=self._username,
-                    check_service=self._check_service,
-                )
+            if self._sid_store is not None:
+                self._resume()
             else:
-                raise WialonAPIError("Failed to login to the Wialon API")
+                self._login()
         return self
 
     def __exit__(self, *args, **kwargs) -> None:
-        """Logs out of the Wialon API session if :py:attr:`id` was set."""
-        if self.id is not None:
+        """Logs out of the Wialon API session if :py:attr:`id` was set. Session ids shared through a sid store are kept active."""
+        if self.id is not None and self._sid_store is None:
             self.logout()
 
+    def _login(self) -> None:
+        if self._token:
+            self.token_login(token=self._token, username=self._username)
+        elif self._auth_hash and self._username:
+            self.auth_hash_login(
+                auth_hash=self._auth_hash,
+                username=self._username,
+                check_service=self._check_service,
+            )
+        else:
+            raise WialonAPIError("Failed to login to the Wialon API")
+
+    def _get_sid_store_key(self) -> str:
+        credentials = "|".join(
+            [
+                *(
+                    endpoint.url
+                    for endpoint in self.wialon_api.router.endpoints
+                ),
+                self._token or self._auth_hash or "",
+                self._username or "",
+            ]
+        )
+        return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+    def _resume(self) -> None:
+        key = self._sid_store_key
+        data = self._sid_store.get(key)
+        if data is None:
+            with self._sid_store.lock(key):
+                data = self._sid_store.get(key)
+                if data is None:
+                    self._login()
+                    self._sid_store.set(key, self._dump_session())
+                    return
+        self._load_session(data)
+
+    def _refresh_sid(self, stale_sid: str) -> None:
+        if self._sid_store is None:
+            logger.info(f"Wialon API session #{stale_sid} expired, logging in")
+            self.wialon_api.sid = None
+            self._login()
+            return
+        key = self._sid_store_key
+        with self._sid_store.lock(key):
+            data = self._sid_store.get(key)
+            if data is not None and data.get("sid") != stale_sid:
+                self._load_session(data)
+                return
+            logger.info(f"Wialon API session #{stale_sid} expired, logging in")
+            self.wialon_api.sid = None
+            self._login()
+            self._sid_store.set(key, self._dump_session())
+
+    def _dump_session(self) -> dict[str, typing.Any]:
+        endpoint = self.wialon_api._sid_endpoint
+        return {
+            "sid": self.id,
+            "username": self._username,
+            "uid": self._uid,
+            "gis_sid": self._gis_sid,
+            "endpoint": endpoint.url if endpoint is not None else None,
+        }
+
+    def _load_session(self, data: dict[str, typing.Any]) -> None:
+        self.wialon_api.sid = data["sid"]
+        self._username = data.get("username")
+        self._uid = data.get("uid")
+        self._gis_sid = data.get("gis_sid")
+        self.wialon_api._sid_endpoint = next(
+            (
+                endpoint
+                for endpoint in self.wialon_api.router.endpoints
+                if endpoint.url == data.get("endpoint")
+            ),
+            None,
+        )
+
     def token_login(self, token: str, username: str | None = None) -> None:
         """
         Logs in to a Wialon API session using a token.
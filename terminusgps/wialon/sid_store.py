@@ -0,0 +1,316 @@
+import abc
+import contextlib
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+import time
+import typing
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+__all__ = ["DjangoCacheSidStore", "FileSidStore", "SQLiteSidStore", "SidStore"]
+
+
+class SidStore(abc.ABC):
+    """
+    Persists Wialon API session data between processes.
+
+    Session data is a dictionary with the keys ``"sid"``, ``"username"``, ``"uid"``, ``"gis_sid"`` and ``"endpoint"``. Subclasses implement :py:meth:`get`, :py:meth:`set`, :py:meth:`delete` and the non-blocking lock primitives ``_acquire`` and ``_release``.
+
+    """
+
+    lock_timeout: float = 30.0
+    """Seconds to wait for a lock before giving up."""
+    lock_ttl: float = 60.0
+    """Seconds before a lock held by a crashed process expires."""
+    poll_interval: float = 0.05
+    """Seconds between lock attempts."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> dict[str, typing.Any] | None:
+        """
+        Returns stored session data.
+
+        :param key: A session key.
+        :type key: str
+        :returns: Session data, or :py:obj:`None` if nothing was stored.
+        :rtype: dict[str, ~typing.Any] | None
+
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, data: dict[str, typing.Any]) -> None:
+        """
+        Stores session data.
+
+        :param key: A session key.
+        :type key: str
+        :param data: Session data.
+        :type data: dict[str, ~typing.Any]
+        :returns: Nothing.
+        :rtype: None
+
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Deletes stored session data.
+
+        :param key: A session key.
+        :type key: str
+        :returns: Nothing.
+        :rtype: None
+
+        """
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> typing.Iterator[None]:
+        """
+        Holds an exclusive lock on a session key, across processes.
+
+        :param key: A session key.
+        :type key: str
+        :raises TimeoutError: If the lock wasn't acquired within :py:attr:`lock_timeout` seconds.
+        :yields: Nothing.
+        :rtype: ~collections.abc.Iterator[None]
+
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while (token := self._acquire(key)) is None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Failed to lock session key '{key}'.")
+            time.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            self._release(key, token)
+
+    @abc.abstractmethod
+    def _acquire(self, key: str) -> str | None:
+        """Takes a lock without waiting. Returns a token unique to this acquisition, or :py:obj:`None` if the lock is held."""
+
+    @abc.abstractmethod
+    def _release(self, key: str, token: str) -> None:
+        """Releases a lock if it's still held with ``token``, i.e. it didn't expire and get taken by another owner."""
+
+
+class FileSidStore(SidStore):
+    """Stores session data as one JSON file per key in a directory. Locks use :py:func:`fcntl.flock`, or :py:func:`msvcrt.locking` on Windows."""
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        """
+        :param directory: Directory to store session files in. Created if it doesn't exist.
+        :type directory: str | ~os.PathLike
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._locked_files: dict[str, typing.IO] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self.directory)!r})"
+
+    def get(self, key: str) -> dict[str, typing.Any] | None:
+        try:
+            content = self._path(key, ".json").read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(content)
+        except ValueError:
+            return None
+
+    def set(self, key: str, data: dict[str, typing.Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._path(key, ".json"))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def delete(self, key: str) -> None:
+        self._path(key, ".json").unlink(missing_ok=True)
+
+    def _acquire(self, key: str) -> str | None:
+        f = open(self._path(key, ".lock"), "a+")
+        try:
+            _lock_file(f)
+        except OSError:
+            f.close()
+            return None
+        token = uuid.uuid4().hex
+        self._locked_files[token] = f
+        return token
+
+    def _release(self, key: str, token: str) -> None:
+        f = self._locked_files.pop(token)
+        try:
+            _unlock_file(f)
+        finally:
+            f.close()
+
+    def _path(self, key: str, suffix: str) -> pathlib.Path:
+        return self.directory / f"{key}{suffix}"
+
+
+def _lock_file(f: typing.IO) -> None:
+    """Locks a file without blocking. Raises :py:exc:`OSError` if it's locked by another process."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock_file(f: typing.IO) -> None:
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SQLiteSidStore(SidStore):
+    """Stores session data in a SQLite database. Locks are lease rows that expire after :py:attr:`~SidStore.lock_ttl` seconds, owned by a random token per acquisition."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """
+        :param path: Path to the SQLite database. Created if it doesn't exist.
+        :type path: str | ~os.PathLike
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.path = os.fspath(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wialon_sids (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wialon_sid_locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def get(self, key: str) -> dict[str, typing.Any] | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM wialon_sids WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, data: dict[str, typing.Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO wialon_sids (key, data) VALUES (?, ?)",
+                (key, json.dumps(data)),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM wialon_sids WHERE key = ?", (key,))
+
+    def _acquire(self, key: str) -> str | None:
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM wialon_sid_locks WHERE key = ? AND expires < ?",
+                (key, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO wialon_sid_locks (key, owner, expires) VALUES (?, ?, ?)",
+                (key, token, now + self.lock_ttl),
+            )
+            return token if cursor.rowcount == 1 else None
+
+    def _release(self, key: str, token: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM wialon_sid_locks WHERE key = ? AND owner = ?",
+                (key, token),
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.lock_timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+class DjangoCacheSidStore(SidStore):
+    """
+    Stores session data in a Django cache. Locks use :py:meth:`~django.core.cache.backends.base.BaseCache.add`, which is atomic on shared cache backends.
+
+    A lock stores a random token and is only deleted by its holder while the token still matches, so a holder that outlived :py:attr:`~SidStore.lock_ttl` doesn't release a lock another process has acquired since. Django caches have no atomic compare-and-delete, so this narrows that race to the time between reading and deleting the token.
+
+    """
+
+    def __init__(
+        self,
+        alias: str = "default",
+        timeout: float | None | object = DEFAULT_TIMEOUT,
+        key_prefix: str = "wialon-sid",
+    ) -> None:
+        """
+        :param alias: Django cache alias. Default is ``"default"``.
+        :type alias: str
+        :param timeout: Seconds to keep session data for. Default is the cache's default timeout.
+        :type timeout: float | None
+        :param key_prefix: Prefix for cache keys. Default is ``"wialon-sid"``.
+        :type key_prefix: str
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.alias!r})"
+
+    @property
+    def cache(self) -> typing.Any:
+        return caches[self.alias]
+
+    def get(self, key: str) -> dict[str, typing.Any] | None:
+        return self.cache.get(f"{self.key_prefix}:{key}")
+
+    def set(self, key: str, data: dict[str, typing.Any]) -> None:
+        self.cache.set(f"{self.key_prefix}:{key}", data, timeout=self.timeout)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(f"{self.key_prefix}:{key}")
+
+    def _acquire(self, key: str) -> str | None:
+        token = uuid.uuid4().hex
+        if not self.cache.add(
+            f"{self.key_prefix}-lock:{key}", token, timeout=self.lock_ttl
+        ):
+            return None
+        return token
+
+    def _release(self, key: str, token: str) -> None:
+        lock_key = f"{self.key_prefix}-lock:{key}"
+        if self.cache.get(lock_key) == token:
+            self.cache.delete(lock_key)
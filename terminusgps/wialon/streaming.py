@@ -0,0 +1,177 @@
+import codecs
+import json
+import re
+import typing
+
+__all__ = ["iter_json_array"]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Decodes JSON values from a stream of byte chunks, keeping only the undecoded remainder in memory."""
+
+    def __init__(self, chunks: typing.Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        # Invalid UTF-8 is dropped, like python-wialon does.
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._eof = False
+        self.buffer = ""
+        self.pos = 0
+
+    def read(self) -> str | None:
+        """Returns the text of the next non-empty chunk, or :py:obj:`None` at the end of the stream."""
+        while not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._utf8.decode(b"", final=True)
+            else:
+                text = self._utf8.decode(chunk)
+            if text:
+                return text
+        return None
+
+    def fill(self) -> bool:
+        """Appends the next chunk to the buffer. Returns :py:obj:`False` at the end of the stream."""
+        text = self.read()
+        if text is None:
+            return False
+        self.buffer = self.buffer[self.pos :] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, ``""`` at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} at stream position {self.pos}, got {char!r}."
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> typing.Any:
+        """Decodes the next JSON value."""
+        if self.peek() in ("{", "[", '"'):
+            # Strings, arrays and objects end at a known character, so they are decoded once they're complete.
+            self.complete()
+            value, self.pos = _decoder.raw_decode(self.buffer, self.pos)
+            return value
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A value ending with the buffer may be a truncated number.
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def complete(self) -> None:
+        """
+        Reads chunks until the buffer holds the whole string, array or object starting at :py:attr:`pos`.
+
+        Each character is scanned once, tracking string and bracket depth, and the buffer is joined once at the end. Retrying the decoder after every chunk would parse a value spanning many chunks from its start each time.
+
+        """
+        pieces = [self.buffer[self.pos :]]
+        text, i = pieces[0], 0
+        depth, in_string = 0, False
+        while True:
+            if i >= len(text):
+                next_text = self.read()
+                if next_text is None:
+                    # Truncated, left to the decoder to report.
+                    break
+                # An escape at the end of a chunk skips into the next one.
+                i -= len(text)
+                text = next_text
+                pieces.append(text)
+                continue
+            if in_string:
+                match = _STRING_END.search(text, i)
+                if match is None:
+                    i = len(text)
+                elif match.group() == "\\":
+                    i = match.end() + 1
+                else:
+                    in_string, i = False, match.end()
+                    if depth == 0:
+                        break
+            else:
+                match = _STRUCTURE.search(text, i)
+                if match is None:
+                    i = len(text)
+                    continue
+                char, i = match.group(), match.end()
+                if char == '"':
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        break
+        if len(pieces) > 1:
+            self.buffer = "".join(pieces)
+            self.pos = 0
+
+
+def iter_json_array(
+    chunks: typing.Iterable[bytes],
+    key: str = "items",
+    fields: dict[str, typing.Any] | None = None,
+) -> typing.Iterator[typing.Any]:
+    """
+    Yields the elements of an array in a JSON object as they are decoded from a stream of bytes.
+
+    Only the current element and the undecoded part of the current chunk are kept in memory, however large the array is.
+
+    :param chunks: UTF-8 encoded JSON object, in chunks of any size.
+    :type chunks: ~collections.abc.Iterable[bytes]
+    :param key: Key of the array in the object. Default is ``"items"``.
+    :type key: str
+    :param fields: Dictionary the object's other members are added to as they are decoded. Default is :py:obj:`None` (discard them).
+    :type fields: dict[str, ~typing.Any] | None
+    :raises ValueError: If the stream wasn't a JSON object or its ``key`` member wasn't an array.
+    :yields: Decoded array elements.
+    :rtype: ~collections.abc.Iterator[~typing.Any]
+
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            value = reader.value()
+            if fields is not None:
+                fields[name] = value
+        if reader.expect(",}") == "}":
+            return
@@ -0,0 +1,433 @@
+import concurrent.futures
+import dataclasses
+import datetime
+import logging
+import typing
+
+import numpy as np
+
+from terminusgps.wialon.geofences import EARTH_RADIUS_METERS
+from terminusgps.wialon.session import WialonSession
+
+__all__ = [
+    "Stop",
+    "Track",
+    "TrackSummary",
+    "Trip",
+    "TripAnalyzer",
+    "haversine",
+    "load_track",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def haversine(
+    lats1: typing.Any, lons1: typing.Any, lats2: typing.Any, lons2: typing.Any
+) -> np.ndarray:
+    """
+    Returns great-circle distances between coordinates, element-wise.
+
+    :param lats1: Start latitudes in degrees.
+    :type lats1: ~numpy.typing.ArrayLike
+    :param lons1: Start longitudes in degrees.
+    :type lons1: ~numpy.typing.ArrayLike
+    :param lats2: End latitudes in degrees.
+    :type lats2: ~numpy.typing.ArrayLike
+    :param lons2: End longitudes in degrees.
+    :type lons2: ~numpy.typing.ArrayLike
+    :returns: Distances in meters.
+    :rtype: ~numpy.ndarray
+
+    """
+    phi1, phi2 = np.radians(lats1), np.radians(lats2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.subtract(lons2, lons1))
+    a = (
+        np.sin(dphi / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Track:
+    """Position messages of a unit as arrays, oldest first."""
+
+    unit_id: int
+    """Wialon unit id."""
+    times: np.ndarray
+    """Message unix timestamps."""
+    lats: np.ndarray
+    """Latitudes in degrees."""
+    lons: np.ndarray
+    """Longitudes in degrees."""
+    speeds: np.ndarray
+    """Speeds in km/h."""
+    ignition: np.ndarray
+    """Ignition state of each message. All :py:obj:`True` if the unit has no ignition parameter."""
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_messages(
+        cls,
+        unit_id: int,
+        messages: typing.Iterable[dict[str, typing.Any]],
+        ignition_param: str | None = None,
+    ) -> "Track":
+        """
+        Returns a track from Wialon messages. Messages without a position are skipped.
+
+        :param unit_id: Wialon unit id.
+        :type unit_id: int
+        :param messages: Wialon messages with ``"t"``, ``"pos"`` and ``"p"`` keys.
+        :type messages: ~collections.abc.Iterable[dict[str, ~typing.Any]]
+        :param ignition_param: Message parameter holding the ignition state, e.g. ``"io_1"``. Default is :py:obj:`None` (ignition always on).
+        :type ignition_param: str | None
+        :returns: A track.
+        :rtype: ~terminusgps.wialon.trips.Track
+
+        """
+        rows = [
+            (
+                m["t"],
+                m["pos"]["y"],
+                m["pos"]["x"],
+                m["pos"].get("s", 0),
+                bool(m.get("p", {}).get(ignition_param, 0))
+                if ignition_param
+                else True,
+            )
+            for m in messages
+            if m.get("pos")
+        ]
+        columns = list(zip(*rows)) or [(), (), (), (), ()]
+        return cls(
+            unit_id=int(unit_id),
+            times=np.array(columns[0], dtype=np.int64),
+            lats=np.array(columns[1], dtype=np.float64),
+            lons=np.array(columns[2], dtype=np.float64),
+            speeds=np.array(columns[3], dtype=np.float64),
+            ignition=np.array(columns[4], dtype=bool),
+        )
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Trip:
+    """A period of movement between two stops."""
+
+    start_time: int
+    """Unix timestamp of departure."""
+    end_time: int
+    """Unix timestamp of arrival."""
+    distance: float
+    """Distance driven in meters."""
+    max_speed: float
+    """Maximum speed in km/h."""
+    start_index: int
+    """Index of the departure message in the track."""
+    end_index: int
+    """Index of the arrival message in the track."""
+
+    @property
+    def duration(self) -> int:
+        """Seconds from departure to arrival."""
+        return self.end_time - self.start_time
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Stop:
+    """A period without movement lasting at least the minimum stop duration."""
+
+    start_time: int
+    """Unix timestamp the unit stopped."""
+    end_time: int
+    """Unix timestamp the unit moved again, or of its last message."""
+    lat: float
+    """Latitude of the stop in degrees."""
+    lon: float
+    """Longitude of the stop in degrees."""
+    start_index: int
+    """Index of the first stationary message in the track."""
+    end_index: int
+    """Index of the last stationary message in the track."""
+
+    @property
+    def duration(self) -> int:
+        """Seconds the unit was stopped."""
+        return self.end_time - self.start_time
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TrackSummary:
+    """Trips, stops and mileage of a track."""
+
+    unit_id: int
+    """Wialon unit id."""
+    trips: list[Trip]
+    """Trips, oldest first."""
+    stops: list[Stop]
+    """Stops, oldest first."""
+    mileage: dict[datetime.date, float]
+    """Meters driven by local date."""
+
+    @property
+    def distance(self) -> float:
+        """Total meters driven."""
+        return float(sum(self.mileage.values()))
+
+
+class TripAnalyzer:
+    """
+    Splits tracks into trips and stops and totals daily mileage, vectorised with numpy.
+
+    A message is moving if its speed is at least ``min_speed`` and its ignition is on. A run of non-moving messages lasting at least ``min_stop_duration`` is a stop, shorter runs (e.g. traffic lights) stay part of the trip. Distance is only counted between messages where at least one is moving, so GPS drift while parked adds no mileage.
+
+    Usage:
+
+    .. code::
+
+        analyzer = TripAnalyzer(min_speed=5, min_stop_duration=300)
+        summaries = analyzer.analyze_units(session, unit_ids, time_from, time_to)
+        for unit_id, summary in summaries.items():
+            print(unit_id, len(summary.trips), summary.mileage)
+
+    """
+
+    def __init__(
+        self,
+        *,
+        min_speed: float = 5.0,
+        min_stop_duration: int = 300,
+        min_trip_distance: float = 0.0,
+        utc_offset: int = 0,
+    ) -> None:
+        """
+        :param min_speed: Minimum speed of a moving message in km/h. Default is ``5.0``.
+        :type min_speed: float
+        :param min_stop_duration: Minimum duration of a stop in seconds. Default is ``300``.
+        :type min_stop_duration: int
+        :param min_trip_distance: Trips driving this many meters or less are dropped. Default is ``0.0``.
+        :type min_trip_distance: float
+        :param utc_offset: Seconds added to UTC timestamps to get local time, used for daily mileage. Default is ``0``.
+        :type utc_offset: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self.min_speed = min_speed
+        self.min_stop_duration = min_stop_duration
+        self.min_trip_distance = min_trip_distance
+        self.utc_offset = utc_offset
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(min_speed={self.min_speed}, min_stop_duration={self.min_stop_duration}, min_trip_distance={self.min_trip_distance})"
+
+    def analyze(self, track: Track) -> TrackSummary:
+        """
+        Returns the trips, stops and daily mileage of a track.
+
+        :param track: A track.
+        :type track: ~terminusgps.wialon.trips.Track
+        :returns: A track summary.
+        :rtype: ~terminusgps.wialon.trips.TrackSummary
+
+        """
+        n = len(track)
+        if n < 2:
+            return TrackSummary(track.unit_id, [], [], {})
+        times, speeds = track.times, track.speeds
+        moving = (speeds >= self.min_speed) & track.ignition
+        distances = haversine(
+            track.lats[:-1], track.lons[:-1], track.lats[1:], track.lons[1:]
+        )
+        distances[~(moving[:-1] | moving[1:])] = 0.0
+        cumulative = np.concatenate(([0.0], np.cumsum(distances)))
+
+        edges = np.flatnonzero(
+            np.diff(np.concatenate(([0], ~moving, [0])).astype(np.int8))
+        )
+        run_starts, run_ends = edges[::2], edges[1::2] - 1
+        run_end_times = times[np.minimum(run_ends + 1, n - 1)]
+        is_stop = run_end_times - times[run_starts] >= self.min_stop_duration
+        stop_starts, stop_ends = run_starts[is_stop], run_ends[is_stop]
+        stops = [
+            Stop(
+                start_time=int(times[s]),
+                end_time=int(times[min(e + 1, n - 1)]),
+                lat=float(track.lats[s]),
+                lon=float(track.lons[s]),
+                start_index=int(s),
+                end_index=int(e),
+            )
+            for s, e in zip(stop_starts, stop_ends)
+        ]
+
+        trip_starts = np.concatenate(([0], stop_ends))
+        trip_ends = np.concatenate((stop_starts, [n - 1]))
+        trip_distances = cumulative[trip_ends] - cumulative[trip_starts]
+        keep = (trip_ends > trip_starts) & (
+            trip_distances > self.min_trip_distance
+        )
+        trip_starts, trip_ends = trip_starts[keep], trip_ends[keep]
+        max_speeds = np.maximum.reduceat(
+            np.append(speeds, 0.0),
+            np.column_stack((trip_starts, trip_ends + 1)).ravel(),
+        )[::2]
+        trips = [
+            Trip(
+                start_time=int(times[s]),
+                end_time=int(times[e]),
+                distance=float(d),
+                max_speed=float(v),
+                start_index=int(s),
+                end_index=int(e),
+            )
+            for s, e, d, v in zip(
+                trip_starts, trip_ends, trip_distances[keep], max_speeds
+            )
+        ]
+        return TrackSummary(
+            track.unit_id, trips, stops, self._daily_mileage(times, distances)
+        )
+
+    def analyze_many(
+        self, tracks: typing.Iterable[Track], *, max_workers: int | None = None
+    ) -> list[TrackSummary]:
+        """
+        Analyzes tracks in parallel with a process pool.
+
+        :param tracks: Tracks.
+        :type tracks: ~collections.abc.Iterable[~terminusgps.wialon.trips.Track]
+        :param max_workers: Maximum number of worker processes. Default is :py:obj:`None` (one per CPU).
+        :type max_workers: int | None
+        :returns: One summary per track, in order.
+        :rtype: list[~terminusgps.wialon.trips.TrackSummary]
+
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers
+        ) as executor:
+            return list(executor.map(self.analyze, tracks))
+
+    def analyze_units(
+        self,
+        session: WialonSession,
+        unit_ids: typing.Iterable[int],
+        time_from: int,
+        time_to: int,
+        *,
+        ignition_param: str | None = None,
+        max_workers: int | None = None,
+    ) -> dict[int, TrackSummary]:
+        """
+        Loads the tracks of units and analyzes them in parallel with a process pool.
+
+        Tracks are loaded one at a time, since a session holds one loaded message interval, and analyzed while the next one loads.
+
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param unit_ids: Wialon unit ids.
+        :type unit_ids: ~collections.abc.Iterable[int]
+        :param time_from: Interval start as a unix timestamp.
+        :type time_from: int
+        :param time_to: Interval end as a unix timestamp.
+        :type time_to: int
+        :param ignition_param: Message parameter holding the ignition state. Default is :py:obj:`None` (ignition always on).
+        :type ignition_param: str | None
+        :param max_workers: Maximum number of worker processes. Default is :py:obj:`None` (one per CPU).
+        :type max_workers: int | None
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: Track summaries by unit id.
+        :rtype: dict[int, ~terminusgps.wialon.trips.TrackSummary]
+
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers
+        ) as executor:
+            futures = {
+                int(unit_id): executor.submit(
+                    self.analyze,
+                    load_track(
+                        session,
+                        unit_id,
+                        time_from,
+                        time_to,
+                        ignition_param=ignition_param,
+                    ),
+                )
+                for unit_id in unit_ids
+            }
+            return {
+                unit_id: future.result() for unit_id, future in futures.items()
+            }
+
+    def _daily_mileage(
+        self, times: np.ndarray, distances: np.ndarray
+    ) -> dict[datetime.date, float]:
+        days = (times[:-1] + self.utc_offset) // 86400
+        first = int(days.min())
+        totals = np.bincount(days - first, weights=distances)
+        dates = (np.arange(len(totals)) + first).astype("datetime64[D]")
+        return dict(zip(dates.tolist(), totals.tolist()))
+
+
+def load_track(
+    session: WialonSession,
+    unit_id: int,
+    time_from: int,
+    time_to: int,
+    *,
+    ignition_param: str | None = None,
+    chunk_size: int = 10000,
+) -> Track:
+    """
+    Loads the position messages of a unit into a track.
+
+    Messages are loaded into the session with ``messages/load_interval`` and fetched ``chunk_size`` at a time. They are unloaded afterwards.
+
+    :param session: A valid Wialon API session.
+    :type session: ~terminusgps.wialon.session.WialonSession
+    :param unit_id: A Wialon unit id.
+    :type unit_id: int
+    :param time_from: Interval start as a unix timestamp.
+    :type time_from: int
+    :param time_to: Interval end as a unix timestamp.
+    :type time_to: int
+    :param ignition_param: Message parameter holding the ignition state. Default is :py:obj:`None` (ignition always on).
+    :type ignition_param: str | None
+    :param chunk_size: Number of messages fetched per Wialon API call. Default is ``10000``.
+    :type chunk_size: int
+    :raises WialonAPIError: If something went wrong calling the Wialon API.
+    :returns: A track.
+    :rtype: ~terminusgps.wialon.trips.Track
+
+    """
+    response = session.wialon_api.messages_load_interval(
+        **{
+            "itemId": unit_id,
+            "timeFrom": time_from,
+            "timeTo": time_to,
+            "flags": 0x0001,
+            "flagsMask": 0xFF01,
+            "loadCount": 0,
+        }
+    )
+    messages = []
+    try:
+        count = int(response.get("count", 0))
+        for start in range(0, count, chunk_size):
+            messages.extend(
+                session.wialon_api.messages_get_messages(
+                    **{
+                        "indexFrom": start,
+                        "indexTo": min(start + chunk_size, count) - 1,
+                    }
+                )
+            )
+    finally:
+        session.wialon_api.messages_unload({})
+    logger.debug(f"Loaded {len(messages)} messages of unit #{unit_id}")
+    return Track.from_messages(unit_id, messages, ignition_param)
@@ -0,0 +1,279 @@
+import collections
+import logging
+import threading
+import typing
+
+from terminusgps.wialon.events import EventDispatcher
+from terminusgps.wialon.flags import DataFlag
+from terminusgps.wialon.session import WialonSession
+
+__all__ = ["UnitIndex"]
+
+logger = logging.getLogger(__name__)
+
+_UNIT_CLASS = 2
+"""Wialon item class id (``cls``) of units."""
+
+
+class UnitIndex:
+    """
+    An in-memory index of Wialon units by IMEI (``sys_unique_id``) and admin field values.
+
+    Units are loaded once with a paginated ``core/search_items`` call. Afterwards the session is subscribed to unit changes, so :py:meth:`refresh` only applies the changes reported by ``avl_evts`` instead of reloading every unit. Events are read through the session's :py:class:`~terminusgps.wialon.events.EventDispatcher`, so changes polled by other listeners of the session are applied as well.
+
+    Lookups are exact matches, unlike the wildcard searches in :py:mod:`terminusgps.wialon.utils`. The index is safe to share between threads.
+
+    """
+
+    def __init__(
+        self,
+        session: WialonSession,
+        *,
+        admin_fields: typing.Iterable[str] = ("iccid", "carrier"),
+        page_size: int = 1000,
+    ) -> None:
+        """
+        :param session: A valid Wialon API session.
+        :type session: ~terminusgps.wialon.session.WialonSession
+        :param admin_fields: Admin field names to index. Default is ``("iccid", "carrier")``.
+        :type admin_fields: ~collections.abc.Iterable[str]
+        :param page_size: Number of units loaded per Wialon API call. Default is ``1000``.
+        :type page_size: int
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        self._session = session
+        self._admin_fields = frozenset(admin_fields)
+        self._page_size = page_size
+        self._flags = (
+            DataFlag.UNIT_BASE
+            | DataFlag.UNIT_ADMIN_FIELDS
+            | DataFlag.UNIT_ADVANCED_PROPERTIES
+        )
+        self._lock = threading.RLock()
+        self._changed: set[int] = set()
+        self._units: dict[int, dict[str, typing.Any]] = {}
+        self._by_imei: dict[str, set[int]] = collections.defaultdict(set)
+        self._by_admin_field: dict[str, dict[str, set[int]]] = {
+            name: collections.defaultdict(set) for name in self._admin_fields
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._units)
+
+    def __contains__(self, unit_id: int) -> bool:
+        with self._lock:
+            return unit_id in self._units
+
+    def load(self) -> None:
+        """
+        Loads every unit visible to the session and subscribes the session to unit changes.
+
+        The index listens to the session's events from then on.
+
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: Nothing.
+        :rtype: None
+
+        """
+        units = []
+        start = 0
+        while True:
+            response = self._session.wialon_api.core_search_items(
+                **{
+                    "spec": {
+                        "itemsType": "avl_unit",
+                        "propName": "sys_name",
+                        "propValueMask": "*",
+                        "sortType": "sys_id",
+                        "propType": "property",
+                    },
+                    "force": 1,
+                    "flags": self._flags,
+                    "from": start,
+                    "to": start + self._page_size - 1,
+                }
+            )
+            units.extend(response["items"])
+            start += self._page_size
+            if start >= int(response["totalItemsCount"]):
+                break
+
+        self._session.wialon_api.core_update_data_flags(
+            **{
+                "spec": [
+                    {
+                        "type": "type",
+                        "data": "avl_unit",
+                        "flags": self._flags,
+                        "mode": 0,
+                    }
+                ]
+            }
+        )
+        with self._lock:
+            self._units.clear()
+            self._by_imei.clear()
+            for index in self._by_admin_field.values():
+                index.clear()
+            for unit in units:
+                self._add(unit)
+            self._changed.clear()
+        EventDispatcher.for_session(self._session).subscribe(self._apply)
+        logger.debug(f"Indexed {len(units)} units")
+
+    def refresh(self) -> int:
+        """
+        Polls the session's events and applies unit changes reported since the last :py:meth:`load` or :py:meth:`refresh`.
+
+        Events of other items in the session, e.g. resources or users, are ignored. Units that weren't indexed are only added from events carrying their full data.
+
+        :raises WialonAPIError: If something went wrong calling the Wialon API.
+        :returns: Number of changed units.
+        :rtype: int
+
+        """
+        EventDispatcher.for_session(self._session).poll()
+        with self._lock:
+            changed = len(self._changed)
+            self._changed.clear()
+        return changed
+
+    def _apply(self, events: list[dict[str, typing.Any]]) -> None:
+        with self._lock:
+            for event in events:
+                unit_id = int(event["i"])
+                data = event.get("d") or {}
+                if unit_id not in self._units and not (
+                    event.get("t") == "u" and data.get("cls") == _UNIT_CLASS
+                ):
+                    continue
+                if event.get("t") == "d":
+                    self._remove(unit_id)
+                elif event.get("t") == "u":
+                    self._update(unit_id, data)
+                else:
+                    continue
+                self._changed.add(unit_id)
+
+    def get_unit_from_imei(self, imei: str) -> dict[str, typing.Any]:
+        """
+        Returns a Wialon unit from an IMEI (sys_unique_id) number.
+
+        :param imei: An IMEI number.
+        :type imei: str
+        :raises ValueError: If multiple units were found with the provided IMEI number.
+        :raises ValueError: If zero units were found with the provided IMEI number.
+        :returns: A Wialon unit dictionary.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        with self._lock:
+            unit_ids = self._by_imei.get(str(imei), set())
+            if len(unit_ids) > 1:
+                raise ValueError(f"Multiple units found for IMEI #{imei}.")
+            elif len(unit_ids) == 0:
+                raise ValueError(f"No units found for IMEI #{imei}.")
+            return self._units[next(iter(unit_ids))]
+
+    def get_unit_from_iccid(
+        self, iccid: str, *, afield_key: str = "iccid"
+    ) -> dict[str, typing.Any]:
+        """
+        Returns a Wialon unit from a telecom iccid.
+
+        :param iccid: A telecom iccid number.
+        :type iccid: str
+        :param afield_key: Admin field key to search against. Default is ``"iccid"``.
+        :type afield_key: str
+        :raises KeyError: If ``afield_key`` wasn't indexed.
+        :raises ValueError: If multiple units were found with the provided iccid.
+        :raises ValueError: If zero units were found with the provided iccid.
+        :returns: A Wialon unit dictionary.
+        :rtype: dict[str, ~typing.Any]
+
+        """
+        with self._lock:
+            unit_ids = self._by_admin_field[afield_key].get(str(iccid), set())
+            if len(unit_ids) > 1:
+                raise ValueError(f"Multiple units found for iccid #{iccid}.")
+            elif len(unit_ids) == 0:
+                raise ValueError(f"No units found for iccid #{iccid}.")
+            return self._units[next(iter(unit_ids))]
+
+    def get_units_from_carrier(
+        self, carrier: str, *, afield_key: str = "carrier"
+    ) -> list[dict[str, typing.Any]]:
+        """
+        Returns a list of Wialon units by telecom carrier name.
+
+        The list may be empty if no units were found.
+
+        :param carrier: A telecom carrier name.
+        :type carrier: str
+        :param afield_key: Admin field key to search against. Default is ``"carrier"``.
+        :type afield_key: str
+        :raises KeyError: If ``afield_key`` wasn't indexed.
+        :returns: A list of Wialon unit dictionaries.
+        :rtype: list[dict[str, ~typing.Any]]
+
+        """
+        with self._lock:
+            unit_ids = self._by_admin_field[afield_key].get(
+                str(carrier), set()
+            )
+            return [self._units[unit_id] for unit_id in sorted(unit_ids)]
+
+    def _add(self, unit: dict[str, typing.Any]) -> None:
+        unit_id = int(unit["id"])
+        self._units[unit_id] = unit
+        if unit.get("uid"):
+            self._by_imei[str(unit["uid"])].add(unit_id)
+        for name, value in self._admin_field_values(unit).items():
+            self._by_admin_field[name][value].add(unit_id)
+
+    def _remove(self, unit_id: int) -> dict[str, typing.Any] | None:
+        unit = self._units.pop(unit_id, None)
+        if unit is None:
+            return None
+        if unit.get("uid"):
+            self._discard(self._by_imei, str(unit["uid"]), unit_id)
+        for name, value in self._admin_field_values(unit).items():
+            self._discard(self._by_admin_field[name], value, unit_id)
+        return unit
+
+    def _update(self, unit_id: int, data: dict[str, typing.Any]) -> None:
+        unit = self._remove(unit_id) or {"id": unit_id}
+        unit = dict(unit)
+        for key, value in data.items():
+            if key == "aflds" and isinstance(value, dict):
+                aflds = dict(unit.get("aflds") or {})
+                for field_id, field in value.items():
+                    if field is None:
+                        aflds.pop(field_id, None)
+                    else:
+                        aflds[field_id] = field
+                unit["aflds"] = aflds
+            else:
+                unit[key] = value
+        self._add(unit)
+
+    def _admin_field_values(
+        self, unit: dict[str, typing.Any]
+    ) -> dict[str, str]:
+        aflds = unit.get("aflds") or {}
+        return {
+            field["n"]: str(field.get("v", ""))
+            for field in aflds.values()
+            if field and field.get("n") in self._admin_fields
+        }
+
+    @staticmethod
+    def _discard(index: dict[str, set[int]], key: str, unit_id: int) -> None:
+        unit_ids = index.get(key)
+        if unit_ids is not None:
+            unit_ids.discard(unit_id)
+            if not unit_ids:
+                del index[key]
@@ -2,16 +2,26 @@ import secrets
 import string
 import typing
 
+from terminusgps.wialon.projections import Projection
 from terminusgps.wialon.session import WialonSession
 
 __all__ = [
     "generate_wialon_password",
+    "generate_wialon_passwords",
     "get_unit_from_iccid",
     "get_unit_from_imei",
     "get_units_from_carrier",
 ]
 
 
+_UPPERCASE = string.ascii_uppercase
+_LOWERCASE = string.ascii_lowercase
+_DIGITS = string.digits
+_SYMBOLS = "!@#$%^*()[]-_+"
+_ALPHABET = _UPPERCASE + _LOWERCASE + _DIGITS + _SYMBOLS
+_random = secrets.SystemRandom()
+
+
 def generate_wialon_password(length: int = 32) -> str:
     """
     Generates a Wialon compliant password between ``8`` and ``64`` characters.
@@ -30,6 +40,36 @@ def generate_wialon_password(length: int = 32) -> str:
     :rtype: str
 
     """
+    _validate_password_length(length)
+    chars = [
+        secrets.choice(_UPPERCASE),
+        secrets.choice(_LOWERCASE),
+        secrets.choice(_SYMBOLS),
+        *(secrets.choice(_DIGITS) for _ in range(3)),
+        *(secrets.choice(_ALPHABET) for _ in range(length - 6)),
+    ]
+    _random.shuffle(chars)
+    return "".join(chars)
+
+
+def generate_wialon_passwords(count: int, length: int = 32) -> list[str]:
+    """
+    Generates several Wialon compliant passwords.
+
+    :param count: Number of passwords to generate.
+    :type count: int
+    :param length: Length of each password. Default is ``32``.
+    :type length: int
+    :raises ValueError: If ``length`` was less than ``8`` or greater than ``64``.
+    :returns: A list of Wialon compliant passwords.
+    :rtype: list[str]
+
+    """
+    _validate_password_length(length)
+    return [generate_wialon_password(length) for _ in range(count)]
+
+
+def _validate_password_length(length: int) -> None:
     if length > 64:
         raise ValueError(
             f"Password cannot be greater than 64 characters in length, got {length}."
@@ -39,24 +79,6 @@ def generate_wialon_password(length: int = 32) -> str:
             f"Password cannot be less than 8 characters in length, got {length}."
         )
 
-    s0 = list(string.ascii_uppercase)
-    s1 = list(string.ascii_lowercase)
-    s2 = list(string.digits)
-    s3 = list("!@#$%^*()[]-_+")
-
-    while True:
-        password = "".join(
-            [secrets.choice(s0 + s1 + s2 + s3) for _ in range(length)]
-        )
-        if (
-            any(c.islower() for c in password)
-            and any(c.isupper() for c in password)
-            and sum(c.isdigit() for c in password) >= 3
-            and any(c in s3 for c in password)
-        ):
-            break
-    return password
-
 
 def get_unit_from_iccid(
     iccid: str,
@@ -65,6 +87,7 @@ def get_unit_from_iccid(
     flags: int = 1,
     use_cache: bool = True,
     afield_key: str = "iccid",
+    fields: typing.Iterable[str] | None = None,
 ) -> dict[str, typing.Any]:
     """
     Returns a Wialon unit from a telecom iccid.
@@ -79,6 +102,8 @@ def get_unit_from_iccid(
     :type use_cache: bool
     :param afield_key: Admin field key to search against. Default is ``"iccid"``.
     :type afield_key: str
+    :param fields: Wialon unit response keys to return, e.g. ``("nm", "pos")``. Overrides ``flags`` with the minimal flags returning them. Default is :py:obj:`None` (untrimmed response).
+    :type fields: ~collections.abc.Iterable[str] | None
     :raises ValueError: If multiple units were found with the provided iccid.
     :raises ValueError: If zero units were found with the provided iccid.
     :raises WialonAPIError: If something went wrong calling the Wialon API.
@@ -86,6 +111,10 @@ def get_unit_from_iccid(
     :rtype: dict[str, ~typing.Any]
 
     """
+    projection = None
+    if fields is not None:
+        projection = Projection("avl_unit", fields)
+        flags = projection.flags
     response = session.wialon_api.core_search_items(
         **{
             "spec": {
@@ -105,6 +134,8 @@ def get_unit_from_iccid(
         raise ValueError(f"Multiple units found for iccid #{iccid}.")
     elif int(response["totalItemsCount"]) == 0:
         raise ValueError(f"No units found for iccid #{iccid}.")
+    if projection is not None:
+        return projection.apply(response["items"][0])
     return response["items"][0]
 
 
@@ -114,6 +145,7 @@ def get_unit_from_imei(
     *,
     flags: int = 1,
     use_cache: bool = True,
+    fields: typing.Iterable[str] | None = None,
 ) -> dict[str, typing.Any]:
     """
     Returns a Wialon unit ID from an IMEI (sys_unique_id) number.
@@ -126,6 +158,8 @@ def get_unit_from_imei(
     :type flags: int
     :param use_cache: Whether to use a cached Wialon API response or force a Wialon API call. Default is :py:obj:`True`.
     :type use_cache: bool
+    :param fields: Wialon unit response keys to return, e.g. ``("nm", "pos")``. Overrides ``flags`` with the minimal flags returning them. Default is :py:obj:`None` (untrimmed response).
+    :type fields: ~collections.abc.Iterable[str] | None
     :raises ValueError: If multiple units were found with the provided IMEI number.
     :raises ValueError: If zero units were found with the provided IMEI number.
     :raises WialonAPIError: If something went wrong calling the Wialon API.
@@ -133,6 +167,10 @@ def get_unit_from_imei(
     :rtype: dict[str, ~typing.Any]
 
     """
+    projection = None
+    if fields is not None:
+        projection = Projection("avl_unit", fields)
+        flags = projection.flags
     response = session.wialon_api.core_search_items(
         **{
             "spec": {
@@ -152,6 +190,8 @@ def get_unit_from_imei(
         raise ValueError(f"Multiple units found for IMEI #{imei}.")
     elif int(response["totalItemsCount"]) == 0:
         raise ValueError(f"No units found for IMEI #{imei}.")
+    if projection is not None:
+        return projection.apply(response["items"][0])
     return response["items"][0]
 
 
@@ -164,6 +204,7 @@ def get_units_from_carrier(
     flags: int = 1,
     start: int = 0,
     end: int = 0,
+    fields: typing.Iterable[str] | None = None,
 ) -> list[dict[str, typing.Any]]:
     """
     Returns a list of Wialon unit IDs by telecom carrier name.
@@ -184,11 +225,17 @@ def get_units_from_carrier(
     :type start: int
     :param end: End index. Default is ``0``.
     :type end: int
+    :param fields: Wialon unit response keys to return, e.g. ``("nm", "pos")``. Overrides ``flags`` with the minimal flags returning them. Default is :py:obj:`None` (untrimmed response).
+    :type fields: ~collections.abc.Iterable[str] | None
     :raises WialonAPIError: If something went wrong calling the Wialon API.
     :returns: A list of Wialon unit dictionaries.
     :rtype: list[dict[str, ~typing.Any]]
 
     """
+    projection = None
+    if fields is not None:
+        projection = Projection("avl_unit", fields)
+        flags = projection.flags
     response = session.wialon_api.core_search_items(
         **{
             "spec": {
@@ -206,4 +253,6 @@ def get_units_from_carrier(
     )
     if int(response["totalItemsCount"]) == 0:
         return []
+    if projection is not None:
+        return [projection.apply(item) for item in response["items"]]
     return response["items"]
@@ -0,0 +1,51 @@
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "loaders": [
+                        (
+                            "django.template.loaders.locmem.Loader",
+                            {
+                                "dashboard.html": (
+                                    "<html>{% partialdef main inline %}"
+                                    "<p>{{ count }}</p>"
+                                    "{% endpartialdef %}</html>"
+                                ),
+                                "fleet.html": (
+                                    "<html>{% partialdef units inline %}"
+                                    "<table>{% for unit in units %}"
+                                    "<tr>{{ forloop.counter }}:{{ unit }}</tr>"
+                                    "{% empty %}<tr>none</tr>{% endfor %}"
+                                    "</table>{% endpartialdef %}</html>"
+                                ),
+                                "fleet_page.html": (
+                                    "{% partialdef head %}<html><h1>Fleet</h1>"
+                                    "{% endpartialdef %}"
+                                    "{% partialdef units %}<table>"
+                                    "{% for unit in units %}"
+                                    "<tr>{{ forloop.counter }}:{{ unit }}</tr>"
+                                    "{% empty %}<tr>none</tr>{% endfor %}"
+                                    "</table>{% endpartialdef %}"
+                                    "{% partialdef foot %}</html>"
+                                    "{% endpartialdef %}"
+                                    "{% partial head %}{% partial units %}"
+                                    "{% partial foot %}"
+                                ),
+                            },
+                        )
+                    ]
+                },
+            }
+        ],
+    )
+    django.setup()
@@ -0,0 +1,124 @@
+import importlib.util
+import threading
+from unittest import TestCase, mock, skipUnless
+
+from django.core.cache import caches
+
+from terminusgps import cache
+
+
+class DjangoCacheTestCase(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.session = mock.Mock(username="user")
+        self.session.wialon_api.router.endpoints = [
+            mock.Mock(url="https://hst-api.wialon.com:443")
+        ]
+        self.session.wialon_api.core_search_items.return_value = {
+            "totalItemsCount": 1,
+            "items": [{"id": 1, "nm": "Unit", "uid": "123456789"}],
+        }
+
+    def test_unit_lookup_shared_between_adapters(self):
+        """Fails if a unit cached by one adapter was fetched again by another."""
+        first = cache.DjangoCache().get_unit_from_imei(
+            "123456789", self.session
+        )
+        other = cache.DjangoCache()
+        second = other.get_unit_from_imei("123456789", self.session)
+        self.assertEqual(first, second)
+        self.assertEqual(other.hits, 1)
+        self.session.wialon_api.core_search_items.assert_called_once()
+
+    def test_version_invalidates(self):
+        """Fails if an entry was read by an adapter with another version."""
+        cache.DjangoCache(version=1).get_unit_from_imei("1", self.session)
+        cache.DjangoCache(version=2).get_unit_from_imei("1", self.session)
+        self.assertEqual(
+            self.session.wialon_api.core_search_items.call_count, 2
+        )
+
+    def test_compact_serialization(self):
+        """Fails if large entries weren't compressed JSON bytes."""
+        adapter = cache.DjangoCache(compress_over=64)
+        key = adapter.make_key("test", "big")
+        value = {"items": [{"id": i, "nm": "Unit"} for i in range(100)]}
+        adapter.get_or_compute(key, lambda: value)
+        stored = caches["default"].get(key, version=1)
+        self.assertIsInstance(stored, bytes)
+        self.assertTrue(stored.startswith(b"z"))
+        self.assertLess(len(stored), len(str(value)))
+        self.assertEqual(adapter.get_or_compute(key, dict), value)
+
+    def test_probabilistic_early_expiry(self):
+        """Fails if an entry close to expiring wasn't refreshed early."""
+        adapter = cache.DjangoCache(timeout=60)
+        key = adapter.make_key("test", "early")
+        compute = mock.Mock(return_value=1)
+        with mock.patch("time.perf_counter", side_effect=[0.0, 10.0]):
+            adapter.get_or_compute(key, compute)
+        with mock.patch("random.random", return_value=0.5):
+            adapter.get_or_compute(key, compute)
+        self.assertEqual(compute.call_count, 1)
+        stored = cache._loads(caches["default"].get(key, version=1))
+        with (
+            mock.patch("random.random", return_value=0.99),
+            mock.patch("time.time", return_value=stored["x"] - 30),
+        ):
+            adapter.get_or_compute(key, compute)
+        self.assertEqual(compute.call_count, 2)
+        self.assertEqual(adapter.early_refreshes, 1)
+
+    def test_sid_store(self):
+        """Fails if session data wasn't stored under a versioned key."""
+        store = cache.DjangoCache(version=3).sid_store()
+        store.set("key", {"sid": "abc"})
+        self.assertEqual(store.get("key"), {"sid": "abc"})
+        self.assertIn(":v3:", store.key_prefix)
+
+    @skipUnless(
+        importlib.util.find_spec("lxml")
+        and importlib.util.find_spec("authorizenet"),
+        "requires lxml and authorizenet",
+    )
+    def test_customer_profile_shared_between_adapters(self):
+        """Fails if a profile cached by one adapter was fetched again by another."""
+        from lxml import objectify
+
+        service = mock.Mock(login_id="login", environment="sandbox")
+        service.execute.return_value = objectify.fromstring(
+            "<getCustomerProfileResponse><profile>"
+            "<customerProfileId>123</customerProfileId>"
+            "</profile></getCustomerProfileResponse>"
+        )
+        cache.DjangoCache().get_customer_profile(
+            service, customer_profile_id=123
+        )
+        other = cache.DjangoCache()
+        profile = other.get_customer_profile(service, customer_profile_id=123)
+        self.assertEqual(profile.profile.customerProfileId, 123)
+        self.assertEqual(other.hits, 1)
+        service.execute.assert_called_once()
+        other.delete_customer_profile(service, customer_profile_id=123)
+        other.get_customer_profile(service, customer_profile_id=123)
+        self.assertEqual(service.execute.call_count, 2)
+
+    def test_counters_shared_between_threads(self):
+        """Fails if hits counted from many threads were lost."""
+        adapter = cache.DjangoCache()
+        key = adapter.make_key("test", "threads")
+        adapter.get_or_compute(key, lambda: 1)
+        threads = [
+            threading.Thread(
+                target=lambda: [
+                    adapter.get_or_compute(key, lambda: 1) for _ in range(200)
+                ]
+            )
+            for _ in range(4)
+        ]
+        with mock.patch("random.random", return_value=0.0):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(adapter.hits, 800)
@@ -0,0 +1,218 @@
+import asyncio
+import contextvars
+import datetime
+import threading
+from unittest import TestCase, mock
+
+from django.core.cache import caches
+from django.template import loader
+from django.test import RequestFactory
+from django.views.generic import TemplateView
+
+from terminusgps.mixins import (
+    HtmxStreamingTemplateResponseMixin,
+    HtmxTemplateResponseMixin,
+)
+
+
+class DashboardView(HtmxTemplateResponseMixin, TemplateView):
+    template_name = "dashboard.html"
+    fragment_cache_timeout = 60
+    count = 1
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(count=self.count, **kwargs)
+
+    def get_fragment_fingerprint(self, context):
+        return str(self.count)
+
+    def get_last_modified(self, context):
+        return datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+
+
+class FleetView(HtmxStreamingTemplateResponseMixin, TemplateView):
+    template_name = "fleet.html"
+    partial_name = "#units"
+    chunk_size = 16
+    units = ["a", "b", "c"]
+
+    def get_context_fetchers(self):
+        return {"units": lambda: self.units}
+
+
+class AsyncFleetView(FleetView):
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return await self.arender_to_response(context)
+
+
+class HtmxTemplateResponseMixinTestCase(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.factory = RequestFactory()
+        DashboardView.count = 1
+
+    def get(self, **headers):
+        request = self.factory.get("/dashboard/", headers=headers)
+        response = DashboardView.as_view()(request)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_renders_partial(self):
+        """Fails if an htmx request didn't render the partial only."""
+        response = self.get(hx_request="true")
+        self.assertEqual(response.content, b"<p>1</p>")
+        self.assertIn("HX-Request", response.headers["Vary"])
+
+    def test_not_modified(self):
+        """Fails if an unchanged fragment wasn't answered with 304."""
+        etag = self.get(hx_request="true").headers["ETag"]
+        response = self.get(hx_request="true", if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        DashboardView.count = 2
+        response = self.get(hx_request="true", if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"<p>2</p>")
+
+    def test_etag_per_partial(self):
+        """Fails if the full page and the partial shared an ETag."""
+        partial = self.get(hx_request="true")
+        full = self.get()
+        self.assertNotEqual(partial.headers["ETag"], full.headers["ETag"])
+        self.assertTrue(full.content.startswith(b"<html>"))
+
+    def test_fragment_cache(self):
+        """Fails if a cached fragment was rendered again or differed from a fresh response."""
+        request = self.factory.get(
+            "/dashboard/", headers={"hx_request": "true"}
+        )
+
+        def render():
+            view = DashboardView()
+            view.setup(request)
+            response = view.render_to_response(
+                view.get_context_data(), status=202
+            )
+            response.render()
+            return response
+
+        first = render()
+        with mock.patch(
+            "django.template.backends.django.Template.render"
+        ) as template_render:
+            second = render()
+        template_render.assert_not_called()
+        self.assertEqual(first.content, second.content)
+        self.assertIs(type(first), type(second))
+        self.assertEqual(second.status_code, 202)
+
+
+class HtmxStreamingTemplateResponseMixinTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_streams_partials(self):
+        """Fails if partials weren't sent one at a time or rendered differently than Django renders the page."""
+
+        class View(FleetView):
+            template_name = "fleet_page.html"
+            stream_partials = ("#head", "#units", "#foot")
+            chunk_size = 1
+
+        request = self.factory.get("/fleet/")
+        for units in (["a", "b"], []):
+            with self.subTest(units=units):
+                response = View.as_view(units=units)(request)
+                self.assertTrue(response.streaming)
+                chunks = [c.decode() for c in response.streaming_content]
+                self.assertEqual(len(chunks), 3)
+                self.assertEqual(chunks[0], "<html><h1>Fleet</h1>")
+                self.assertEqual(
+                    "".join(chunks),
+                    loader.render_to_string(
+                        "fleet_page.html", {"units": units}
+                    ),
+                )
+
+    def test_htmx_request_streams_partial_name(self):
+        """Fails if an htmx request didn't get only the ``partial_name`` partial."""
+
+        class View(FleetView):
+            template_name = "fleet_page.html"
+            stream_partials = ("#head", "#units", "#foot")
+
+        request = self.factory.get("/fleet/", headers={"hx_request": "true"})
+        content = b"".join(View.as_view(units=[])(request).streaming_content)
+        self.assertEqual(content, b"<table><tr>none</tr></table>")
+
+    def test_empty_loop_and_full_page(self):
+        """Fails if an empty loop or a full page wasn't rendered."""
+        response = FleetView.as_view(units=[])(self.factory.get("/fleet/"))
+        content = b"".join(response.streaming_content)
+        self.assertEqual(content, b"<html><table><tr>none</tr></table></html>")
+
+    def test_concurrent_fetches(self):
+        """Fails if context fetches ran one after another."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def units():
+            barrier.wait()
+            return ["a"]
+
+        class View(FleetView):
+            def get_context_fetchers(self):
+                return {"units": units, "profile": barrier.wait}
+
+        class AsyncView(View, AsyncFleetView):
+            pass
+
+        request = self.factory.get("/fleet/", headers={"hx_request": "true"})
+        content = b"".join(View.as_view()(request).streaming_content)
+        self.assertIn(b"<tr>1:a</tr>", content)
+        response = asyncio.run(AsyncView.as_view()(request))
+        self.assertIn(b"<tr>1:a</tr>", asyncio.run(_join(response)))
+
+    def test_sync_view_rejects_coroutine_fetches(self):
+        """Fails if a sync view accepted a coroutine function fetch."""
+
+        async def units():
+            return ["a"]
+
+        class View(FleetView):
+            def get_context_fetchers(self):
+                return {"units": units}
+
+        request = self.factory.get("/fleet/", headers={"hx_request": "true"})
+        with self.assertRaises(TypeError):
+            View.as_view()(request)
+
+    def test_fetches_see_context_variables(self):
+        """Fails if fetches run in threads didn't see the caller's context variables."""
+        var = contextvars.ContextVar("var", default="unset")
+
+        class View(FleetView):
+            def get_context_fetchers(self):
+                return {"units": lambda: [var.get()], "other": var.get}
+
+        request = self.factory.get("/fleet/", headers={"hx_request": "true"})
+        token = var.set("set")
+        try:
+            content = b"".join(View.as_view()(request).streaming_content)
+        finally:
+            var.reset(token)
+        self.assertIn(b"<tr>1:set</tr>", content)
+
+    def test_async_view(self):
+        """Fails if an async view didn't stream asynchronously."""
+        request = self.factory.get("/fleet/", headers={"hx_request": "true"})
+        response = asyncio.run(AsyncFleetView.as_view()(request))
+        self.assertTrue(response.is_async)
+        content = asyncio.run(_join(response))
+        self.assertEqual(
+            content, b"<table><tr>1:a</tr><tr>2:b</tr><tr>3:c</tr></table>"
+        )
+
+
+async def _join(response):
+    return b"".join([chunk async for chunk in response.streaming_content])
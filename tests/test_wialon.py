@@ -1,6 +1,46 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
-from terminusgps.wialon import constants, flags
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+
+import numpy as np
+import wialon.api
+
+from terminusgps.wialon import (
+    batching,
+    bulk,
+    codecs,
+    commands,
+    constants,
+    events,
+    flags,
+    geocoding,
+    geofences,
+    logs,
+    migration,
+    models,
+    projections,
+    ratelimit,
+    reports,
+    routing,
+    scheduler,
+    schedules,
+    session,
+    sid_store,
+    streaming,
+    trips,
+    unit_index,
+    utils,
+)
 
 
 class WialonConstantTestCase(TestCase):
@@ -61,3 +101,1794 @@ class WialonConstantTestCase(TestCase):
                 | flags.AccessFlag.VIEW_ITEM_BASIC
             ),
         )
+
+
+class GeofenceEngineTestCase(TestCase):
+    def setUp(self):
+        self.square = geofences.Geofence.from_zone_data(
+            {
+                "id": 1,
+                "n": "Depot",
+                "t": geofences.GeofenceType.POLYGON,
+                "p": [
+                    {"x": -97.0, "y": 32.0},
+                    {"x": -96.9, "y": 32.0},
+                    {"x": -96.9, "y": 32.1},
+                    {"x": -97.0, "y": 32.1},
+                ],
+            }
+        )
+        self.circle = geofences.Geofence.from_zone_data(
+            {
+                "id": 2,
+                "n": "Yard",
+                "t": geofences.GeofenceType.CIRCLE,
+                "w": 1000,
+                "p": [{"x": -96.5, "y": 32.5, "r": 1000}],
+            }
+        )
+        self.engine = geofences.GeofenceEngine(
+            [self.square, self.circle], cell_size=0.05
+        )
+
+    def test_contains(self):
+        """Fails if coordinates weren't matched to the geofences containing them."""
+        lats = [32.05, 32.5, 32.505, 33.0]
+        lons = [-96.95, -96.5, -96.5, -96.95]
+        result = self.engine.contains(lats, lons)
+        self.assertEqual(
+            result.tolist(),
+            [[True, False], [False, True], [False, True], [False, False]],
+        )
+
+    def test_transitions(self):
+        """Fails if enter/exit transitions weren't emitted between consecutive positions."""
+        lats = [31.9, 32.05, 32.06, 31.9]
+        lons = [-96.95, -96.95, -96.95, -96.95]
+        transitions = self.engine.transitions(lats, lons, times=[0, 1, 2, 3])
+        self.assertEqual(
+            [(t.geofence_id, t.index, t.entered, t.time) for t in transitions],
+            [(1, 1, True, 1), (1, 3, False, 3)],
+        )
+
+    def test_polygon_chunks_bounded_by_budget(self):
+        """Fails if chunking points by memory budget changed the result."""
+        rng = np.random.default_rng(0)
+        lats = rng.uniform(31.9, 32.2, 1000)
+        lons = rng.uniform(-97.1, -96.8, 1000)
+        args = (lats, lons, self.square.lats, self.square.lons)
+        np.testing.assert_array_equal(
+            geofences._in_polygon(*args, budget=10),
+            geofences._in_polygon(*args),
+        )
+
+    def get_circle(self, lat, lon, radius):
+        return geofences.Geofence.from_zone_data(
+            {
+                "id": 4,
+                "t": geofences.GeofenceType.CIRCLE,
+                "w": radius,
+                "p": [{"x": lon, "y": lat, "r": radius}],
+            }
+        )
+
+    def test_polar_circle_spans_every_longitude(self):
+        """Fails if a circle around a pole wasn't a full longitude band."""
+        circle = self.get_circle(89.99, 0.0, 5000)
+        min_lon, min_lat, max_lon, max_lat = circle.bounds
+        self.assertEqual((min_lon, max_lon, max_lat), (-180.0, 180.0, 90.0))
+        engine = geofences.GeofenceEngine([circle])
+        self.assertEqual(
+            engine.contains([89.995, 89.9], [100.0, 0.0]).tolist(),
+            [[True], [False]],
+        )
+
+    def test_antimeridian_circle(self):
+        """Fails if a circle crossing the antimeridian didn't match points on both sides."""
+        circle = self.get_circle(0.0, 179.99, 5000)
+        min_lon, _, max_lon, _ = circle.bounds
+        self.assertGreater(min_lon, max_lon)
+        self.assertGreaterEqual(min_lon, -180.0)
+        self.assertLessEqual(max_lon, 180.0)
+        engine = geofences.GeofenceEngine([circle])
+        self.assertEqual(
+            engine.contains([0.0, 0.0, 0.0], [179.98, -179.99, 0.0]).tolist(),
+            [[True], [True], [False]],
+        )
+
+    def test_line_geofences_skipped(self):
+        """Fails if a line geofence was indexed."""
+        line = geofences.Geofence.from_zone_data(
+            {"id": 3, "t": geofences.GeofenceType.LINE, "p": []}
+        )
+        self.assertEqual(len(geofences.GeofenceEngine([line])), 0)
+
+    def test_mismatched_coordinates_raises_valueerror(self):
+        """Fails if mismatched latitude/longitude arrays didn't raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.engine.contains([32.0, 32.1], [-97.0])
+
+
+class ReportRunnerTestCase(TestCase):
+    def get_session(self, rows_per_unit=3):
+        session = mock.Mock()
+        api = session.wialon_api
+        api.report_exec_report.return_value = {
+            "reportResult": {
+                "tables": [{"name": "trips", "rows": rows_per_unit}]
+            }
+        }
+        api.report_get_result_rows.side_effect = lambda **kw: [
+            {"n": i} for i in range(kw["indexFrom"], kw["indexTo"] + 1)
+        ]
+        return session
+
+    def test_rows_fetched_in_chunks(self):
+        """Fails if report rows weren't fetched in ranges of ``chunk_size``."""
+        session = self.get_session(rows_per_unit=5)
+        with reports.execute_report(session, 1, 2, 3, 0, 10) as result:
+            rows = list(result.iter_rows(chunk_size=2))
+        self.assertEqual([row["n"] for row in rows], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            session.wialon_api.report_get_result_rows.call_count, 3
+        )
+
+    def test_cleanup_on_error(self):
+        """Fails if the report result wasn't cleaned up after an error."""
+        session = self.get_session()
+        with self.assertRaises(RuntimeError):
+            with reports.execute_report(session, 1, 2, 3, 0, 10):
+                raise RuntimeError
+        session.wialon_api.report_cleanup_result.assert_called_once()
+
+    def test_runner_streams_every_unit(self):
+        """Fails if the runner didn't stream rows for every unit and clean up every report."""
+        sessions = [self.get_session(), self.get_session()]
+        runner = reports.ReportRunner(sessions, buffer_size=2)
+        rows = list(runner.iter_rows(range(10), 1, 2, 0, 10, chunk_size=2))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual({unit_id for unit_id, _ in rows}, set(range(10)))
+        cleanups = sum(
+            s.wialon_api.report_cleanup_result.call_count for s in sessions
+        )
+        self.assertEqual(cleanups, 10)
+
+
+class UnitIndexTestCase(TestCase):
+    def get_unit(self, unit_id, imei, iccid, carrier):
+        return {
+            "id": unit_id,
+            "nm": f"Unit {unit_id}",
+            "uid": imei,
+            "aflds": {
+                "1": {"id": 1, "n": "iccid", "v": iccid},
+                "2": {"id": 2, "n": "carrier", "v": carrier},
+            },
+        }
+
+    def setUp(self):
+        units = [
+            self.get_unit(1, "111", "8901", "Verizon"),
+            self.get_unit(2, "222", "8902", "AT&T"),
+            self.get_unit(3, "333", "8903", "Verizon"),
+        ]
+        self.session = mock.Mock()
+        self.session.wialon_api.core_search_items.side_effect = lambda **kw: {
+            "totalItemsCount": len(units),
+            "items": units[kw["from"] : kw["to"] + 1],
+        }
+        self.index = unit_index.UnitIndex(self.session, page_size=2)
+        self.index.load()
+
+    def test_load_paginates(self):
+        """Fails if every unit wasn't loaded in pages of ``page_size``."""
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(
+            self.session.wialon_api.core_search_items.call_count, 2
+        )
+
+    def test_lookups(self):
+        """Fails if units weren't found by IMEI, iccid or carrier."""
+        self.assertEqual(self.index.get_unit_from_imei("222")["id"], 2)
+        self.assertEqual(self.index.get_unit_from_iccid("8903")["id"], 3)
+        self.assertEqual(
+            [u["id"] for u in self.index.get_units_from_carrier("Verizon")],
+            [1, 3],
+        )
+        with self.assertRaises(ValueError):
+            self.index.get_unit_from_imei("999")
+
+    def test_refresh_applies_events(self):
+        """Fails if refresh didn't apply update and delete events to the index."""
+        self.session.wialon_api.avl_evts.return_value = {
+            "tm": 1,
+            "events": [
+                {
+                    "i": 1,
+                    "t": "u",
+                    "d": {
+                        "aflds": {"2": {"id": 2, "n": "carrier", "v": "AT&T"}}
+                    },
+                },
+                {"i": 3, "t": "d", "d": None},
+            ],
+        }
+        self.assertEqual(self.index.refresh(), 2)
+        self.assertEqual(self.index.get_units_from_carrier("Verizon"), [])
+        self.assertEqual(
+            [u["id"] for u in self.index.get_units_from_carrier("AT&T")],
+            [1, 2],
+        )
+        self.assertNotIn(3, self.index)
+
+    def test_refresh_ignores_other_items(self):
+        """Fails if events of items that aren't units were indexed."""
+        new_unit = {**self.get_unit(4, "444", "8904", "Verizon"), "cls": 2}
+        self.session.wialon_api.avl_evts.return_value = {
+            "events": [
+                {"i": 100, "t": "u", "d": {"nm": "Resource", "cls": 3}},
+                {"i": 101, "t": "u", "d": {"pos": {"x": 1.0}}},
+                {"i": 102, "t": "d", "d": None},
+                {"i": 4, "t": "u", "d": new_unit},
+            ]
+        }
+        self.assertEqual(self.index.refresh(), 1)
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.get_unit_from_imei("444")["id"], 4)
+
+
+class EventDispatcherTestCase(TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.wialon_api.core_search_items.return_value = {
+            "totalItemsCount": 1,
+            "items": [{"id": 1, "nm": "Unit 1", "uid": "111"}],
+        }
+        self.session.wialon_api.core_update_data_flags.return_value = []
+        self.responses = []
+        self.session.wialon_api.avl_evts.side_effect = lambda: (
+            self.responses.pop(0) if self.responses else {"events": []}
+        )
+
+    def test_one_dispatcher_per_session(self):
+        """Fails if a session didn't share one dispatcher."""
+        self.assertIs(
+            events.EventDispatcher.for_session(self.session),
+            events.EventDispatcher.for_session(self.session),
+        )
+        self.assertIsNot(
+            events.EventDispatcher.for_session(self.session),
+            events.EventDispatcher.for_session(mock.Mock()),
+        )
+
+    def test_listeners_share_a_poll(self):
+        """Fails if a poll's events didn't reach every listener, even after one failed."""
+        dispatcher = events.EventDispatcher.for_session(self.session)
+        received = []
+        dispatcher.subscribe(mock.Mock(side_effect=RuntimeError))
+        dispatcher.subscribe(received.extend)
+        self.responses.append({"events": [{"i": 1, "t": "m", "d": {}}]})
+        with self.assertLogs("terminusgps.wialon.events", "ERROR"):
+            self.assertEqual(dispatcher.poll(), 1)
+        self.assertEqual(received, [{"i": 1, "t": "m", "d": {}}])
+        self.session.wialon_api.avl_evts.assert_called_once()
+
+    def test_unit_index_and_fanout_share_events(self):
+        """Fails if a command fanout's poll drained unit changes from an index of the same session."""
+        index = unit_index.UnitIndex(self.session)
+        index.load()
+        self.responses.append(
+            {
+                "events": [
+                    {"i": 1, "t": "m", "d": {"t": int(time.time()) + 1}},
+                    {"i": 1, "t": "u", "d": {"nm": "Renamed"}},
+                ]
+            }
+        )
+        fanout = commands.CommandFanout(self.session, rate=100, ack_timeout=1)
+        report = fanout.send([1], "Set config")
+        self.assertEqual(report.acknowledged, 1)
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(index.get_unit_from_imei("111")["nm"], "Renamed")
+
+
+class ProjectionTestCase(TestCase):
+    def test_minimal_flags(self):
+        """Fails if the computed flags weren't the minimal flags for the fields."""
+        projection = projections.Projection("avl_unit", ("pos", "aflds"))
+        self.assertEqual(
+            projection.flags,
+            flags.DataFlag.UNIT_BASE
+            | flags.DataFlag.UNIT_POSITION
+            | flags.DataFlag.UNIT_ADMIN_FIELDS,
+        )
+
+    def test_apply_trims_unrequested_keys(self):
+        """Fails if unrequested keys weren't removed from the item."""
+        projection = projections.Projection("avl_unit", ("nm",))
+        item = {"id": 1, "nm": "Unit", "cls": 2, "mu": 0}
+        self.assertEqual(projection.apply(item), {"id": 1, "nm": "Unit"})
+
+    def test_unknown_field_raises_valueerror(self):
+        """Fails if an unknown field didn't raise ValueError."""
+        with self.assertRaises(ValueError):
+            projections.get_data_flags("avl_unit", ("bogus",))
+        with self.assertRaises(ValueError):
+            projections.get_data_flags("bogus", ("nm",))
+
+
+class WialonItemModelTestCase(TestCase):
+    def setUp(self):
+        self.response = {
+            "totalItemsCount": 1,
+            "items": [
+                {
+                    "id": 1,
+                    "nm": "Truck",
+                    "uid": "111",
+                    "aflds": {"1": {"id": 1, "n": "iccid", "v": "8901"}},
+                    "sens": {"1": {"id": 1, "n": "Ignition", "t": "engine"}},
+                    "pos": {"t": 10, "y": 32.0, "x": -97.0, "s": 55},
+                }
+            ],
+        }
+
+    def test_unit_model(self):
+        """Fails if a unit model wasn't built from a search response."""
+        (unit,) = models.from_search_response(self.response, "avl_unit")
+        self.assertIsInstance(unit, models.Unit)
+        self.assertEqual((unit.id, unit.name, unit.imei), (1, "Truck", "111"))
+        self.assertEqual(unit.admin_fields["iccid"].value, "8901")
+        self.assertEqual(unit.sensors[1].type, "engine")
+        self.assertEqual(unit.position.speed, 55)
+        self.assertEqual(unit.custom_fields, {})
+
+    def test_sections_parsed_lazily(self):
+        """Fails if a nested section was parsed before first access."""
+        (unit,) = models.from_search_response(self.response, "avl_unit")
+        self.assertIsInstance(unit._sensors, models._Raw)
+        unit.sensors
+        self.assertIsInstance(unit._sensors, dict)
+
+    def test_models_are_slotted(self):
+        """Fails if a model instance had a ``__dict__``."""
+        (unit,) = models.from_search_response(self.response, "avl_unit")
+        self.assertFalse(hasattr(unit, "__dict__"))
+
+
+class FakeHTTPResponse:
+    def __init__(self, content, headers):
+        self.content = io.BytesIO(content)
+        self.headers = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+    def read(self, size=-1):
+        return self.content.read(size)
+
+    def readinto(self, buffer):
+        return self.content.readinto(buffer)
+
+
+class WialonTransportTestCase(TestCase):
+    def setUp(self):
+        self.api = session.Wialon(codec=codecs.StdlibCodec())
+
+    def urlopen(self, payload, headers=None):
+        content = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        if headers.get("Content-Encoding") == "gzip":
+            content = gzip.compress(content)
+        elif headers.get("Content-Encoding") == "deflate":
+            content = zlib.compress(content)
+        return mock.patch(
+            "urllib.request.urlopen",
+            return_value=FakeHTTPResponse(content, headers),
+        )
+
+    def test_codec_decodes_response(self):
+        """Fails if a response wasn't decoded by the session codec."""
+        codec = mock.Mock(wraps=codecs.StdlibCodec())
+        api = session.Wialon(codec=codec)
+        with self.urlopen({"items": [1, 2]}):
+            self.assertEqual(api.core_search_items(), {"items": [1, 2]})
+        codec.loads.assert_called_once()
+        self.assertIsInstance(
+            codec.loads.call_args.args[0], (bytes, bytearray)
+        )
+
+    def test_gzip_response(self):
+        """Fails if a gzip encoded response wasn't decompressed."""
+        with self.urlopen({"items": []}, {"Content-Encoding": "gzip"}):
+            self.assertEqual(self.api.core_search_items(), {"items": []})
+
+    def test_deflate_response(self):
+        """Fails if a deflate encoded response wasn't decompressed."""
+        with self.urlopen({"items": []}, {"Content-Encoding": "deflate"}):
+            self.assertEqual(self.api.core_search_items(), {"items": []})
+
+    def test_metrics_record_wire_and_decoded_bytes(self):
+        """Fails if compressed and decompressed body sizes weren't recorded."""
+        payload = {"items": [{"nm": "Unit"}] * 100}
+        with self.urlopen(payload, {"Content-Encoding": "gzip"}):
+            self.api.core_search_items()
+        metrics = self.api.metrics.as_dict()
+        self.assertEqual(metrics["requests"], 1)
+        self.assertEqual(
+            metrics["decoded_bytes"], len(json.dumps(payload).encode())
+        )
+        self.assertLess(metrics["wire_bytes"], metrics["decoded_bytes"])
+
+    def test_content_length_body(self):
+        """Fails if a body of known length wasn't read whole, or a truncated one didn't raise."""
+        content = json.dumps({"items": [1, 2]}).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(content)),
+        }
+        with mock.patch(
+            "urllib.request.urlopen",
+            return_value=FakeHTTPResponse(content, headers),
+        ):
+            self.assertEqual(self.api.core_search_items(), {"items": [1, 2]})
+        self.assertEqual(self.api.metrics.wire_bytes, len(content))
+        with mock.patch(
+            "urllib.request.urlopen",
+            return_value=FakeHTTPResponse(content[:-1], headers),
+        ):
+            with self.assertRaises(session.WialonAPIError):
+                self.api.core_search_items()
+
+    def test_invalid_utf8_ignored(self):
+        """Fails if invalid UTF-8 in a response wasn't dropped like python-wialon does."""
+        content = b'{"nm": "Unit\xff 1"}'
+        headers = {"Content-Type": "application/json"}
+        for codec in (codecs.StdlibCodec(), codecs.get_default_codec()):
+            with self.subTest(codec=codec):
+                api = session.Wialon(codec=codec)
+                with mock.patch(
+                    "urllib.request.urlopen",
+                    return_value=FakeHTTPResponse(content, headers),
+                ):
+                    self.assertEqual(api.core_search_item(), {"nm": "Unit 1"})
+
+    def test_error_response_raises_wialonapierror(self):
+        """Fails if a Wialon error response didn't raise WialonAPIError."""
+        with self.urlopen({"error": 7}):
+            with self.assertRaises(session.WialonAPIError) as ctx:
+                self.api.core_search_items()
+        self.assertEqual(ctx.exception.code, 7)
+
+    def test_default_codec(self):
+        """Fails if the default codec wasn't a JSON codec."""
+        self.assertIsInstance(codecs.get_default_codec(), codecs.JSONCodec)
+
+    def test_incomplete_codec_not_instantiable(self):
+        """Fails if a codec without loads could be instantiated."""
+
+        class IncompleteCodec(codecs.JSONCodec):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            IncompleteCodec()
+
+
+class EndpointRoutingTestCase(TestCase):
+    def setUp(self):
+        self.router = routing.EndpointRouter(
+            ["https://primary.example.com", "https://mirror.example.com"]
+        )
+        self.api = session.Wialon(
+            codec=codecs.StdlibCodec(), endpoints=self.router
+        )
+        self.requested = []
+
+    def urlopen(self, down=()):
+        def side_effect(request):
+            self.requested.append(request.full_url)
+            if any(host in request.full_url for host in down):
+                raise urllib.error.URLError("Connection refused")
+            content = json.dumps({"eid": "abc"}).encode()
+            headers = {"Content-Type": "application/json"}
+            return FakeHTTPResponse(content, headers)
+
+        return mock.patch("urllib.request.urlopen", side_effect=side_effect)
+
+    def test_failover_on_connection_error(self):
+        """Fails if a request didn't fail over to the next endpoint."""
+        with self.urlopen(down=["primary"]):
+            self.assertEqual(self.api.token_login(token="x"), {"eid": "abc"})
+        self.assertEqual(len(self.requested), 2)
+        primary, mirror = self.router.endpoints
+        self.assertEqual(primary.error_rate, 1.0)
+        self.assertIsNotNone(mirror.latency)
+
+    def test_endpoint_path_prefix(self):
+        """Fails if an endpoint's path wasn't kept as a prefix of request paths."""
+        router = routing.EndpointRouter(
+            ["https://local.example.com/wialon-local/"]
+        )
+        api = session.Wialon(codec=codecs.StdlibCodec(), endpoints=router)
+        with self.urlopen():
+            api.token_login(token="x")
+        self.assertTrue(
+            self.requested[0].startswith(
+                "https://local.example.com:443/wialon-local/wialon/ajax.html"
+            )
+        )
+
+    def test_unhealthy_endpoint_tried_last(self):
+        """Fails if an unhealthy endpoint was preferred over a healthy one."""
+        primary, mirror = self.router.endpoints
+        self.router.record_failure(primary)
+        self.assertEqual(self.router.candidates(), [mirror, primary])
+
+    def test_sid_affinity(self):
+        """Fails if a request with a sid wasn't sent to the endpoint that issued it."""
+        with self.urlopen(down=["primary"]):
+            self.api.sid = self.api.token_login(token="x")["eid"]
+        self.requested.clear()
+        with self.urlopen(down=["mirror"]):
+            with self.assertRaises(session.WialonAPIError):
+                self.api.core_search_items()
+        self.assertEqual(len(self.requested), 1)
+        self.assertIn("mirror", self.requested[0])
+        self.assertIsNone(self.api._sid_endpoint)
+
+    def test_sid_affinity_logs_in_again_on_unreachable_endpoint(self):
+        """Fails if a session pinned to an unreachable endpoint didn't log in on another endpoint and retry."""
+        api_session = session.WialonSession(
+            token="x", codec=codecs.StdlibCodec(), endpoints=self.router
+        )
+        primary, mirror = self.router.endpoints
+        with self.urlopen():
+            api_session.token_login(token="x")
+        self.assertIs(api_session.wialon_api._sid_endpoint, primary)
+        self.requested.clear()
+        with self.urlopen(down=["primary"]):
+            self.assertEqual(
+                api_session.wialon_api.core_search_items(), {"eid": "abc"}
+            )
+        self.assertIs(api_session.wialon_api._sid_endpoint, mirror)
+        self.assertIn("mirror", self.requested[-1])
+
+    def test_latency_is_time_to_headers(self):
+        """Fails if endpoint latency included reading the response body."""
+        response = FakeHTTPResponse(
+            json.dumps({"items": []}).encode(),
+            {"Content-Type": "application/json"},
+        )
+        read = response.read
+
+        def slow_read(size=-1):
+            time.sleep(0.05)
+            return read(size)
+
+        response.read = slow_read
+        with mock.patch("urllib.request.urlopen", return_value=response):
+            self.api.core_search_items()
+        primary, _ = self.router.endpoints
+        self.assertLess(primary.latency, 0.05)
+        self.assertLess(self.api.metrics.headers_seconds, 0.05)
+        self.assertGreaterEqual(self.api.metrics.transfer_seconds, 0.05)
+
+
+class SidStoreTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.stores = [
+            sid_store.FileSidStore(self.tmpdir.name),
+            sid_store.SQLiteSidStore(f"{self.tmpdir.name}/sids.sqlite3"),
+        ]
+        self.valid_sids = set()
+        self.logins = 0
+
+    def urlopen(self):
+        def side_effect(request):
+            params = urllib.parse.parse_qs(request.data.decode())
+            if params["svc"][0] == "token/login":
+                self.logins += 1
+                sid = f"sid-{self.logins}"
+                self.valid_sids.add(sid)
+                result = {"eid": sid, "au": "user", "user": {"id": 1}}
+            elif params.get("sid", [None])[0] in self.valid_sids:
+                result = {"items": []}
+            else:
+                result = {"error": 1}
+            headers = {"Content-Type": "application/json"}
+            return FakeHTTPResponse(json.dumps(result).encode(), headers)
+
+        return mock.patch("urllib.request.urlopen", side_effect=side_effect)
+
+    def get_session(self, store):
+        return session.WialonSession(
+            token="x", codec=codecs.StdlibCodec(), sid_store=store
+        )
+
+    def test_incomplete_store_not_instantiable(self):
+        """Fails if a store without lock primitives could be instantiated."""
+
+        class IncompleteStore(sid_store.SidStore):
+            def get(self, key):
+                return None
+
+            def set(self, key, data):
+                pass
+
+            def delete(self, key):
+                pass
+
+        with self.assertRaises(TypeError):
+            IncompleteStore()
+
+    def test_store_roundtrip(self):
+        """Fails if session data wasn't stored, returned and deleted."""
+        for store in self.stores:
+            with self.subTest(store=store):
+                self.assertIsNone(store.get("key"))
+                store.set("key", {"sid": "abc"})
+                self.assertEqual(store.get("key"), {"sid": "abc"})
+                store.delete("key")
+                self.assertIsNone(store.get("key"))
+
+    def test_lock_is_exclusive(self):
+        """Fails if a locked session key could be locked again."""
+        for store in self.stores:
+            with self.subTest(store=store):
+                store.lock_timeout = 0.1
+                errors = []
+
+                def contend():
+                    try:
+                        with store.lock("key"):
+                            pass
+                    except TimeoutError as e:
+                        errors.append(e)
+
+                with store.lock("key"):
+                    thread = threading.Thread(target=contend)
+                    thread.start()
+                    thread.join()
+                self.assertEqual(len(errors), 1)
+                with store.lock("key"):
+                    pass
+
+    def test_expired_lease_not_released_by_same_pid(self):
+        """Fails if a holder whose lease expired released a lease taken since by an owner with the same pid and thread."""
+        path = f"{self.tmpdir.name}/sids.sqlite3"
+        holder, forked = (
+            sid_store.SQLiteSidStore(path),
+            sid_store.SQLiteSidStore(path),
+        )
+        with holder.lock("key"):
+            with holder._connect() as conn:
+                conn.execute("UPDATE wialon_sid_locks SET expires = 0")
+            token = forked._acquire("key")
+            self.assertIsNotNone(token)
+        with forked._connect() as conn:
+            owners = conn.execute(
+                "SELECT owner FROM wialon_sid_locks"
+            ).fetchall()
+        self.assertEqual(owners, [(token,)])
+
+    def test_expired_lock_not_released_by_old_holder(self):
+        """Fails if a holder whose lock expired released a lock acquired since."""
+        store = sid_store.DjangoCacheSidStore(key_prefix="test-sid")
+        lock_key = "test-sid-lock:key"
+        with store.lock("key"):
+            # The lock expired and another process acquired it.
+            store.cache.set(lock_key, "other")
+        self.assertEqual(store.cache.get(lock_key), "other")
+        store.cache.delete(lock_key)
+        with store.lock("key"):
+            pass
+        self.assertIsNone(store.cache.get(lock_key))
+
+    def test_stored_sid_resumed(self):
+        """Fails if a new session logged in while a stored sid existed."""
+        for store in self.stores:
+            self.logins = 0
+            with self.subTest(store=store), self.urlopen():
+                with self.get_session(store) as first:
+                    first.wialon_api.core_search_items()
+                with self.get_session(store) as second:
+                    second.wialon_api.core_search_items()
+                self.assertEqual(self.logins, 1)
+                self.assertEqual(second.id, first.id)
+                self.assertEqual(second.username, "user")
+
+    def test_expired_sid_refreshed(self):
+        """Fails if an expired stored sid wasn't replaced on first use."""
+        for store in self.stores:
+            self.logins = 0
+            with self.subTest(store=store), self.urlopen():
+                with self.get_session(store) as first:
+                    pass
+                self.valid_sids.clear()
+                with self.get_session(store) as second:
+                    self.assertEqual(second.id, first.id)
+                    second.wialon_api.core_search_items()
+                self.assertEqual(self.logins, 2)
+                self.assertNotEqual(second.id, first.id)
+                self.assertEqual(
+                    store.get(second._sid_store_key)["sid"], second.id
+                )
+
+
+class FieldUpdaterTestCase(TestCase):
+    def setUp(self):
+        self.units = {
+            1: {
+                "id": 1,
+                "aflds": {"1": {"id": 1, "n": "carrier", "v": "ATT"}},
+            },
+            2: {
+                "id": 2,
+                "aflds": {
+                    "1": {"id": 1, "n": "carrier", "v": "Verizon"},
+                    "2": {"id": 2, "n": "iccid", "v": "8901"},
+                },
+            },
+        }
+        self.batches = []
+        self.session = mock.Mock()
+        self.session.wialon_api.batch.side_effect = self.batch
+
+    def batch(self, calls):
+        self.batches.append(calls)
+        results = []
+        for call in calls:
+            params = call["params"]
+            if call["svc"] == "core/search_item":
+                unit = self.units.get(params["id"])
+                results.append({"item": unit} if unit else {"error": 7})
+            else:
+                results.append([params["id"], {"n": params["n"]}])
+        return results
+
+    def test_unchanged_fields_skipped(self):
+        """Fails if fields that already had their value were written."""
+        updater = bulk.FieldUpdater(self.session)
+        results = updater.update(
+            {1: {"carrier": "ATT"}, 2: {"carrier": "ATT", "iccid": None}}
+        )
+        self.assertEqual(
+            [(r.unit_id, r.name, r.action) for r in results],
+            [
+                (1, "carrier", "skip"),
+                (2, "carrier", "update"),
+                (2, "iccid", "delete"),
+            ],
+        )
+        writes = self.batches[-1]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(writes[0]["svc"], "item/update_admin_field")
+        self.assertEqual(writes[0]["params"]["id"], 1)
+        self.assertNotIn("v", writes[1]["params"])
+
+    def test_writes_chunked(self):
+        """Fails if writes weren't split into batches of at most ``chunk_size`` calls."""
+        updater = bulk.FieldUpdater(self.session, chunk_size=1)
+        updater.update({1: {"iccid": "8902"}, 2: {"iccid": "8903"}})
+        self.assertEqual([len(calls) for calls in self.batches], [1, 1, 1, 1])
+        self.assertEqual(self.batches[2][0]["params"]["callMode"], "create")
+
+    def test_per_item_errors_reported(self):
+        """Fails if a failed unit read wasn't reported for each of its fields."""
+        updater = bulk.FieldUpdater(self.session, kind="custom")
+        results = updater.update({3: {"a": "1", "b": "2"}, 1: {"a": "1"}})
+        self.assertEqual([r.error for r in results], [7, 7, 0])
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[2].action, "create")
+
+    def test_batch_returns_item_errors(self):
+        """Fails if :py:meth:`~terminusgps.wialon.session.Wialon.batch` raised on a failed batch item."""
+        api = session.Wialon(codec=codecs.StdlibCodec())
+        content = json.dumps([{"error": 7}, {"item": {"id": 1}}]).encode()
+        response = FakeHTTPResponse(
+            content, {"Content-Type": "application/json"}
+        )
+        with mock.patch("urllib.request.urlopen", return_value=response):
+            self.assertEqual(
+                api.batch([{"svc": "core/search_item", "params": {}}] * 2),
+                [{"error": 7}, {"item": {"id": 1}}],
+            )
+        response = FakeHTTPResponse(
+            content, {"Content-Type": "application/json"}
+        )
+        with mock.patch("urllib.request.urlopen", return_value=response):
+            with self.assertRaises(session.WialonAPIError):
+                api.core_batch(**{"params": [], "flags": 0})
+
+
+class AccessUpdaterTestCase(TestCase):
+    def setUp(self):
+        self.access = {
+            10: {
+                "1": {"acl": constants.ACCESSMASK_UNIT_BASIC},
+                "2": {"acl": 1},
+            },
+            20: {},
+        }
+        self.lock = threading.Lock()
+        self.writes = []
+        self.session = mock.Mock()
+        self.session.wialon_api.user_get_items_access.side_effect = (
+            lambda **params: self.access[params["userId"]]
+        )
+        self.session.wialon_api.batch.side_effect = self.batch
+
+    def batch(self, calls):
+        with self.lock:
+            self.writes.extend(call["params"] for call in calls)
+        return [
+            {"error": 7} if call["params"]["itemId"] == 3 else {}
+            for call in calls
+        ]
+
+    def test_matching_access_skipped(self):
+        """Fails if items the user already had the access mask on were written."""
+        updater = bulk.AccessUpdater(self.session)
+        results = updater.apply(
+            [bulk.AccessPlan(10, [1, 2], constants.ACCESSMASK_UNIT_BASIC)]
+        )
+        self.assertEqual([r.action for r in results], ["skip", "update"])
+        self.assertEqual(
+            self.writes,
+            [
+                {
+                    "userId": 10,
+                    "itemId": 2,
+                    "accessMask": constants.ACCESSMASK_UNIT_BASIC,
+                }
+            ],
+        )
+
+    def test_plans_applied_for_every_user(self):
+        """Fails if a plan's results were missing or out of order."""
+        updater = bulk.AccessUpdater(self.session, max_workers=2)
+        results = updater.apply(
+            [
+                bulk.AccessPlan(10, [1], constants.ACCESSMASK_UNIT_BASIC),
+                bulk.AccessPlan(20, [2, 3], constants.ACCESSMASK_UNIT_BASIC),
+            ]
+        )
+        self.assertEqual(
+            [(r.user_id, r.item_id, r.ok) for r in results],
+            [(10, 1, True), (20, 2, True), (20, 3, False)],
+        )
+        self.assertEqual(len(self.writes), 2)
+
+
+class UnitMigrationTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = f"{self.tmpdir.name}/journal.jsonl"
+        self.units = {1: {}, 2: {}, 3: {}}
+        self.failing = {2}
+        self.calls = []
+        self.session = mock.Mock()
+        self.session.wialon_api.batch.side_effect = self.batch
+
+    def batch(self, calls):
+        results = []
+        for call in calls:
+            self.calls.append(call)
+            params = call["params"]
+            unit = self.units[params.get("itemId", params.get("id"))]
+            if call["svc"] == "account/change_account":
+                if params["itemId"] in self.failing:
+                    results.append({"error": 7})
+                    continue
+                unit["bact"] = params["resourceId"]
+            elif call["svc"] == "item/update_creator":
+                unit["crt"] = params["creatorId"]
+            elif call["svc"] == "core/search_item":
+                results.append({"item": dict(unit)})
+                continue
+            results.append({})
+        return results
+
+    def get_migration(self):
+        return migration.UnitMigration(
+            self.session,
+            migration.MigrationJournal(self.path),
+            creator_id=28,
+            account_id=29,
+            chunk_size=2,
+        )
+
+    def test_failed_units_stop_at_failed_stage(self):
+        """Fails if a unit failing a stage went through later stages."""
+        results = self.get_migration().run([1, 2, 3])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertEqual((results[1].stage, results[1].error), ("account", 7))
+        verified = [
+            c["params"]["id"]
+            for c in self.calls
+            if c["svc"] == "core/search_item"
+        ]
+        self.assertEqual(sorted(verified), [1, 3])
+
+    def test_resume_skips_completed_stages(self):
+        """Fails if a resumed migration repeated completed stages."""
+        self.get_migration().run([1, 2, 3])
+        self.failing.clear()
+        self.calls.clear()
+        results = self.get_migration().run([1, 2, 3])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(
+            [c["svc"] for c in self.calls],
+            [
+                "account/change_account",
+                "user/update_item_access",
+                "core/search_item",
+            ],
+        )
+
+    def test_journal_refuses_other_target(self):
+        """Fails if a journal resumed a migration to another account."""
+        self.get_migration().run([1])
+        other = migration.UnitMigration(
+            self.session,
+            migration.MigrationJournal(self.path),
+            creator_id=28,
+            account_id=30,
+        )
+        with self.assertRaises(ValueError):
+            other.run([1])
+        journal = migration.MigrationJournal(self.path)
+        self.assertEqual(journal.target["account_id"], 29)
+        journal.reset()
+        self.calls.clear()
+        other = migration.UnitMigration(
+            self.session, journal, creator_id=28, account_id=30
+        )
+        self.assertTrue(other.run([1])[0].ok)
+        self.assertEqual(self.units[1]["bact"], 30)
+        self.assertEqual(len(self.calls), 5)
+
+    def test_verify_detects_mismatch(self):
+        """Fails if a unit with the wrong account passed verification."""
+        self.failing.clear()
+        original = self.batch
+
+        def batch(calls):
+            results = original(calls)
+            self.units[3]["bact"] = 1
+            return results
+
+        self.session.wialon_api.batch.side_effect = batch
+        results = self.get_migration().run([3])
+        self.assertEqual(results[0].error, migration.VERIFY_FAILED)
+
+
+class CommandFanoutTestCase(TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.wialon_api.unit_exec_cmd.side_effect = self.exec_cmd
+        self.session.wialon_api.avl_evts.side_effect = lambda: {
+            "events": [
+                {"i": 1, "t": "m", "d": {"t": int(time.time())}},
+                {"i": 2, "t": "m", "d": {"t": int(time.time()) - 60}},
+                {"i": 2, "t": "u"},
+            ]
+        }
+        self.session.wialon_api.core_update_data_flags.return_value = [
+            {"i": 2, "f": int(flags.DataFlag.UNIT_BASE)}
+        ]
+
+    def exec_cmd(self, **params):
+        if params["itemId"] == 3:
+            raise session.WialonAPIError(wialon.api.WialonError(7, "x"))
+        return {}
+
+    def test_report_aggregates_results(self):
+        """Fails if delivery and acknowledgement weren't tracked per unit."""
+        fanout = commands.CommandFanout(
+            self.session, rate=100, ack_timeout=0.01
+        )
+        report = fanout.send([1, 2, 3], "Set config", param="APN=x")
+        self.assertEqual(report.delivered, 2)
+        self.assertEqual(report.acknowledged, 1)
+        self.assertEqual([r.unit_id for r in report.failed], [3])
+        self.assertEqual(report.failed[0].error, 7)
+        self.assertEqual(list(report.delivery_percentiles()), [50, 90, 99])
+        self.assertEqual(list(report.ack_percentiles((50,))), [50])
+        self.assertEqual(
+            report.results[0].acknowledged_at, float(int(time.time()))
+        )
+
+    def test_old_messages_not_acks(self):
+        """Fails if a message from before the command counted as an acknowledgement."""
+        fanout = commands.CommandFanout(
+            self.session, rate=100, ack_timeout=0.01
+        )
+        report = fanout.send([2], "Set config")
+        self.assertEqual(report.delivered, 1)
+        self.assertEqual(report.acknowledged, 0)
+
+    def test_keeps_existing_subscriptions(self):
+        """Fails if flags the session already held were removed afterwards."""
+        fanout = commands.CommandFanout(
+            self.session, rate=100, ack_timeout=0.01
+        )
+        fanout.send([1, 2], "Set config")
+        calls = self.session.wialon_api.core_update_data_flags.call_args_list
+        self.assertEqual(
+            [c.kwargs["spec"][0]["mode"] for c in calls], [1, 1, 2]
+        )
+        removed = {
+            unit_id: spec["flags"]
+            for spec in calls[-1].kwargs["spec"]
+            for unit_id in spec["data"]
+        }
+        self.assertEqual(
+            removed,
+            {
+                1: int(
+                    flags.DataFlag.UNIT_BASE | flags.DataFlag.UNIT_LAST_MESSAGE
+                ),
+                2: int(flags.DataFlag.UNIT_LAST_MESSAGE),
+            },
+        )
+
+    def test_no_acks_without_timeout(self):
+        """Fails if the session was subscribed without an ``ack_timeout``."""
+        report = commands.CommandFanout(self.session, rate=100).send(
+            [1], "Set config"
+        )
+        self.assertEqual(report.acknowledged, 0)
+        self.assertEqual(report.ack_percentiles(), {})
+        self.session.wialon_api.avl_evts.assert_not_called()
+
+    def test_cache_rate_limiter_shared_between_processes(self):
+        """Fails if limiters sharing a cache let more than ``rate`` requests through per window."""
+        workers = [
+            ratelimit.CacheRateLimiter(2, key="test-shared") for _ in range(2)
+        ]
+        with mock.patch("time.time", return_value=1000.25):
+            waits = [worker.try_acquire() for worker in workers * 2]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.75)
+        self.assertAlmostEqual(waits[3], 0.75)
+        with mock.patch("time.time", return_value=1001.0):
+            self.assertEqual(workers[1].try_acquire(), 0.0)
+
+    def test_token_bucket_limits_rate(self):
+        """Fails if a token bucket allowed more than its burst at once."""
+        bucket = ratelimit.TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertGreater(bucket.try_acquire(), 0.0)
+
+
+class ScheduleTestCase(TestCase):
+    def setUp(self):
+        self.schedule = schedules.Schedule(
+            day_mask=constants.WialonMonthDayMask.DAY_1
+            | constants.WialonMonthDayMask.DAY_19,
+            month_mask=constants.WialonMonthMask.JANUARY
+            | constants.WialonMonthMask.OCTOBER,
+            weekday_mask=constants.WialonWeekDayMask.MONDAY
+            | constants.WialonWeekDayMask.FRIDAY,
+            windows=[(9 * 60, 17 * 60), (23 * 60, 60)],
+            utc_offset=-5 * 3600,
+        )
+
+    def is_scheduled(self, timestamp):
+        local = datetime.datetime.fromtimestamp(
+            timestamp - 5 * 3600, datetime.UTC
+        )
+        minute = local.hour * 60 + local.minute
+        return (
+            local.day in (1, 19)
+            and local.month in (1, 10)
+            and local.weekday() in (0, 4)
+            and (
+                9 * 60 <= minute < 17 * 60 or minute >= 23 * 60 or minute < 60
+            )
+        )
+
+    def test_matches(self):
+        """Fails if a vectorised match differed from the calendar."""
+        timestamps = np.random.default_rng(0).integers(
+            0, 4_000_000_000, 20_000
+        )
+        expected = [self.is_scheduled(int(t)) for t in timestamps]
+        self.assertEqual(self.schedule.matches(timestamps).tolist(), expected)
+
+    def test_matches_datetime64(self):
+        """Fails if :py:class:`numpy.datetime64` values weren't evaluated."""
+        times = np.array(
+            ["2027-01-01T14:00", "2027-01-01T22:30"], dtype="datetime64[m]"
+        )
+        self.assertEqual(self.schedule.matches(times).tolist(), [True, False])
+
+    def test_next_match(self):
+        """Fails if the next matching instant wasn't the first scheduled minute."""
+        start = 1_760_000_000
+        found = self.schedule.next_match(start)
+        self.assertTrue(self.is_scheduled(found))
+        minute = (start // 60 + 1) * 60
+        self.assertFalse(self.is_scheduled(start))
+        self.assertFalse(
+            any(self.is_scheduled(t) for t in range(minute, int(found), 3600))
+        )
+        self.assertEqual(self.schedule.next_match(found), found)
+
+    def test_never_matching_schedule(self):
+        """Fails if a schedule without matching days returned a next match."""
+        schedule = schedules.Schedule(
+            day_mask=constants.WialonMonthDayMask.DAY_31,
+            month_mask=constants.WialonMonthMask.FEBRUARY,
+        )
+        self.assertIsNone(schedule.next_match(0))
+        self.assertFalse(schedule.matches([0, 86400 * 40]).any())
+
+    def test_from_wialon(self):
+        """Fails if a Wialon schedule dictionary wasn't compiled."""
+        schedule = schedules.Schedule.from_wialon(
+            {"f1": 60, "f2": 120, "t1": 0, "t2": 0, "m": 0, "y": 0, "w": 0}
+        )
+        self.assertEqual(schedule.windows, ((60, 120),))
+        self.assertEqual(schedule.next_match(0), 3600)
+
+
+class LogParserTestCase(TestCase):
+    def test_every_action_has_templates(self):
+        """Fails if a log action had no message templates."""
+        templates = logs.get_templates()
+        for action in constants.WialonLogAction:
+            with self.subTest(action=action):
+                self.assertTrue(templates.get(action))
+        self.assertEqual(
+            templates[constants.WialonLogAction.UPDATE_UNIT_UID],
+            ("Unique ID changed from '%s' to '%s'.",),
+        )
+        self.assertEqual(
+            len(templates[constants.WialonLogAction.SET_ACTIVE]), 3
+        )
+
+    def test_parse_log_message(self):
+        """Fails if values weren't extracted and converted from a log message."""
+        event = logs.parse_log_message(
+            1,
+            {
+                "t": 100,
+                "a": "update_unit_ehcounter",
+                "x": "Engine hours counter changed from 1.50 h to 2.00 h.",
+                "u": "admin",
+            },
+        )
+        self.assertEqual(
+            event.action, constants.WialonLogAction.UPDATE_UNIT_EHCOUNTER
+        )
+        self.assertEqual(event.args, (1.5, 2.0))
+        self.assertEqual((event.time, event.user), (100, "admin"))
+        event = logs.parse_log_message(
+            1,
+            {"a": "units_group", "x": "Unit removed from the group 'Fleet'."},
+        )
+        self.assertEqual((event.args, event.template), (("Fleet",), 1))
+
+    def test_unmatched_messages(self):
+        """Fails if an unknown action or message raised."""
+        event = logs.parse_log_message(1, {"a": "new_action", "x": "Hi"})
+        self.assertEqual(
+            (event.action, event.args, event.template), ("new_action", (), -1)
+        )
+        event = logs.parse_log_message(1, {"a": "update_unit_uid", "x": "Hi"})
+        self.assertEqual((event.args, event.template), ((), -1))
+
+    def test_index(self):
+        """Fails if events weren't indexed by action and item."""
+        messages = [
+            {
+                "a": "update_unit_uid",
+                "x": "Unique ID changed from '1' to '2'.",
+            },
+            {
+                "a": "update_unit_phone",
+                "x": "Phone number changed from '1' to '2'.",
+            },
+        ]
+        index = logs.LogIndex(
+            logs.parse_log_message(item_id, message)
+            for item_id in (1, 2)
+            for message in messages
+        )
+        uid = constants.WialonLogAction.UPDATE_UNIT_UID
+        self.assertEqual(len(index.get(action=uid)), 2)
+        self.assertEqual(len(index.get(item_id=2)), 2)
+        self.assertEqual(
+            [e.item_id for e in index.get(action=uid, item_id=2)], [2]
+        )
+        self.assertEqual(
+            index.counts(), {"update_unit_uid": 2, "update_unit_phone": 2}
+        )
+
+    def test_item_log_loaded_in_chunks(self):
+        """Fails if log messages weren't fetched in chunks and unloaded."""
+        session = mock.Mock()
+        session.wialon_api.messages_load_interval.return_value = {"count": 5}
+        session.wialon_api.messages_get_messages.side_effect = (
+            lambda **params: [
+                {"t": i}
+                for i in range(params["indexFrom"], params["indexTo"] + 1)
+            ]
+        )
+        messages = logs.iter_item_log(session, 1, 0, 100, chunk_size=2)
+        self.assertEqual(next(messages), {"t": 0})
+        messages.close()
+        session.wialon_api.messages_unload.assert_called_once()
+        times = [
+            m["t"]
+            for m in logs.iter_item_log(session, 1, 0, 100, chunk_size=2)
+        ]
+        self.assertEqual(times, [0, 1, 2, 3, 4])
+        self.assertEqual(
+            session.wialon_api.messages_get_messages.call_count, 4
+        )
+
+
+class CredentialTestCase(TestCase):
+    def test_passwords_compliant(self):
+        """Fails if a generated password didn't meet the Wialon password rules."""
+        for length in (8, 9, 32, 64):
+            for password in utils.generate_wialon_passwords(200, length):
+                self.assertEqual(len(password), length)
+                self.assertTrue(any(c.isupper() for c in password))
+                self.assertTrue(any(c.islower() for c in password))
+                self.assertGreaterEqual(sum(c.isdigit() for c in password), 3)
+                self.assertTrue(any(c in "!@#$%^*()[]-_+" for c in password))
+
+    def test_invalid_length_raises_valueerror(self):
+        """Fails if a password length outside of 8 to 64 was accepted."""
+        for length in (7, 65):
+            with self.assertRaises(ValueError):
+                utils.generate_wialon_password(length)
+            with self.assertRaises(ValueError):
+                utils.generate_wialon_passwords(0, length)
+
+    def test_create_users(self):
+        """Fails if users weren't created in batches with their own passwords."""
+        session = mock.Mock()
+        session.wialon_api.batch.side_effect = lambda calls: [
+            {"error": 1002}
+            if call["params"]["name"] == "taken"
+            else {"item": {"id": 100 + i}}
+            for i, call in enumerate(calls)
+        ]
+        credentials = bulk.create_users(
+            session, ["a", "taken", "b"], creator_id=1, chunk_size=2
+        )
+        self.assertEqual(
+            [(c.name, c.user_id, c.error) for c in credentials],
+            [("a", 100, 0), ("taken", None, 1002), ("b", 100, 0)],
+        )
+        self.assertEqual(session.wialon_api.batch.call_count, 2)
+        self.assertEqual(len({c.password for c in credentials}), 3)
+        self.assertNotIn(credentials[0].password, repr(credentials[0]))
+
+
+class ReverseGeocoderTestCase(TestCase):
+    def setUp(self):
+        import http.server
+
+        requests = self.requests = []
+
+        class GISHandler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                params = urllib.parse.parse_qs(body.decode())
+                coords = json.loads(params["coords"][0])
+                requests.append((self.path, params))
+                content = json.dumps(
+                    [f"{c['lat']:.4f}, {c['lon']:.4f}" for c in coords]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.HTTPServer(("127.0.0.1", 0), GISHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.session = mock.Mock(uid="42", gis_sid="gis-sid")
+        self.session.wialon_api.codec = codecs.StdlibCodec()
+        self.geocoder = geocoding.ReverseGeocoder(
+            self.session,
+            gis_url=f"http://127.0.0.1:{self.server.server_port}",
+            batch_size=2,
+        )
+
+    def test_encode_geohash(self):
+        """Fails if a geohash didn't match the reference encoding."""
+        self.assertEqual(
+            geocoding.encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj"
+        )
+
+    def test_reverse_batches_uncached_cells(self):
+        """Fails if coordinates weren't geocoded in batches of uncached cells."""
+        coordinates = [(32.7767, -96.797), (40.7128, -74.006), (51.5, -0.12)]
+        addresses = self.geocoder.reverse(coordinates)
+        self.assertEqual(addresses[1], "40.7128, -74.0060")
+        self.assertEqual(len(self.requests), 2)
+        path, params = self.requests[0]
+        self.assertEqual(path, "/gis_geocode")
+        self.assertEqual(params["sid"], ["gis-sid"])
+        self.assertEqual(params["uid"], ["42"])
+
+    def test_nearby_coordinates_hit_cache(self):
+        """Fails if coordinates in a cached cell were requested again."""
+        self.geocoder.reverse([(32.7767, -96.797)])
+        addresses = self.geocoder.reverse(
+            [(32.77671, -96.79701), (32.77672, -96.79699)]
+        )
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(addresses, ["32.7767, -96.7970"] * 2)
+        self.assertEqual(self.geocoder.cache.hits, 1)
+
+    def test_cache_expiry_and_eviction(self):
+        """Fails if expired or least recently used addresses stayed cached."""
+        cache = geocoding.GeohashCache(max_size=2, ttl=60)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.get("a")
+        cache.set("c", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        with mock.patch("time.monotonic", return_value=1e12):
+            self.assertIsNone(cache.get("a"))
+
+    def test_gis_error_raises_wialonapierror(self):
+        """Fails if an unreachable GIS service didn't raise WialonAPIError."""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaises(session.WialonAPIError):
+            self.geocoder.reverse([(0.0, 0.0)])
+
+
+class TripAnalyzerTestCase(TestCase):
+    def setUp(self):
+        # 10 minutes driving north at 60 km/h, 10 minutes parked, 5 minutes driving.
+        speeds = [60.0] * 10 + [0.0] * 10 + [60.0] * 6
+        lats = np.cumsum([0.0] + [s / 60 / 111.195 for s in speeds[:-1]])
+        self.track = trips.Track(
+            unit_id=1,
+            times=np.arange(len(speeds)) * 60 + 86400 - 600,
+            lats=32.0 + lats,
+            lons=np.full(len(speeds), -97.0),
+            speeds=np.array(speeds),
+            ignition=np.array([s > 0 for s in speeds]),
+        )
+        self.analyzer = trips.TripAnalyzer(min_stop_duration=300)
+
+    def test_haversine(self):
+        """Fails if a haversine distance was wrong."""
+        distance = trips.haversine(0.0, 0.0, 1.0, 0.0)
+        self.assertAlmostEqual(float(distance), 111_195, delta=1)
+
+    def test_trips_and_stops(self):
+        """Fails if a track wasn't split into trips at its stops."""
+        summary = self.analyzer.analyze(self.track)
+        self.assertEqual(len(summary.stops), 1)
+        self.assertEqual(summary.stops[0].duration, 600)
+        self.assertEqual(
+            [(t.start_index, t.end_index) for t in summary.trips],
+            [(0, 10), (19, 25)],
+        )
+        self.assertAlmostEqual(summary.trips[0].distance, 10_000, delta=5)
+        self.assertAlmostEqual(summary.distance, 15_000, delta=10)
+
+    def test_short_stop_stays_in_trip(self):
+        """Fails if a stop shorter than the minimum split a trip."""
+        analyzer = trips.TripAnalyzer(min_stop_duration=900)
+        summary = analyzer.analyze(self.track)
+        self.assertEqual(summary.stops, [])
+        self.assertEqual(len(summary.trips), 1)
+
+    def test_daily_mileage(self):
+        """Fails if distance wasn't totaled by date."""
+        mileage = self.analyzer.analyze(self.track).mileage
+        self.assertEqual(
+            list(mileage),
+            [datetime.date(1970, 1, 1), datetime.date(1970, 1, 2)],
+        )
+        self.assertAlmostEqual(
+            mileage[datetime.date(1970, 1, 1)], 10_000, delta=5
+        )
+
+    def test_from_messages(self):
+        """Fails if messages without a position weren't skipped."""
+        messages = [
+            {"t": 1, "pos": {"y": 1.0, "x": 2.0, "s": 5}, "p": {"io_1": 1}},
+            {"t": 2, "pos": None, "p": {}},
+            {"t": 3, "pos": {"y": 1.0, "x": 2.0, "s": 0}, "p": {"io_1": 0}},
+        ]
+        track = trips.Track.from_messages(7, messages, "io_1")
+        self.assertEqual(track.times.tolist(), [1, 3])
+        self.assertEqual(track.ignition.tolist(), [True, False])
+
+    def test_analyze_units(self):
+        """Fails if unit tracks weren't loaded and analyzed in the process pool."""
+        session = mock.Mock()
+        session.wialon_api.messages_load_interval.return_value = {"count": 2}
+        session.wialon_api.messages_get_messages.return_value = [
+            {"t": 0, "pos": {"y": 0.0, "x": 0.0, "s": 60}},
+            {"t": 60, "pos": {"y": 0.01, "x": 0.0, "s": 60}},
+        ]
+        summaries = self.analyzer.analyze_units(
+            session, [1, 2], 0, 100, max_workers=1
+        )
+        self.assertEqual(list(summaries), [1, 2])
+        self.assertAlmostEqual(summaries[2].distance, 1112, delta=1)
+        self.assertEqual(session.wialon_api.messages_unload.call_count, 2)
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        self.api = session.Wialon(sid="sid")
+        self.release = threading.Event()
+        self.requests = []
+
+        def request(action_name, url, params):
+            self.requests.append(params["params"])
+            self.release.wait(5)
+            return {"items": [{"id": len(self.requests)}]}
+
+        self.api.request = request
+
+    def test_threads_share_response(self):
+        """Fails if identical concurrent reads sent more than one request."""
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.api.core_search_items(spec={"propValueMask": "123"})
+                )
+            )
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        while self.api.metrics.coalesced < 9:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(r == results[0] for r in results))
+        results[0]["items"].clear()
+        self.assertEqual(results[1], {"items": [{"id": 1}]})
+        self.assertEqual(len({id(r) for r in results}), 10)
+
+    def test_errors_are_shared(self):
+        """Fails if waiters didn't receive the error of the shared call."""
+
+        def request(action_name, url, params):
+            self.release.wait(5)
+            raise wialon.api.WialonError(7, action_name)
+
+        self.api.request = request
+        errors = []
+
+        def search():
+            try:
+                self.api.core_search_item(id=1, flags=1)
+            except session.WialonAPIError as e:
+                errors.append(e.code)
+
+        threads = [threading.Thread(target=search) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while self.api.metrics.coalesced < 2:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [7, 7, 7])
+
+    def test_writes_and_different_params_not_coalesced(self):
+        """Fails if writes or reads with different parameters were coalesced."""
+        self.release.set()
+        self.api.core_search_item(id=1, flags=1)
+        self.api.core_search_item(id=2, flags=1)
+        self.api.unit_update_name(itemId=1, name="Unit")
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.api.metrics.coalesced, 0)
+
+    def test_asyncio_tasks_share_response(self):
+        """Fails if identical concurrent awaited reads sent more than one request."""
+        self.release.set()
+
+        async def main():
+            return await asyncio.gather(
+                *(
+                    self.api.acall("core_search_items", spec={})
+                    for _ in range(5)
+                )
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.api.metrics.coalesced, 4)
+        self.assertEqual(results, [{"items": [{"id": 1}]}] * 5)
+        self.assertEqual(len({id(r) for r in results}), 5)
+
+
+class CallBatcherTestCase(TestCase):
+    def setUp(self):
+        self.api = session.Wialon(sid="sid")
+        self.api.batcher = batching.CallBatcher(
+            self.api.batch, max_delay=0.05, max_size=5
+        )
+        self.batches = []
+
+        def request(action_name, url, params):
+            calls = json.loads(params["params"])["params"]
+            self.batches.append([call["svc"] for call in calls])
+            return [
+                {"error": 7}
+                if call["params"]["id"] == 0
+                else {"item": {"id": call["params"]["id"]}}
+                for call in calls
+            ]
+
+        self.api.request = request
+
+    def search(self, unit_ids):
+        results = {}
+
+        def search(unit_id):
+            try:
+                results[unit_id] = self.api.core_search_item(
+                    id=unit_id, flags=1
+                )["item"]["id"]
+            except session.WialonAPIError as e:
+                results[unit_id] = e.code
+
+        threads = [
+            threading.Thread(target=search, args=(unit_id,))
+            for unit_id in unit_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_calls_batched(self):
+        """Fails if concurrent calls weren't sent in batches of at most max_size."""
+        results = self.search(range(1, 11))
+        self.assertEqual(results, {i: i for i in range(1, 11)})
+        self.assertEqual(sum(len(batch) for batch in self.batches), 10)
+        self.assertLess(len(self.batches), 10)
+        self.assertTrue(all(len(batch) <= 5 for batch in self.batches))
+        self.assertEqual(self.api.metrics.batched, 10)
+
+    def test_errors_returned_to_their_caller(self):
+        """Fails if a failed call's error wasn't raised to its own caller only."""
+        results = self.search([0, 1, 2])
+        self.assertEqual(results, {0: 7, 1: 1, 2: 2})
+
+    def test_single_call_sent_after_delay(self):
+        """Fails if a lone call wasn't sent once the batch delay elapsed."""
+        self.assertEqual(self.search([3]), {3: 3})
+        self.assertEqual(self.batches, [["core/search_item"]])
+
+    def test_session_auto_batch(self):
+        """Fails if auto batching wasn't opt-in or login calls were batched."""
+        self.assertIsNone(session.WialonSession(token="t").wialon_api.batcher)
+        wialon_session = session.WialonSession(token="t", auto_batch=True)
+        api = wialon_session.wialon_api
+        self.assertIsInstance(api.batcher, batching.CallBatcher)
+        with mock.patch.object(
+            api, "request", return_value={"eid": "sid", "au": "user"}
+        ) as request:
+            wialon_session.token_login("t")
+        self.assertEqual(request.call_args.args[0], "token/login")
+        self.assertEqual(api.metrics.batched, 0)
+
+
+class StreamingTestCase(TestCase):
+    def setUp(self):
+        self.payload = {
+            "searchSpec": {"itemsType": "avl_unit", "propValueMask": "*"},
+            "totalItemsCount": 3,
+            "items": [
+                {"id": 1, "nm": 'Ünit "1" ✓', "pos": {"y": 32.5, "x": -97.25}},
+                {"id": 22, "nm": "Unit [2]", "flds": {}, "sens": []},
+                {"id": 333, "nm": "{3}", "aflds": {"1": {"v": "8901"}}},
+            ],
+            "indexTo": 2,
+        }
+        self.content = json.dumps(self.payload, ensure_ascii=False).encode()
+
+    def test_items_match_any_chunking(self):
+        """Fails if streamed items or fields differed from a full parse at any chunk size."""
+        for size in range(1, len(self.content) + 1):
+            chunks = [
+                self.content[i : i + size]
+                for i in range(0, len(self.content), size)
+            ]
+            fields = {}
+            items = list(streaming.iter_json_array(chunks, "items", fields))
+            self.assertEqual(items, self.payload["items"], size)
+            self.assertEqual(fields["totalItemsCount"], 3)
+            self.assertEqual(fields["indexTo"], 2)
+
+    def test_items_decoded_lazily(self):
+        """Fails if the stream was read ahead of the yielded items."""
+        content = json.dumps({"items": [{"id": i} for i in range(10000)]})
+        read = []
+
+        def chunks():
+            for i in range(0, len(content), 1024):
+                read.append(i)
+                yield content[i : i + 1024].encode()
+
+        items = streaming.iter_json_array(chunks())
+        self.assertEqual(next(items), {"id": 0})
+        self.assertLessEqual(len(read), 2)
+        self.assertEqual(sum(1 for _ in items), 9999)
+
+    def test_large_item_decoded_once(self):
+        """Fails if an item spanning many chunks was re-parsed after every chunk."""
+        item = {
+            "id": 1,
+            "msgs": [{"t": i, "p": 'a\\"]}'} for i in range(2000)],
+        }
+        content = json.dumps({"items": [item]}).encode()
+        chunks = [content[i : i + 64] for i in range(0, len(content), 64)]
+        decoder = mock.Mock(wraps=streaming._decoder)
+        with mock.patch.object(streaming, "_decoder", decoder):
+            self.assertEqual(list(streaming.iter_json_array(chunks)), [item])
+        self.assertGreater(len(chunks), 500)
+        self.assertLess(decoder.raw_decode.call_count, 5)
+
+    def test_invalid_stream_raises_valueerror(self):
+        """Fails if a truncated or non-object stream didn't raise ValueError."""
+        for content in (b'{"items": [{"id": 1}', b"[1, 2]"):
+            with self.assertRaises(ValueError):
+                list(streaming.iter_json_array([content]))
+
+    def test_wialon_iter_items(self):
+        """Fails if Wialon.iter_items didn't stream items of a compressed response."""
+        api = session.Wialon()
+        response = FakeHTTPResponse(
+            gzip.compress(self.content),
+            {"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        with mock.patch("urllib.request.urlopen", return_value=response):
+            items = api.iter_items({"spec": {}, "flags": 1, "force": 1})
+            self.assertEqual(list(items), self.payload["items"])
+        self.assertEqual(api.metrics.decoded_bytes, len(self.content))
+
+    def test_wialon_iter_items_error(self):
+        """Fails if an error response didn't raise WialonAPIError from the call."""
+        api = session.Wialon()
+        response = FakeHTTPResponse(
+            b'{"error": 4}', {"Content-Type": "application/json"}
+        )
+        with mock.patch("urllib.request.urlopen", return_value=response):
+            with self.assertRaises(session.WialonAPIError) as ctx:
+                api.iter_items({"spec": {}})
+        self.assertEqual(ctx.exception.code, 4)
+
+
+class CallSchedulerTestCase(TestCase):
+    def setUp(self):
+        self.scheduler = scheduler.CallScheduler(rate=1)
+        self.permits = threading.Semaphore(0)
+        self.scheduler._bucket = mock.Mock()
+        self.scheduler._bucket.try_acquire.side_effect = lambda: (
+            0.0 if self.permits.acquire(blocking=False) else 0.002
+        )
+
+    def wait_for(self, predicate):
+        for _ in range(5000):
+            if predicate(self.scheduler.metrics()):
+                return
+            threading.Event().wait(0.001)
+        self.fail("Timed out waiting for the scheduler.")
+
+    def grant_order(self, priorities):
+        threads = []
+        for priority in priorities:
+            thread = threading.Thread(
+                target=self.scheduler.acquire, args=(priority,)
+            )
+            thread.start()
+            threads.append(thread)
+            self.wait_for(
+                lambda m: sum(c.queued for c in m.values()) == len(threads)
+            )
+        order = []
+        for granted in range(1, len(threads) + 1):
+            before = self.scheduler.metrics()
+            self.permits.release()
+            self.wait_for(
+                lambda m: sum(c.granted for c in m.values()) == granted
+            )
+            after = self.scheduler.metrics()
+            order.extend(
+                name
+                for name in after
+                if after[name].granted > before[name].granted
+            )
+        for thread in threads:
+            thread.join()
+        return order
+
+    def test_interactive_preempts_bulk(self):
+        """Fails if waiting bulk calls went before later interactive calls."""
+        P = scheduler.Priority
+        order = self.grant_order(
+            [P.BULK, P.BULK, P.INTERACTIVE, P.INTERACTIVE]
+        )
+        self.assertEqual(order, ["interactive", "interactive", "bulk", "bulk"])
+
+    def test_weighted_fair_queuing(self):
+        """Fails if contending classes weren't served in proportion to their weights."""
+        P = scheduler.Priority
+        order = self.grant_order([P.BULK] * 4 + [P.NORMAL] * 6)
+        self.assertEqual(order[:4].count("normal"), 3)
+        self.assertEqual(order.count("bulk"), 4)
+
+    def test_metrics(self):
+        """Fails if queue depth and wait time weren't recorded per class."""
+        self.permits.release()
+        self.scheduler.acquire(scheduler.Priority.INTERACTIVE)
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics["interactive"].granted, 1)
+        self.assertEqual(metrics["interactive"].queued, 0)
+        self.assertGreaterEqual(metrics["interactive"].wait_max, 0.0)
+        self.assertEqual(metrics["bulk"].granted, 0)
+
+    def test_session_calls_use_call_priority(self):
+        """Fails if session requests didn't wait for the scheduler at the caller's priority."""
+        wialon_session = session.WialonSession(
+            sid="sid", scheduler=self.scheduler
+        )
+        self.permits.release()
+        self.permits.release()
+        with mock.patch(
+            "urllib.request.urlopen",
+            side_effect=lambda request: FakeHTTPResponse(
+                b'{"item": {}}', {"Content-Type": "application/json"}
+            ),
+        ):
+            wialon_session.wialon_api.core_search_item(id=1, flags=1)
+            with scheduler.call_priority(scheduler.Priority.INTERACTIVE):
+                wialon_session.wialon_api.core_search_item(id=1, flags=1)
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics["normal"].granted, 1)
+        self.assertEqual(metrics["interactive"].granted, 1)
+
+    def test_priority_reaches_pool_workers(self):
+        """Fails if calls fanned out to a thread pool didn't run at the caller's priority."""
+        priorities = []
+        wialon_session = mock.Mock()
+        wialon_session.wialon_api.unit_exec_cmd.side_effect = lambda **params: (
+            priorities.append(scheduler._priority.get())
+        )
+        fanout = commands.CommandFanout(
+            wialon_session, rate=100, max_workers=4
+        )
+        with scheduler.call_priority(scheduler.Priority.BULK):
+            fanout.send([1, 2, 3, 4], "Set config")
+        self.assertEqual(priorities, [scheduler.Priority.BULK] * 4)